@@ -0,0 +1,545 @@
+# -------------------------------------------#
+# Description: Benchmarks that compare the
+#   running time of the placement algorithms
+# -------------------------------------------#
+
+import asyncio
+import copy
+import random
+import time
+import DAG
+import os
+import tempfile
+import tracemalloc
+import variables
+from PlacementFunctions import *
+from ResultsSink import ResultsSink
+from Main import place_graph, calculate_objective_global, optimize_global_F_byUtil, optimize_global_F_by_objective, \
+    optimize_global_F_local_search
+from PlacementService import PlacementService, run_workload
+
+
+# Time a placement function and return its result and the best running time over the repetitions
+def time_placement(function, arguments, repetitions):
+    best_time = None
+    result = None
+    for repetition in range(repetitions):
+        start = time.perf_counter()
+        result = function(*arguments)
+        elapsed = time.perf_counter() - start
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+    return result, best_time
+
+
+# Compare the DP that walks back the chain of each state (find_free_cpu_ram) against the DP
+# that carries the used CPU/RAM along with each state, on long chain DAGs
+def benchmark_dp_accounting(chain_lengths=(10, 25, 50, 100), repetitions=3, seed=0):
+    random.seed(seed)
+    variables.init()
+    availability = [1] * variables.infrastructure.number_of_edge_devices
+    results = []
+    print("nodes back_walk_sec carried_sec speedup same_placement")
+    for number_of_nodes in chain_lengths:
+        graph = DAG.create_seq_dag(0, 0, number_of_nodes, random.randint(1, 10))
+        enabled = variables.set_alg_setting([graph]).enabled
+        result_walk, time_walk = time_placement(DP_placement, (graph, enabled, availability, []), repetitions)
+        result_carried, time_carried = time_placement(DP_placement_np, (graph, enabled, availability, []),
+                                                      repetitions)
+        same_placement = result_walk[4] == result_carried[4]
+        results.append([graph.number_of_nodes, time_walk, time_carried, same_placement])
+        print(graph.number_of_nodes, round(time_walk, 4), round(time_carried, 4),
+              round(time_walk / time_carried, 1), same_placement)
+    return results
+
+
+# Compare the QP with one latency constraint per path against the QP with one arrival time per node,
+# on replicated DAGs whose number of paths grows quadratically with their size
+def benchmark_qp_formulations(dag_sizes=(1, 2, 3), edge_devices=10, repetitions=1, seed=0):
+    random.seed(seed)
+    variables.init(edge_devices)
+    results = []
+    print("nodes edges paths paths_sec arrival_sec paths_latency arrival_latency")
+    for number_of_nodes in dag_sizes:
+        graph = DAG.create_replicated_dag(0, 0, number_of_nodes, random.randint(1, 10))
+        enabled = variables.set_alg_setting([graph]).enabled
+        number_of_edges = len(graph.child_index)
+        number_of_paths = len(graph.get_paths())
+        result_paths, time_paths = time_placement(QP_placement, (graph, enabled, "lat", [], "paths"), repetitions)
+        result_arrival, time_arrival = time_placement(QP_placement, (graph, enabled, "lat", [], "arrival"),
+                                                      repetitions)
+        results.append([graph.number_of_nodes, number_of_edges, number_of_paths, time_paths, time_arrival,
+                        result_paths[1], result_arrival[1]])
+        print(graph.number_of_nodes, number_of_edges, number_of_paths, round(time_paths, 4), round(time_arrival, 4),
+              result_paths[1], result_arrival[1])
+    return results
+
+
+# Compare the time to build and the time to solve the QP models against the linearized MILP model
+def benchmark_milp(dag_types=("S", "D", "R"), number_of_nodes=2, edge_devices=10, resource_opt="lat", seed=0):
+    random.seed(seed)
+    variables.init(edge_devices)
+    builders = {"S": DAG.create_seq_dag, "D": DAG.create_diamond_dag, "R": DAG.create_replicated_dag}
+    results = []
+    print("dag algorithm build_sec solve_sec latency")
+    for dag_type in dag_types:
+        graph = builders[dag_type](0, 0, number_of_nodes, random.randint(1, 10))
+        enabled = variables.set_alg_setting([graph]).enabled
+        for algorithm, function, arguments in [("QP", QP_placement, (resource_opt, [], "paths")),
+                                               ("QP_ARR", QP_placement, (resource_opt, [], "arrival")),
+                                               ("MILP", MILP_placement, (resource_opt, []))]:
+            timings = {}
+            result = function(graph, enabled, *arguments, timings=timings)
+            results.append([dag_type, algorithm, timings["build"], timings["solve"], result[1]])
+            print(dag_type, algorithm, round(timings["build"], 4), round(timings["solve"], 4), result[1])
+    return results
+
+
+# Function that finds the type of a DAG ("S", "D" or "R"). The DAGs of the DAG module keep the shape they were
+# created with, since a diamond with a single middle node has the same edges as a chain
+def find_dag_type(graph):
+    if graph.shape is not None:
+        return graph.shape
+    if is_chain(graph):
+        return "S"
+    if len(graph.children(graph.source)) == graph.number_of_nodes - 2:
+        return "D"
+    return "R"
+
+
+# Measure the solve time that the DP warm start saves for each type of DAG, over the grid of main_experiment
+# (algorithms x resource optimizations, with the DAGs of each iteration placed one after the other)
+def benchmark_warm_start(iterations=1, edge_devices=10, algorithms=("QP", "MILP"), seed=0):
+    functions = {"QP": QP_placement, "MILP": MILP_placement}
+    saved = {}  # Values: [cold solve time, warm solve time including the DP, number of DAGs]
+    for iteration in range(iterations):
+        random.seed(seed + iteration)
+        variables.init(edge_devices)
+        graphs = variables.create_graphs()
+        for algorithm in algorithms:
+            for resource_opt in ["lat", "enabled", "min"]:
+                enabled_cold = variables.set_alg_setting(graphs).enabled
+                enabled_warm = copy.deepcopy(enabled_cold)
+                for graph in graphs:
+                    timings_cold = {}
+                    timings_warm = {}
+                    result_cold = functions[algorithm](graph, enabled_cold, resource_opt, [], timings=timings_cold)
+                    result_warm = functions[algorithm](graph, enabled_warm, resource_opt, [], timings=timings_warm,
+                                                       warm_start=True)
+                    if result_cold[0] == 1:
+                        enabled_cold = result_cold[5]
+                    if result_warm[0] == 1:
+                        enabled_warm = result_warm[5]
+                    key = (algorithm, resource_opt, find_dag_type(graph))
+                    totals = saved.setdefault(key, [0, 0, 0])
+                    totals[0] += timings_cold["solve"]
+                    totals[1] += timings_warm["solve"] + timings_warm.get("heuristic", 0)
+                    totals[2] += 1
+    print("algorithm mode dag dags cold_sec warm_sec saved_sec")
+    for key in sorted(saved):
+        cold, warm, number_of_dags = saved[key]
+        print(key[0], key[1], key[2], number_of_dags, round(cold, 4), round(warm, 4), round(cold - warm, 4))
+    return saved
+
+
+# Measure the time to optimal of each solver backend on the same DAGs. The Gurobi backend is
+# skipped when gurobipy is not installed
+def benchmark_backends(dag_types=("S", "D", "R"), number_of_nodes=2, edge_devices=10, resource_opt="lat",
+                       backend_names=("gurobi", "highs"), seed=0):
+    random.seed(seed)
+    variables.init(edge_devices)
+    builders = {"S": DAG.create_seq_dag, "D": DAG.create_diamond_dag, "R": DAG.create_replicated_dag}
+    runs = []
+    for backend in backend_names:
+        try:
+            get_backend(backend)
+        except ImportError:
+            print("Skipping the", backend, "backend, its solver is not installed")
+            continue
+        runs.append((backend, "MILP", MILP_placement, ()))
+        if backend == "gurobi":
+            runs.append((backend, "QP", QP_placement, ("paths",)))
+    results = []
+    print("dag backend algorithm solve_sec latency")
+    for dag_type in dag_types:
+        graph = builders[dag_type](0, 0, number_of_nodes, random.randint(1, 10))
+        enabled = variables.set_alg_setting([graph]).enabled
+        for backend, algorithm, function, arguments in runs:
+            timings = {}
+            result = function(graph, enabled, resource_opt, [], *arguments, timings=timings, backend=backend)
+            results.append([dag_type, backend, algorithm, timings["solve"], result[1]])
+            print(dag_type, backend, algorithm, round(timings["solve"], 4), result[1])
+    return results
+
+
+# Place DAGs with the anytime algorithm under each deadline and compare its running time and latency against
+# the MILP algorithm without a time limit. It reports how often the solver improved on the DP placement and the
+# average optimality gap of the placements whose gap is known
+def benchmark_anytime(deadlines=(0.01, 0.05, 0.2, 1.0), number_of_dags=20, number_of_nodes=2, edge_devices=10,
+                      resource_opt="lat", backend="gurobi", seed=0):
+    random.seed(seed)
+    variables.init(edge_devices)
+    builders = [DAG.create_seq_dag, DAG.create_diamond_dag, DAG.create_replicated_dag]
+    graphs = [random.choice(builders)(0, dag, number_of_nodes, random.randint(1, 10)) for dag in range(number_of_dags)]
+    enabled = variables.set_alg_setting(graphs).enabled
+    optimal_latency = [MILP_placement(graph, enabled, resource_opt, [], backend=backend)[1] for graph in graphs]
+    results = []
+    print("deadline_sec mean_sec max_sec latency_over_optimal solver_share mean_gap")
+    for deadline in deadlines:
+        elapsed = []
+        ratios = []
+        methods = []
+        gaps = []
+        for graph, optimal in zip(graphs, optimal_latency):
+            report = {}
+            start = time.perf_counter()
+            result = anytime_placement(graph, enabled, resource_opt, [], deadline, backend=backend, report=report)
+            elapsed.append(time.perf_counter() - start)
+            ratios.append(result[1] / optimal)
+            methods.append(report["method"])
+            if report["gap"] is not None:
+                gaps.append(report["gap"])
+        result = [deadline, np.mean(elapsed), np.max(elapsed), np.mean(ratios), methods.count("MILP") / len(methods),
+                  np.mean(gaps) if gaps else float("nan")]
+        results.append(result)
+        print(*[round(float(value), 4) for value in result])
+    return results
+
+
+# Compare the time to store the results of the placements by opening and appending to the four CSV files on
+# each placement (as run_algorithm does without a sink) against the buffered ResultsSink
+def benchmark_results_sink(number_of_records=20000, batch_size=1000):
+    directory = tempfile.mkdtemp()
+    record = [0.5, 3.2, 7.0, 0.4]
+    start = time.perf_counter()
+    for i in range(number_of_records):
+        for file, value in zip(["latency.csv", "F.csv", "RC.csv", "selectivity.csv"], record):
+            f = open(os.path.join(directory, file), "a")
+            f.write(str(value) + " ")
+            f.close()
+    time_csv = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sink = ResultsSink(os.path.join(directory, "results.db"), batch_size)
+    for i in range(number_of_records):
+        sink.add_placement(i // 20, "DP", "lat", i % 20, *record, 0.001)
+    sink.close()
+    time_sink = time.perf_counter() - start
+    print("records csv_sec sink_sec speedup")
+    print(number_of_records, round(time_csv, 4), round(time_sink, 4), round(time_csv / time_sink, 1))
+    return time_csv, time_sink
+
+
+# Compare the time to keep the free resources of a setting up to date while its DAGs are placed one by one and
+# then removed, by recalculating them from all the DAGs (calculate_enabled) against the apply_placement and
+# revert_placement deltas
+def benchmark_ledger(number_of_dags=500, edge_devices=200, seed=0):
+    random.seed(seed)
+    variables.init(edge_devices, 1, number_of_dags)
+    setting = variables.set_alg_setting(variables.create_graphs())
+    placements = []
+    for graph in setting.graphs:
+        result = DP_placement_main(graph, setting.enabled, "lat", [], DP_placement_np)
+        if result[0] == 1:
+            placements.append((graph, result[4], result[1], result[2], result[3]))
+            setting.apply_placement(graph, result[4], result[1], result[2], result[3], 1)
+    for graph, placement, latency, F, RC in placements:
+        setting.revert_placement(graph)
+
+    start = time.perf_counter()
+    for graph, placement, latency, F, RC in placements:
+        graph.enforce_placement(placement, latency, F, RC, 1)
+        setting.calculate_enabled()
+    for graph, placement, latency, F, RC in placements:
+        graph.remove_placement()
+        setting.calculate_enabled()
+    time_recalculate = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for graph, placement, latency, F, RC in placements:
+        setting.apply_placement(graph, placement, latency, F, RC, 1)
+    for graph, placement, latency, F, RC in placements:
+        setting.revert_placement(graph)
+    time_ledger = time.perf_counter() - start
+    print("dags recalculate_sec ledger_sec speedup")
+    print(len(placements), round(time_recalculate, 4), round(time_ledger, 4),
+          round(time_recalculate / time_ledger, 1))
+    return time_recalculate, time_ledger
+
+
+# Measure the time and the peak memory of the global optimizers, which try the new placements on the setting
+# itself and roll them back, against the copy.deepcopy of the setting that each of them used to start with
+def benchmark_trial_placements(number_of_dags=500, edge_devices=100, algorithm="DP_NP", seed=0):
+    random.seed(seed)
+    variables.init(edge_devices, 2, number_of_dags // 2)
+    setting = variables.set_alg_setting(variables.create_graphs())
+    for graph in setting.graphs:
+        place_graph(algorithm, "lat", graph, setting, [])
+    F_global = calculate_objective_global(setting)[0]
+
+    results = []
+    print("operation sec peak_mb")
+    for name, function in [("deepcopy", lambda: copy.deepcopy(setting)),
+                           ("by_util", lambda: optimize_global_F_byUtil(algorithm, "lat", setting, F_global, 0.5)),
+                           ("by_objective", lambda: optimize_global_F_by_objective(algorithm, "lat", setting,
+                                                                                   F_global, "F", 0.8))]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+        results.append([name, elapsed, peak])
+        print(name, round(elapsed, 4), round(peak, 2))
+    return results
+
+
+# Measure the memory that the DAGs of number_of_dags queries take and the time to create them, and the memory and
+# time of the copies that set_alg_setting makes of them, one for each setting of the experiment
+def benchmark_graph_memory(number_of_dags=10000, settings=6, seed=0):
+    random.seed(seed)
+    variables.init(50, 2, number_of_dags // 2)
+    results = []
+    print("operation sec mb")
+    tracemalloc.start()
+    start = time.perf_counter()
+    graphs = variables.create_graphs()
+    results.append(["create", time.perf_counter() - start, tracemalloc.get_traced_memory()[0] / 2 ** 20])
+    start = time.perf_counter()
+    alg_settings = [variables.set_alg_setting(graphs) for setting in range(settings)]
+    results.append(["settings", time.perf_counter() - start, tracemalloc.get_traced_memory()[0] / 2 ** 20 -
+                    results[0][2]])
+    tracemalloc.stop()
+    for name, elapsed, memory in results:
+        print(name, round(elapsed, 4), round(memory, 2))
+    return results
+
+
+# Compare placing the DAGs one at a time with placing them jointly, where the DAGs that read the same input stream
+# share their common operators. It reports the CPU taken on the devices, the number of enabled devices, the data
+# that the users send to the devices, the sum of the latencies and the global F
+def benchmark_shared_operators(number_of_dags=200, edge_devices=50, algorithm="DP", opt_type="lat", seed=0):
+    random.seed(seed)
+    variables.init(edge_devices, 2, number_of_dags // 2)
+    graphs = variables.create_graphs()
+    source_keys = [keys[graph.source] for graph, keys in zip(graphs, DAG.find_operator_keys(graphs))]
+    cpu_capacity = variables.infrastructure.cpu_capacity.tolist()
+    results = []
+    print("mode sec placed cpu_used enabled_devices user_data latency F")
+    for share_operators in [False, True]:
+        setting = variables.set_alg_setting(graphs, share_operators=share_operators)
+        start = time.perf_counter()
+        for graph in setting.graphs:
+            place_graph(algorithm, opt_type, graph, setting, [])
+        elapsed = time.perf_counter() - start
+        cpu_used = sum(cpu_capacity[dev] - setting.enabled[dev][1] for dev in range(len(cpu_capacity)))
+        streams = {}  # Rate of each stream that a user sends to a device
+        for graph, key in zip(setting.graphs, source_keys):
+            if graph.placed:
+                stream = (key, graph.placement[graph.source]) if share_operators else graph.graph_id
+                streams[stream] = graph.input_rate[graph.source]
+        mode = "joint" if share_operators else "separate"
+        results.append([mode, elapsed, setting.number_of_placed_dags, cpu_used, setting.number_of_enabled_devices,
+                        sum(streams.values()), setting.sum_latency, calculate_objective_global(setting)[0]])
+        print(mode, round(elapsed, 4), *[round(float(value), 3) for value in results[-1][2:]])
+    return results
+
+
+# Run the placement service on a local socket against the stand-in workload of run_workload and report the
+# placement requests per second and the percentiles of the time the service took for each of them
+def benchmark_placement_service(number_of_requests=2000, clients=8, workers=4, edge_devices=50, algorithm="DP_DAG",
+                                seed=0):
+    random.seed(seed)
+    variables.init(edge_devices)
+
+    async def run():
+        service = PlacementService(variables.set_alg_setting([]), algorithm, workers=workers)
+        server = await service.start(port=0)
+        responses, elapsed = await run_workload("127.0.0.1", server.sockets[0].getsockname()[1], number_of_requests,
+                                                clients, seed=seed)
+        server.close()
+        await server.wait_closed()
+        service.executor.shutdown()
+        return service, responses, elapsed
+
+    service, responses, elapsed = asyncio.run(run())
+    service_times = np.array([response["service_time"] for response in responses])
+    round_trip_times = np.array([response["round_trip_time"] for response in responses])
+    placed = sum(response["status"] == "placed" for response in responses)
+    retried = sum(response["attempts"] > 1 for response in responses)
+    print("requests placed retried requests_per_sec service_p50_ms service_p99_ms round_trip_p99_ms")
+    result = [len(responses), placed, retried, len(responses) / elapsed, np.percentile(service_times, 50) * 1000,
+              np.percentile(service_times, 99) * 1000, np.percentile(round_trip_times, 99) * 1000]
+    print(*[round(float(value), 2) for value in result])
+    return result
+
+
+# Place a stream of DAGs that repeat the same few signatures, where each DAG departs after the next active_dags
+# DAGs arrive, without and with a placement cache, and compare the solve time and the latency of the DAGs
+def benchmark_placement_cache(number_of_dags=2000, distinct_dags=50, active_dags=10, edge_devices=50,
+                              algorithm="DP", opt_type="lat", cache_size=1024, seed=0):
+    random.seed(seed)
+    variables.init(edge_devices)
+    builders = [DAG.create_seq_dag, DAG.create_diamond_dag, DAG.create_replicated_dag]
+    templates = [random.choice(builders)(random.randrange(variables.infrastructure.number_of_user_devices), 0,
+                                         random.randint(1, 3), random.randint(1, 10)) for dag in range(distinct_dags)]
+    arrivals = [random.choice(templates) for dag in range(number_of_dags)]
+    print("cache_size placed solve_sec mean_latency hit_rate rejected saved_sec")
+    results = []
+    for size in [0, cache_size]:
+        setting = variables.set_alg_setting([], cache_size=size)
+        solve_time = 0
+        latencies = []
+        for graph_id, template in enumerate(arrivals):
+            graph = copy.deepcopy(template)
+            graph.graph_id = graph_id
+            setting.add_graph(graph)
+            latency, F, RC, selectivity, time_taken = place_graph(algorithm, opt_type, graph, setting, [])
+            solve_time += time_taken
+            if latency != -1:
+                latencies.append(latency)
+            if graph_id >= active_dags and setting.graphs[graph_id - active_dags].placed:
+                setting.revert_placement(setting.graphs[graph_id - active_dags])
+        stats = setting.placement_cache.stats() if size > 0 else {"hit_rate": 0, "rejected": 0, "saved_time": 0}
+        result = [size, len(latencies), solve_time, np.mean(latencies), stats["hit_rate"], stats["rejected"],
+                  stats["saved_time"]]
+        results.append(result)
+        print(*[round(float(value), 4) for value in result])
+    return results
+
+
+# Place the same DAGs on infrastructures of each size, whose devices are connected by a direct link between each
+# pair (dense, up to dense_max_devices devices) or by a sparse network with degree links per device on average,
+# and compare the time and the memory to create the infrastructure and the time and the peak memory to place the
+# DAGs. The sparse network reports how many rows of routes it found
+def benchmark_sparse_network(edge_devices=(500, 1000, 5000), degree=4, number_of_dags=20, algorithm="DP_NP",
+                             opt_type="lat", dense_max_devices=1000, seed=0):
+    print("network devices create_sec create_mb place_sec place_peak_mb placed route_rows")
+    results = []
+    for number_of_edge_devices in edge_devices:
+        for network in ["dense", "sparse"]:
+            if network == "dense" and number_of_edge_devices > dense_max_devices:
+                continue
+            random.seed(seed)
+            tracemalloc.start()
+            start = time.perf_counter()
+            if network == "dense":
+                infrastructure = variables.create_infrastructure(number_of_edge_devices, 2)
+            else:
+                infrastructure = variables.create_sparse_infrastructure(number_of_edge_devices, 2, degree)
+            create_time = time.perf_counter() - start
+            create_memory = tracemalloc.get_traced_memory()[0]
+            graphs = [random.choice([DAG.create_seq_dag, DAG.create_diamond_dag])(dag % 2, dag, random.randint(1, 3),
+                                                                                  random.randint(1, 10))
+                      for dag in range(number_of_dags)]
+            setting = variables.set_alg_setting(graphs, infrastructure)
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            for graph in setting.graphs:
+                place_graph(algorithm, opt_type, graph, setting, [])
+            place_time = time.perf_counter() - start
+            place_memory = tracemalloc.get_traced_memory()[1] - create_memory
+            tracemalloc.stop()
+            route_rows = (min(infrastructure.network.computed_blocks * infrastructure.network.block_size,
+                              number_of_edge_devices) if network == "sparse" else number_of_edge_devices)
+            result = [network, number_of_edge_devices, create_time, create_memory / 2 ** 20, place_time,
+                      place_memory / 2 ** 20, setting.number_of_placed_dags, route_rows]
+            results.append(result)
+            print(*result[:2], *[round(value, 3) for value in result[2:6]], *result[6:])
+    return results
+
+
+# Measure the time to find the sampling ratios of random placements of DAGs of each type and size, and F with a
+# ratio from the grid 0.1, 0.2, ..., 1 (ten latency evaluations), with the closed-form ratio of find_sample_ratio
+# and with the ratios of the sampling operators of find_operator_sample_ratios
+def benchmark_sample_ratio(dag_types=("S", "D", "R"), dag_sizes=(1, 2, 3), number_of_dags=100, edge_devices=50,
+                           seed=0):
+    random.seed(seed)
+    DAG.type_of_task.update(DAG.create_task_types())
+    infrastructure = variables.create_infrastructure(edge_devices, 2)
+    builders = {"S": DAG.create_seq_dag, "D": DAG.create_diamond_dag, "R": DAG.create_replicated_dag}
+    methods = [("grid", lambda graph, placement: min(
+                   np.arange(0.1, 1.1, 0.1),
+                   key=lambda ratio: graph.calculate_objective_local(placement, ratio, infrastructure)[1])),
+               ("closed_form", lambda graph, placement: find_sample_ratio(graph, placement, infrastructure)),
+               ("operators", lambda graph, placement: find_operator_sample_ratios(graph, placement, infrastructure))]
+    print("dag_type dag_size method usec_per_dag avg_F")
+    results = []
+    for dag_type in dag_types:
+        for dag_size in dag_sizes:
+            graphs = [builders[dag_type](dag % 2, dag, dag_size, random.randint(1, 10))
+                      for dag in range(number_of_dags)]
+            placements = [[random.randrange(edge_devices) for node in range(graph.number_of_nodes)]
+                          for graph in graphs]
+            for name, method in methods:
+                start = time.perf_counter()
+                ratios = [method(graph, placement) for graph, placement in zip(graphs, placements)]
+                elapsed = (time.perf_counter() - start) / number_of_dags
+                F = np.mean([graph.calculate_objective_local(placement, ratio, infrastructure)[1]
+                             for graph, placement, ratio in zip(graphs, placements, ratios)])
+                results.append([dag_type, dag_size, name, elapsed, F])
+                print(dag_type, dag_size, name, round(elapsed * 1e6), round(F, 3))
+    return results
+
+
+# Place the DAGs and optimize the global F of the setting with the local search for each budget, against the
+# single trial of the other global optimizers, and compare F and the moves per second that the search makes
+def benchmark_local_search(budgets=(0.5, 2, 10), number_of_dags=100, edge_devices=50, algorithm="DP_NP",
+                           opt_type="lat", seed=0):
+    random.seed(seed)
+    DAG.type_of_task.update(DAG.create_task_types())
+    infrastructure = variables.create_infrastructure(edge_devices, 2)
+    graphs = [random.choice([DAG.create_seq_dag, DAG.create_diamond_dag, DAG.create_replicated_dag])(
+        dag % 2, dag, random.randint(1, 3), random.randint(1, 10)) for dag in range(number_of_dags)]
+    print("optimizer budget sec F_start F moves_per_sec")
+    results = []
+    for budget in [None, *budgets]:
+        setting = variables.set_alg_setting(graphs, infrastructure)
+        for graph in setting.graphs:
+            place_graph(algorithm, opt_type, graph, setting, [])
+        F_start = calculate_objective_global(setting)[0]
+        start = time.perf_counter()
+        if budget is None:
+            optimize_global_F_byUtil(algorithm, opt_type, setting, F_start, 0.5)
+            optimize_global_F_by_objective(algorithm, opt_type, setting, calculate_objective_global(setting)[0],
+                                           "F", 0.8)
+            moves = 2
+        else:
+            report = {}
+            optimize_global_F_local_search(algorithm, opt_type, setting, budget, seed=seed, report=report)
+            moves = report["moves"]
+        elapsed = time.perf_counter() - start
+        result = ["by_util+by_objective" if budget is None else "local_search", budget, elapsed, F_start,
+                  calculate_objective_global(setting)[0], moves / elapsed]
+        results.append(result)
+        print(*result[:2], round(elapsed, 3), *result[3:5], round(result[5]))
+    return results
+
+
+# Place the same DAGs on the same infrastructure with every algorithm, once on all the devices and once with a
+# candidate index of candidate_devices devices per task, and compare the running time and the quality of the
+# placements (the global F and the sum of the latencies)
+def benchmark_candidate_index(edge_devices=1000, candidate_devices=5, number_of_dags=50,
+                              algorithms=("DP", "DP_NP", "DP_DAG"), opt_type="lat", seed=0):
+    random.seed(seed)
+    DAG.type_of_task.update(DAG.create_task_types())
+    infrastructure = variables.create_infrastructure(edge_devices, 2)
+    graphs = [random.choice([DAG.create_seq_dag, DAG.create_diamond_dag, DAG.create_replicated_dag])(
+        dag % 2, dag, random.randint(1, 3), random.randint(1, 10)) for dag in range(number_of_dags)]
+    print("algorithm candidates time placed F sum_latency")
+    results = []
+    for algorithm in algorithms:
+        for candidates in [0, candidate_devices]:
+            setting = variables.set_alg_setting(graphs, infrastructure, candidate_devices=candidates)
+            start = time.perf_counter()
+            for graph in setting.graphs:
+                place_graph(algorithm, opt_type, graph, setting, [])
+            result = [algorithm, candidates, time.perf_counter() - start, setting.number_of_placed_dags,
+                      calculate_objective_global(setting)[0], setting.sum_latency]
+            results.append(result)
+            print(*result[:2], round(result[2], 3), result[3], *[round(value, 3) for value in result[4:]])
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_dp_accounting()
@@ -0,0 +1,79 @@
+# -------------------------------------------#
+# Description: Index of the devices that the
+#   tasks of a DAG are most likely placed on,
+#   to prune the search of the algorithms
+# -------------------------------------------#
+
+from bisect import bisect_left, insort
+import numpy as np
+
+
+# This class keeps, for each user, the transfer cost from the user to each device (user_dev_cost /
+# user_dev_bandwidth), and the devices sorted by their free CPU, which is updated with update as the free resources
+# of a setting change. The candidates of a task are the k devices that can host it (its CPU and RAM) with the
+# lowest cost for the task alone: its execution time plus the time to receive the data of the user (the source)
+# and to send the results back (the sink). In the resource optimizations other than "lat", the k best enabled
+# devices are candidates as well, since those modes prefer them
+class CandidateIndex:
+    def __init__(self, infrastructure, enabled, k=10):
+        self.k = k
+        self.number_of_devices = infrastructure.number_of_edge_devices
+        self.user_transfer = infrastructure.user_dev_cost / infrastructure.user_dev_bandwidth
+        self.cpu_capacity = np.asarray(infrastructure.cpu_capacity)
+        self.refresh(enabled)
+
+    # Rebuild the index from an enabled list
+    def refresh(self, enabled):
+        self.enabled = np.array([row[0] for row in enabled], dtype=bool)
+        self.free_cpu = np.array([row[1] for row in enabled], dtype=float)
+        self.free_ram = np.array([row[2] for row in enabled], dtype=float)
+        self.by_cpu = sorted((free_cpu, dev) for dev, free_cpu in enumerate(self.free_cpu.tolist()))
+
+    # Update the index after the row of a device in the enabled list changed
+    def update(self, dev, row):
+        if row[1] != self.free_cpu[dev]:
+            del self.by_cpu[bisect_left(self.by_cpu, (float(self.free_cpu[dev]), dev))]
+            insort(self.by_cpu, (row[1], dev))
+            self.free_cpu[dev] = row[1]
+        self.enabled[dev] = row[0]
+        self.free_ram[dev] = row[2]
+
+    # Function that returns the k devices with the lowest cost for a task (cpu, ram) of a user, where user_rate is
+    # the data that the task exchanges with the user, apart from the excluded ones (an array of devices). Only the
+    # devices with enough free CPU and RAM, rounded as the algorithms do, are ranked. When few devices have the
+    # CPU, they are taken from the devices sorted by their free CPU instead of checking all of them
+    def find_task_candidates(self, user, cpu, ram, user_rate, excluded, k, only_enabled=False):
+        first = bisect_left(self.by_cpu, (cpu - 0.005, -1))
+        if (len(self.by_cpu) - first) * 4 <= self.number_of_devices:
+            devices = np.array([dev for free_cpu, dev in self.by_cpu[first:]], dtype=int)
+        else:
+            devices = np.arange(self.number_of_devices)
+        fits = (np.round(self.free_cpu[devices] - cpu, 2) >= 0) & (np.round(self.free_ram[devices] - ram, 2) >= 0)
+        if only_enabled:
+            fits &= self.enabled[devices]
+        if len(excluded):
+            fits &= ~np.isin(devices, excluded)
+        devices = devices[fits]
+        if len(devices) > k:
+            cost = user_rate * self.user_transfer[user, devices] + cpu / self.cpu_capacity[devices]
+            devices = devices[np.argpartition(cost, k - 1)[:k]]
+        return devices.tolist()
+
+    # Function that returns the candidate devices of a DAG, in ascending order: the candidates of each of its
+    # tasks and the devices of the fixed nodes
+    def find_candidates(self, graph, resource_opt, devices_to_remove=(), fixed=None):
+        fixed = fixed or {}
+        excluded = np.array(list(devices_to_remove), dtype=int)
+        cpu_req, ram_req, input_rate, output_rate = graph.lists()
+        candidates = set(fixed.values())
+        for node in range(graph.number_of_nodes):
+            if node in fixed:
+                continue
+            user_rate = (input_rate[node] if node == graph.source else 0) + \
+                (output_rate[node] if node == graph.sink else 0)
+            candidates.update(self.find_task_candidates(graph.mobile_device_id, cpu_req[node], ram_req[node],
+                                                        user_rate, excluded, self.k))
+            if resource_opt != "lat":
+                candidates.update(self.find_task_candidates(graph.mobile_device_id, cpu_req[node], ram_req[node],
+                                                            user_rate, excluded, self.k, True))
+        return sorted(candidates)
@@ -5,37 +5,81 @@
 #   and managing Directed Acyclic Graphs and Tasks
 # -------------------------------------------#
 
+import copy
 import random
+import numpy as np
 import variables
 from collections import Counter
+from Infrastructure import read_only
 
 
-# This class represents the tasks of a DAG
+# This class represents a task of a DAG. The values of the tasks are kept in the arrays of their DAG,
+# so a Task is only a view of one node of the DAG
 class Task:
-    def __init__(self, task_id, task_type, cpu_req, ram_req, selectivity, input_rate, output_rate, parents):
+    __slots__ = ("graph", "task_id")
+
+    def __init__(self, graph, task_id):
+        self.graph = graph
         self.task_id = task_id
-        self.taskType = task_type
-        self.cpu_req = cpu_req
-        self.ram_req = ram_req
-        self.selectivity = selectivity
-        self.input_rate = input_rate
-        self.output_rate = output_rate
-        self.parents = parents
 
+    @property
+    def taskType(self):
+        return self.graph.task_types[self.task_id]
+
+    @property
+    def cpu_req(self):
+        return float(self.graph.cpu_req[self.task_id])
+
+    @property
+    def ram_req(self):
+        return float(self.graph.ram_req[self.task_id])
+
+    @property
+    def selectivity(self):
+        return float(self.graph.task_selectivity[self.task_id])
+
+    @property
+    def input_rate(self):
+        return float(self.graph.input_rate[self.task_id])
+
+    @property
+    def output_rate(self):
+        return float(self.graph.output_rate[self.task_id])
 
-# This class represents a DAG
+    @property
+    def parents(self):
+        return self.graph.parents(self.task_id)
+
+
+# This class represents a DAG. The values of its tasks (cpu_req, ram_req, task_selectivity, input_rate and
+# output_rate) are kept in read-only arrays, with one value per node, and its edges in CSR form: the parents
+# of a node are parent_index[parent_ptr[node]:parent_ptr[node + 1]] and its children
+# child_index[child_ptr[node]:child_ptr[node + 1]], in the order the edges were given. Copies of a DAG share
+# these arrays and only have their own placement and paths
 class Graph:
-    def __init__(self, mobile_device_id, graph_id, number_of_nodes, graph_dict, source, sink, tasks, paths):
+    __slots__ = ("mobile_device_id", "graph_id", "number_of_nodes", "source", "sink", "task_types", "cpu_req",
+                 "ram_req", "task_selectivity", "input_rate", "output_rate", "parent_ptr", "parent_index",
+                 "child_ptr", "child_index", "order", "paths", "placed", "placement", "latency", "F", "RC",
+                 "selectivity", "sample_ratios", "shape")
+
+    def __init__(self, mobile_device_id, graph_id, number_of_nodes, edges, source, sink, task_types, cpu_req,
+                 ram_req, task_selectivity, input_rate, output_rate, shape=None):
         self.mobile_device_id = mobile_device_id
-        self.number_of_nodes = number_of_nodes
         self.graph_id = graph_id
+        self.shape = shape  # "S", "D" or "R" for the DAGs of the create_*_dag functions, None otherwise
+        self.number_of_nodes = number_of_nodes
         self.source = source
-        self.paths = paths
-        self.graph_dict = graph_dict
-        self.tasks = tasks
         self.sink = sink
-        self.paths = []
-        self.print_all_paths(source, sink)
+        self.task_types = tuple(task_types)
+        self.cpu_req = read_only(cpu_req)
+        self.ram_req = read_only(ram_req)
+        self.task_selectivity = read_only(task_selectivity)
+        self.input_rate = read_only(input_rate)
+        self.output_rate = read_only(output_rate)
+        edges = np.array(edges, dtype=np.int32).reshape(-1, 2)  # (parent, child) pairs
+        self.parent_ptr, self.parent_index = csr(edges[:, 1], edges[:, 0], number_of_nodes)
+        self.child_ptr, self.child_index = csr(edges[:, 0], edges[:, 1], number_of_nodes)
+        self.paths = []  # Paths from the source to the sink, found only on demand by get_paths
         self.order = self.topological_order()
         self.placed = 0
         self.placement = None
@@ -43,60 +87,154 @@ class Graph:
         self.F = None
         self.RC = None
         self.selectivity = None
+        self.sample_ratios = None  # The ratio of each node (a tuple), or one ratio for all the nodes
+
+    # The values of the tasks and the edges are never changed, so the copies (e.g. one for each setting) share them
+    def __deepcopy__(self, memo):
+        graph = copy.copy(self)
+        graph.paths = [path[:] for path in self.paths]
+        if self.placement is not None:
+            graph.placement = list(self.placement)
+        return graph
+
+    # Function that creates a Task for each node of the DAG
+    def tasks(self):
+        return [Task(self, node) for node in range(self.number_of_nodes)]
+
+    # Function that returns the parents of a node
+    def parents(self, node):
+        return self.parent_index[self.parent_ptr[node]:self.parent_ptr[node + 1]].tolist()
+
+    # Function that returns the children of a node
+    def children(self, node):
+        return self.child_index[self.child_ptr[node]:self.child_ptr[node + 1]].tolist()
+
+    # Function that returns cpu_req, ram_req, input_rate and output_rate as lists, for the algorithms that read
+    # the values one at a time. The lists are not kept, so that the DAG stays compact
+    def lists(self):
+        return self.cpu_req.tolist(), self.ram_req.tolist(), self.input_rate.tolist(), self.output_rate.tolist()
+
+    # Function that finds the latency of the slowest path of a DAG given a placement of its nodes to devices
+    # and filter selectivity, which is a sampling ratio for all the data or a sampling ratio for the data that
+    # each node sends (the data that the user sends to the source is sampled with the ratio of the source).
+    # The nodes are visited in topological order, so that each edge is visited once.
+    # The infrastructure of variables.init is used if none is given
+    def calculate_latency(self, placement, selectivity, infrastructure=None):
+        infrastructure = variables.get_infrastructure(infrastructure)
+        cpu_capacity, com_cost, bandwidth, user_dev_cost, user_dev_bandwidth = infrastructure.lists()
+        user_dev_cost = user_dev_cost[self.mobile_device_id]
+        user_dev_bandwidth = user_dev_bandwidth[self.mobile_device_id]
+        cpu_req, ram_req, input_rate, output_rate = self.lists()
+        ratios = [selectivity] * self.number_of_nodes if np.ndim(selectivity) == 0 else list(selectivity)
+        finish = [0] * self.number_of_nodes  # Latency of the slowest path from the user to each node
+        for node in self.order:
+            dev1 = placement[node]
+            # Execution latency
+            execution = cpu_req[node] / cpu_capacity[dev1]
+
+            # Transfer time from user if the node is a source
+            if node == self.source:
+                finish[node] = execution + (
+                        (input_rate[node] * ratios[node] * user_dev_cost[dev1]) / user_dev_bandwidth[dev1])
+            else:
+                # Transfer time from its slowest parent node
+                for parent in self.parents(node):
+                    dev2 = placement[parent]
+                    path_latency = finish[parent] + execution + (
+                            output_rate[parent] * ratios[parent] * com_cost[dev1][dev2] /
+                            bandwidth[dev1][dev2])
+                    if path_latency > finish[node]:
+                        finish[node] = path_latency
+
+            # Transfer time to the user if the node is a sink
+            if node == self.sink:
+                finish[node] += (
+                        (output_rate[node] * ratios[node] * user_dev_cost[dev1]) / user_dev_bandwidth[dev1])
+        return finish[self.sink]
+
+    # Function that finds the times that make up the latency of a DAG given a placement, as calculate_latency
+    # finds them without sampling: the execution time of each node, the time of the data that each node
+    # receives from each of its parents (as (parent, time) pairs), that the source receives from the user and
+    # that the sink sends to the user
+    def find_latency_times(self, placement, infrastructure=None):
+        infrastructure = variables.get_infrastructure(infrastructure)
+        cpu_capacity, com_cost, bandwidth, user_dev_cost, user_dev_bandwidth = infrastructure.lists()
+        user_dev_cost = user_dev_cost[self.mobile_device_id]
+        user_dev_bandwidth = user_dev_bandwidth[self.mobile_device_id]
+        cpu_req, ram_req, input_rate, output_rate = self.lists()
+        execution = [cpu_req[node] / cpu_capacity[placement[node]] for node in range(self.number_of_nodes)]
+        received = []
+        for node in range(self.number_of_nodes):
+            dev1 = placement[node]
+            received.append([(parent, output_rate[parent] * com_cost[dev1][placement[parent]] /
+                              bandwidth[dev1][placement[parent]]) for parent in self.parents(node)])
+        source, sink = placement[self.source], placement[self.sink]
+        return (execution, received, input_rate[self.source] * user_dev_cost[source] / user_dev_bandwidth[source],
+                output_rate[self.sink] * user_dev_cost[sink] / user_dev_bandwidth[sink])
+
+    # Function that finds the latency of a DAG (see find_latency_times for times) as a function of the sampling
+    # ratio of the nodes in group, with the ratios of the other nodes fixed (ratios), between low and high. It
+    # returns the lines (a, b) of the paths, whose latency is a + b * ratio, so that the latency is the largest
+    # of them. The paths that are not slower than another one at low and at high are left out
+    def find_latency_lines(self, times, ratios, group, low, high):
+        execution, received, user_input, user_output = times
+        paths = [None] * self.number_of_nodes  # Lines of the paths from the user to each node
+        for node in self.order:
+            if node == self.source:
+                lines = [(execution[node], user_input)] if node in group else [
+                    (execution[node] + user_input * ratios[node], 0)]
+            elif received[node]:
+                lines = []
+                for parent, time in received[node]:
+                    if parent in group:
+                        lines.extend((a + execution[node], b + time) for a, b in paths[parent])
+                    else:
+                        lines.extend((a + execution[node] + time * ratios[parent], b) for a, b in paths[parent])
+            else:  # A node without parents that is not the source finishes at 0, as in calculate_latency
+                lines = [(0, 0)]
+            if node == self.sink:
+                if node in group:
+                    lines = [(a, b + user_output) for a, b in lines]
+                else:
+                    lines = [(a + user_output * ratios[node], b) for a, b in lines]
+            if len(lines) > 1:
+                ends = [(a + b * low, a + b * high) for a, b in lines]
+                lines = [line for index, (line, (at_low, at_high)) in enumerate(zip(lines, ends))
+                         if not any(other_low >= at_low and other_high >= at_high and
+                                    (other_index < index or (other_low, other_high) != (at_low, at_high))
+                                    for other_index, (other_low, other_high) in enumerate(ends)
+                                    if other_index != index)]
+            paths[node] = lines
+        return paths[self.sink]
 
     # Function that finds the latency, F and RC of a DAG
-    # given a placement of its nodes to devices and filter selectivity
-    def calculate_objective_local(self, placement, selectivity):
-        max_latency = -1
-        for path in self.paths:
-            path_latency = 0
-            for node in path:
-
-                dev1 = placement[node]
-                # Execution latency
-                path_latency += self.tasks[node].cpu_req / variables.cpu_capacity[dev1]
-
-                # Transfer time from its parent node
-                for parent in self.tasks[node].parents:
-                    if parent in path:
-                        dev2 = placement[parent]
-                        path_latency += (self.tasks[parent].output_rate * selectivity * variables.com_cost[dev1][
-                            dev2] / variables.bandwidth[dev1][dev2])
-
-                # Transfer time from user if the node is a source
-                if node == self.source:
-                    path_latency += (
-                            (self.tasks[node].input_rate * selectivity * variables.user_dev_cost[self.mobile_device_id][
-                                dev1]) / variables.user_dev_bandwidth[self.mobile_device_id][dev1])
-
-                # Transfer time to the user if the node is a sink
-                if node == self.sink:
-                    path_latency += (
-                            (self.tasks[node].output_rate * selectivity *
-                             variables.user_dev_cost[self.mobile_device_id][
-                                 dev1]) / variables.user_dev_bandwidth[self.mobile_device_id][dev1])
-
-            if path_latency > max_latency:  # Find the slowest path
-                max_latency = path_latency
+    # given a placement of its nodes to devices and filter selectivity (or the sampling ratios of the nodes,
+    # whose average is the selectivity of F)
+    def calculate_objective_local(self, placement, selectivity, infrastructure=None):
+        infrastructure = variables.get_infrastructure(infrastructure)
+        max_latency = self.calculate_latency(placement, selectivity, infrastructure)
+        cpu_capacity = infrastructure.lists()[0]
 
         enabled_cpu = (
-            sum(variables.cpu_capacity[i] for i in Counter(placement)))  # Sum of enabled devices' CPU capacities
+            sum(cpu_capacity[i] for i in Counter(placement)))  # Sum of enabled devices' CPU capacities
         enabled_sum = len(Counter(placement))  # Number of enabled devices
-        filter_selectivity = selectivity
+        filter_selectivity = selectivity if np.ndim(selectivity) == 0 else float(np.mean(selectivity))
 
         RC = (enabled_sum ** (variables.RC_theta)) * (enabled_cpu / enabled_sum)
         F = (RC * max_latency) / ((variables.filter_alpha + filter_selectivity) ** variables.filter_beta)
 
         return round(max_latency, 3), round(F, 3), round(RC, 3)
 
-    # Enforce a placement on the DAG
-    def enforce_placement(self, placement, latency, F, RC, selectivity):
+    # Enforce a placement on the DAG. The sampling ratios of the nodes are kept with their average (selectivity),
+    # so that the latency can be found again with calculate_latency(placement, sample_ratios)
+    def enforce_placement(self, placement, latency, F, RC, selectivity, sample_ratios=None):
         self.placed = 1
         self.placement = placement
         self.latency = latency
         self.F = F
         self.RC = RC
         self.selectivity = selectivity
+        self.sample_ratios = selectivity if sample_ratios is None else sample_ratios
 
     # Remove the placment from the DAG
     def remove_placement(self):
@@ -106,6 +244,7 @@ class Graph:
         self.F = None
         self.RC = None
         self.selectivity = None
+        self.sample_ratios = None
 
     # A recursive function that finds all paths between two nodes
     def print_all_paths_util(self, u, d, visited, path):
@@ -119,7 +258,7 @@ class Graph:
         else:
             # If current vertex is not destination
             # Recur for all the vertices adjacent to this vertex
-            for i in self.graph_dict[u]:
+            for i in self.children(u):
                 if not visited[i]:
                     self.print_all_paths_util(i, d, visited, path)
                     # Remove current vertex from path[] and mark it as unvisited
@@ -136,141 +275,145 @@ class Graph:
         self.print_all_paths_util(s, d, visited, path)
         return self.paths
 
+    # Function that returns all the paths from the source to the sink, only needed for debugging
+    # and the path based formulation of the QP algorithm
+    def get_paths(self):
+        if not self.paths:
+            self.print_all_paths(self.source, self.sink)
+        return self.paths
+
     # Function to find the topological order of a DAG
     def topological_order(self):
+        in_degree = np.diff(self.parent_ptr).tolist()
         order = []
-        visited = [False] * self.number_of_nodes
-        visited[self.source] = True
-        for path in self.paths:  # For each path
-            for i in path[::-1]:  # Reverse the nodes of each path
-                if not visited[i]:
-                    visited[i] = True
-                    order.append(i)
-        order.append(self.source)  # Add the source
-        order = order[::-1]  # Reverse the order
+        ready = [node for node in range(self.number_of_nodes) if in_degree[node] == 0]
+        while ready:  # A node is added once all of its parents have been added
+            node = ready.pop(0)
+            order.append(node)
+            for child in self.children(node):
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    ready.append(child)
         return order
 
 
-# name of task: [CPU requirement, MEM requirement, selectivity]
-type_of_task = {"Filter": [round(random.uniform(0.2, 1.1), 2), random.randint(1, 3), round(random.uniform(0.4, 1), 2)],
-                "Scan": [round(random.uniform(0.2, 1.1), 2), random.randint(1, 3), round(random.uniform(0.4, 1), 2)],
-                "Map": [round(random.uniform(0.2, 1.1), 2), random.randint(1, 3), round(random.uniform(0.4, 1), 2)],
-                "GroupBy": [round(random.uniform(0.2, 1.1), 2), random.randint(1, 3), round(random.uniform(0.4, 1), 2)],
-                "OrderBy": [round(random.uniform(0.2, 1.1), 2), random.randint(1, 3), round(random.uniform(0.4, 1), 2)]}
+# Function that finds the operator of each node of the DAGs, so that the common sub-DAGs of the DAGs can share
+# their operators. Two nodes run the same operator if they have the same task type and read the same input
+# stream: the stream of the same user with the same input rate for the source, or the streams of the same
+# parent operators for the rest of the nodes. The k-th node of a DAG with a given operator gets the key
+# (operator, k), so that the parallel nodes of a DAG are not merged. The operators found so far are kept in
+# operators ({(task type, stream): operator}), so that more DAGs can be added later. It returns the keys of each DAG
+def find_operator_keys(graphs, operators=None):
+    if operators is None:
+        operators = {}
+    keys = []
+    for graph in graphs:
+        graph_keys = [None] * graph.number_of_nodes
+        copies = Counter()  # Number of nodes of the DAG with each operator
+        for node in graph.order:
+            parents = graph.parents(node)
+            if parents:
+                stream = tuple(sorted(graph_keys[parent] for parent in parents))
+            else:
+                stream = (graph.mobile_device_id, float(graph.input_rate[node]))
+            operator = operators.setdefault((graph.task_types[node], stream), len(operators))
+            graph_keys[node] = (operator, copies[operator])
+            copies[operator] += 1
+        keys.append(graph_keys)
+    return keys
+
+
+# Function that draws the requirements of each type of task, as name of task: [CPU requirement, MEM requirement,
+# selectivity]
+def create_task_types():
+    return {name: [round(random.uniform(0.2, 1.1), 2), random.randint(1, 3), round(random.uniform(0.4, 1), 2)]
+            for name in ["Filter", "Scan", "Map", "GroupBy", "OrderBy"]}
+
+
+# The requirements of each type of task, drawn once for all the DAGs
+type_of_task = create_task_types()
+
+
+# Function that returns the CSR form (pointers and indices) of the edges from rows to columns. The edges of
+# each row keep their order
+def csr(rows, columns, number_of_nodes):
+    pointers = np.zeros(number_of_nodes + 1, dtype=np.int32)
+    np.cumsum(np.bincount(rows, minlength=number_of_nodes), out=pointers[1:])
+    return read_only(pointers, np.int32), read_only(columns[np.argsort(rows, kind="stable")], np.int32)
+
+
+# Function that creates a DAG from its edges, given as (parent, child) pairs of nodes numbered in topological
+# order. A random type is selected for each task, unless task_types are given, and the input rate of a task is
+# the user rate for the source and the sum of the output rates of its parents for the rest of the nodes
+def create_graph(mobile_device_id, graph_id, number_of_operators, edges, source, sink, user_rate, task_types=None,
+                 shape=None):
+    parents = [[] for i in range(number_of_operators)]
+    for parent, child in edges:
+        parents[child].append(parent)
+    given_types = task_types
+    task_types = []
+    values = []  # CPU requirement, MEM requirement, selectivity, input and output rate of each task
+    for i in range(number_of_operators):
+        if given_types is None:
+            task_type, chars = random.choice(list(type_of_task.items()))  # Select a random type of task
+        else:
+            task_type, chars = given_types[i], type_of_task[given_types[i]]
+        if i == source:
+            input_rate = user_rate
+        else:
+            input_rate = 0
+            for parent in parents[i]:
+                input_rate += values[parent][4]
+        # The output rate is calculated using the input rate and the task's selectivity
+        output_rate = round(input_rate * chars[2], 2)
+        task_types.append(task_type)
+        values.append([chars[0], chars[1], chars[2], input_rate, output_rate])
+    cpu_req, ram_req, selectivity, input_rate, output_rate = zip(*values)
+    return Graph(mobile_device_id, graph_id, number_of_operators, edges, source, sink, task_types, cpu_req, ram_req,
+                 selectivity, input_rate, output_rate, shape)
 
 
 # Create a DAG in the form of a chain
 def create_seq_dag(mobile_device_id, graph_id, number_of_nodes, user_rate):
-    graph_dict = {}
-    parents = {}
-    tasks = []
-    paths = []
     number_of_operators = number_of_nodes + 2
     source = 0
     sink = number_of_operators - 1
-    output_rate = user_rate  # Rate of user
-    for i in range(number_of_operators):
-        parents[i] = []
-        graph_dict[i] = []
-        task_type, chars = random.choice(list(type_of_task.items()))  # Select a random type of task
-        if i != sink:  # Non-sink nodes have children
-            graph_dict[i].append(i + 1)
-        if i != source:  # Non-source nodes have parents
-            parents[i].append(i - 1)
-        input_rate = output_rate
-        # The output rate is calculated using the input rate and the task's selectivity
-        output_rate = round(input_rate * chars[2], 2)
-        # Create Task
-        tasks.append(Task(i, task_type, chars[0], chars[1], chars[2], input_rate, output_rate, parents[i]))
-    # Create DAG
-    graph = Graph(mobile_device_id, graph_id, number_of_operators, graph_dict, source, sink, tasks, paths)
-    return graph
+    edges = [(i, i + 1) for i in range(number_of_operators - 1)]  # Each node sends its data to the next one
+    return create_graph(mobile_device_id, graph_id, number_of_operators, edges, source, sink, user_rate,
+                        shape="S")
 
 
 # Create a DAG that has a single source and sink and 'n' parallel nodes between them
 def create_diamond_dag(mobile_device_id, graph_id, number_of_nodes, user_rate):
-    graph_dict = {}
-    parents = {}
-    tasks = []
-    paths = []
     number_of_operators = number_of_nodes + 2
     source = 0
     sink = number_of_operators - 1
-    output_rate = user_rate  # Rate of user
-
-    for i in range(number_of_operators):
-        parents[i] = []
-        graph_dict[i] = []
-    for i in range(number_of_operators):
-        # Non-sink and non-source nodes have the source as their parent and the sink as their child
-        if i != sink and i != source:
-            graph_dict[i].append(sink)
-            parents[i].append(source)
-            graph_dict[source].append(i)
-            parents[sink].append(i)
-    for i in range(number_of_operators):
-        if i == source:
-            input_rate = output_rate
-        else:
-            input_rate = 0
-            for parent in parents[i]:
-                input_rate += tasks[parent].output_rate
-
-        task_type, chars = random.choice(list(type_of_task.items()))  # Select a random type of task
-        # The output rate is calculated using the input rate and the task's selectivity
-        output_rate = round(input_rate * chars[2], 2)
-
-        # Create task
-        tasks.append(Task(i, task_type, chars[0], chars[1], chars[2], input_rate, output_rate, parents))
-    # Create DAG
-    graph = Graph(mobile_device_id, graph_id, number_of_operators, graph_dict, source, sink, tasks, paths)
-
-    return graph
+    edges = []
+    # Non-sink and non-source nodes have the source as their parent and the sink as their child
+    for i in range(source + 1, sink):
+        edges.append((i, sink))
+        edges.append((source, i))
+    return create_graph(mobile_device_id, graph_id, number_of_operators, edges, source, sink, user_rate,
+                        shape="D")
 
 
 # Create a DAG that has a single source and sink and a line of '2n' parallel nodes and one of 'n' parallel nodes between them
 def create_replicated_dag(mobile_device_id, graph_id, number_of_nodes, user_rate):
-    graph_dict = {}
-    parents = {}
-    tasks = []
-    paths = []
     number_of_operators = number_of_nodes + number_of_nodes * 2 + 2
     source = 0
     sink = number_of_operators - 1
-    for i in range(number_of_operators):
-        parents[i] = []
-        graph_dict[i] = []
+    edges = []
     # The first '2n' nodes (except the source) have the source as their parent
     for i in range(source + 1, number_of_nodes * 2 + 1):
-        graph_dict[source].append(i)
-        parents[i].append(source)
+        edges.append((source, i))
 
     # The first '2n' nodes (except the source) have the remaining ones (beside source and sink) as their children
     for i in range(source + 1, number_of_nodes * 2 + 1):
         for j in range(number_of_nodes * 2 + 1, number_of_nodes + number_of_nodes * 2 + 1):
-            graph_dict[i].append(j)
-            parents[j].append(i)
+            edges.append((i, j))
 
     # The remaining nodes (beside source and sink) have sink as their children
     for i in range(number_of_nodes * 2 + 1, number_of_nodes + number_of_nodes * 2 + 1):
-        graph_dict[i].append(sink)
-        parents[sink].append(i)
-
-    output_rate = user_rate  # Rate of user
-    for i in range(number_of_operators):
-        task_type, chars = random.choice(list(type_of_task.items()))  # Select a random type of task
-        if i != source:
-            input_rate = 0
-            for parent in parents[i]:
-                input_rate += tasks[parent].output_rate
-        else:
-            input_rate = output_rate
-
-        # The output rate is calculated using the input rate and the task's selectivity
-        output_rate = round(input_rate * chars[2], 2)
-        # Create task
-        tasks.append(Task(i, task_type, chars[0], chars[1], chars[2], input_rate, output_rate, parents[i]))
-
-    # Create graph
-    graph = Graph(mobile_device_id, graph_id, number_of_operators, graph_dict, source, sink, tasks, paths)
-    return graph
+        edges.append((i, sink))
+    return create_graph(mobile_device_id, graph_id, number_of_operators, edges, source, sink, user_rate,
+                        shape="R")
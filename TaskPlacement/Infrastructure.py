@@ -0,0 +1,141 @@
+# -------------------------------------------#
+# Description: Immutable description of the
+#   edge devices, the users and the network
+#   between them
+# -------------------------------------------#
+
+import numpy as np
+from multiprocessing import shared_memory
+
+# The arrays of an infrastructure, in the order they are stored in shared memory
+array_names = ["cpu_capacity", "ram_capacity", "com_cost", "bandwidth", "transfer_cost", "user_dev_cost",
+               "user_dev_bandwidth"]
+
+attached = {}  # Shared memory blocks opened by this process, by name
+
+
+# This class represents the infrastructure of an experiment instance. All the values are kept in read-only
+# arrays: cpu_capacity, ram_capacity (per device), com_cost, bandwidth, transfer_cost (per pair of devices)
+# and user_dev_cost, user_dev_bandwidth (per pair of user and device)
+class Infrastructure:
+    def __init__(self, cpu_capacity, ram_capacity, com_cost, bandwidth, user_dev_cost, user_dev_bandwidth,
+                 transfer_cost=None, memory=None, layout=None):
+        self.cpu_capacity = read_only(cpu_capacity)
+        self.ram_capacity = read_only(ram_capacity)
+        self.com_cost = read_only(com_cost)
+        self.bandwidth = read_only(bandwidth)
+        if transfer_cost is None:
+            transfer_cost = self.com_cost / self.bandwidth  # Per-pair transfer cost
+        self.transfer_cost = read_only(transfer_cost)
+        self.user_dev_cost = read_only(user_dev_cost)
+        self.user_dev_bandwidth = read_only(user_dev_bandwidth)
+        self.number_of_edge_devices = len(self.cpu_capacity)
+        self.number_of_user_devices = len(self.user_dev_cost)
+        self.memory = memory  # The shared memory block that holds the arrays, None if they are private
+        self.layout = layout  # The shape and the offset of each array in the shared memory block
+        self.list_values = None
+        self.row_block_size = None  # Number of rows of transfer costs that are best read together, None if any
+
+    # Return cpu_capacity, com_cost, bandwidth, user_dev_cost and user_dev_bandwidth as (nested) lists, for the
+    # algorithms that read the values one at a time. The lists are created once, on the first call
+    def lists(self):
+        if self.list_values is None:
+            self.list_values = (self.cpu_capacity.tolist(), self.com_cost.tolist(), self.bandwidth.tolist(),
+                                self.user_dev_cost.tolist(), self.user_dev_bandwidth.tolist())
+        return self.list_values
+
+    # Function that returns the transfer costs between the rows and the columns, each one a device (for a single
+    # row or column), a list or a slice of devices, or None for all the devices
+    def transfer_block(self, rows=None, columns=None):
+        if columns is None:
+            return self.transfer_cost if rows is None else self.transfer_cost[rows]
+        if rows is None:
+            return self.transfer_cost[:, columns]
+        if np.ndim(rows) == 1 and np.ndim(columns) == 1:
+            return self.transfer_cost[np.ix_(rows, columns)]
+        return self.transfer_cost[rows, columns]
+
+    # Function that returns the infrastructure of some of the devices (a list), with the network between them
+    def subset(self, devices):
+        block = np.ix_(devices, devices)
+        return Infrastructure(self.cpu_capacity[devices], self.ram_capacity[devices], self.com_cost[block],
+                              self.bandwidth[block], self.user_dev_cost[:, devices],
+                              self.user_dev_bandwidth[:, devices], self.transfer_cost[block])
+
+    # Copy the arrays to a new shared memory block and return the infrastructure that uses it. Pickling the
+    # returned infrastructure (e.g. to send it to a worker process) only passes the name of the block
+    def share(self):
+        arrays = [getattr(self, name) for name in array_names]
+        memory = shared_memory.SharedMemory(create=True, size=sum(array.nbytes for array in arrays))
+        layout = []
+        offset = 0
+        for array in arrays:
+            np.ndarray(array.shape, dtype=float, buffer=memory.buf, offset=offset)[...] = array
+            layout.append((array.shape, offset))
+            offset += array.nbytes
+        attached[memory.name] = memory
+        return attach_infrastructure(memory.name, layout)
+
+    # Free the shared memory block of the infrastructure, after the processes that use it have finished
+    def release(self):
+        if self.memory is not None:
+            memory = self.memory
+            for name in array_names:
+                setattr(self, name, None)
+            self.memory = None
+            self.layout = None
+            attached.pop(memory.name, None)
+            memory.close()
+            memory.unlink()
+
+    # The infrastructure is immutable, so copies of the settings that use it share it
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        if self.memory is None:
+            return Infrastructure, tuple(getattr(self, name) for name in
+                                         ["cpu_capacity", "ram_capacity", "com_cost", "bandwidth",
+                                          "user_dev_cost", "user_dev_bandwidth", "transfer_cost"])
+        return attach_infrastructure, (self.memory.name, self.layout)
+
+
+# Return a read-only copy of an array (or of nested lists) of the given type, arrays that already are read-only
+# are kept
+def read_only(values, dtype=float):
+    if isinstance(values, np.ndarray) and values.dtype == dtype and not values.flags.writeable:
+        return values
+    array = np.array(values, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+
+# Function that closes the shared memory blocks that this process attached to, apart from the ones named in keep.
+# The blocks whose arrays are still in use stay open. The process that created a block frees it with release
+def detach_infrastructures(keep=()):
+    for name in list(attached):
+        if name in keep:
+            continue
+        try:
+            attached[name].close()
+        except BufferError:
+            continue
+        del attached[name]
+
+
+# Function that creates an infrastructure whose arrays are views of a shared memory block, without copying them
+def attach_infrastructure(name, layout):
+    if name not in attached:
+        attached[name] = shared_memory.SharedMemory(name=name)
+    memory = attached[name]
+    arrays = []
+    for shape, offset in layout:
+        array = np.ndarray(shape, dtype=float, buffer=memory.buf, offset=offset)
+        array.flags.writeable = False
+        arrays.append(array)
+    cpu_capacity, ram_capacity, com_cost, bandwidth, transfer_cost, user_dev_cost, user_dev_bandwidth = arrays
+    return Infrastructure(cpu_capacity, ram_capacity, com_cost, bandwidth, user_dev_cost, user_dev_bandwidth,
+                          transfer_cost, memory, layout)
@@ -0,0 +1,160 @@
+# -------------------------------------------#
+# Description: Linearized (MILP) model of the
+#   placement problem, built in matrix form
+# -------------------------------------------#
+
+import numpy as np
+from scipy import sparse
+
+
+# This class represents a mixed integer linear program in matrix form:
+# minimize c*x subject to row_lb <= A*x <= row_ub and lb <= x <= ub
+class MILPModel:
+    def __init__(self):
+        self.number_of_variables = 0
+        self.number_of_rows = 0
+        self.c = None
+        self.A = None
+        self.lb = []
+        self.ub = []
+        self.integrality = []  # 1 for binary variables, 0 for continuous ones
+        self.row_lb = []
+        self.row_ub = []
+        self.rows = []
+        self.cols = []
+        self.values = []
+        self.objective = []
+
+    # Add a block of variables and return their indices
+    def add_variables(self, count, lb, ub, integer, cost=0):
+        indices = np.arange(self.number_of_variables, self.number_of_variables + count)
+        self.number_of_variables += count
+        self.lb.append(np.broadcast_to(np.asarray(lb, dtype=float), (count,)))
+        self.ub.append(np.broadcast_to(np.asarray(ub, dtype=float), (count,)))
+        self.integrality.append(np.full(count, integer, dtype=int))
+        self.objective.append(np.broadcast_to(np.asarray(cost, dtype=float), (count,)))
+        return indices
+
+    # Add a block of rows, given the row (counted from the first row of the block), column and value
+    # of each coefficient, and return their indices
+    def add_rows(self, count, rows, cols, values, lb, ub):
+        indices = np.arange(self.number_of_rows, self.number_of_rows + count)
+        self.rows.append(np.asarray(rows, dtype=int) + self.number_of_rows)
+        self.cols.append(np.asarray(cols, dtype=int))
+        self.values.append(np.asarray(values, dtype=float))
+        self.row_lb.append(np.broadcast_to(np.asarray(lb, dtype=float), (count,)))
+        self.row_ub.append(np.broadcast_to(np.asarray(ub, dtype=float), (count,)))
+        self.number_of_rows += count
+        return indices
+
+    # Stack the blocks into the arrays and the sparse matrix of the model
+    def finalize(self):
+        self.c = np.concatenate(self.objective)
+        self.lb = np.concatenate(self.lb)
+        self.ub = np.concatenate(self.ub)
+        self.integrality = np.concatenate(self.integrality)
+        self.row_lb = np.concatenate(self.row_lb)
+        self.row_ub = np.concatenate(self.row_ub)
+        self.A = sparse.csr_matrix((np.concatenate(self.values),
+                                    (np.concatenate(self.rows), np.concatenate(self.cols))),
+                                   shape=(self.number_of_rows, self.number_of_variables))
+        self.rows = self.cols = self.values = self.objective = None
+        return self
+
+
+# Function that builds the MILP model of a DAG. The products of the placement variables of the two ends of an
+# edge are replaced by a variable for each pair of devices that the two nodes can use, and the latency is found
+# from the arrival time of each node. The bound on the number of used devices is left open and is set through
+# the row model.max_devices_row. The nodes in fixed (node: device) can only use their device, where their operator
+# already runs, and take no resources
+def build_milp_model(graph, enabled, resource_opt, devices_to_remove, infrastructure, fixed=None):
+    model = MILPModel()
+    fixed = fixed or {}
+    number_of_nodes = graph.number_of_nodes
+    number_of_devices = infrastructure.number_of_edge_devices
+    cpu_req = graph.cpu_req
+    ram_req = graph.ram_req
+    cpu_load = cpu_req.copy()  # CPU and RAM that each node takes
+    ram_load = ram_req.copy()
+    cpu_load[list(fixed)] = 0
+    ram_load[list(fixed)] = 0
+    free_cpu = np.array([row[1] for row in enabled], dtype=float)
+    free_ram = np.array([row[2] for row in enabled], dtype=float)
+    user_cost = infrastructure.user_dev_cost[graph.mobile_device_id]
+    user_bandwidth = infrastructure.user_dev_bandwidth[graph.mobile_device_id]
+    execution = cpu_req[:, np.newaxis] / infrastructure.cpu_capacity  # Execution time of each node on each device
+
+    # A node can only use the devices that are not removed and can host it on their own
+    allowed = (cpu_req[:, np.newaxis] <= free_cpu) & (ram_req[:, np.newaxis] <= free_ram)
+    allowed[:, list(devices_to_remove)] = False
+    for node, dev in fixed.items():
+        allowed[node] = np.arange(number_of_devices) == dev
+
+    # Variables
+    x = model.add_variables(number_of_nodes * number_of_devices, 0, allowed.ravel(), 1).reshape(
+        number_of_nodes, number_of_devices)  # 1 if the node is placed on the device, 0 otherwise
+    arrival = model.add_variables(number_of_nodes, 0, np.inf, 0)
+    model.latency = model.add_variables(1, 0, np.inf, 0, 1)[0]  # The objective
+    model.x = x
+
+    # Assign each node to exactly one device
+    model.add_rows(number_of_nodes, np.repeat(np.arange(number_of_nodes), number_of_devices), x.ravel(),
+                   np.ones(x.size), 1, 1)
+
+    # CPU, RAM constraints
+    model.add_rows(number_of_devices, np.tile(np.arange(number_of_devices), number_of_nodes), x.ravel(),
+                   np.repeat(cpu_load, number_of_devices), -np.inf, free_cpu)
+    model.add_rows(number_of_devices, np.tile(np.arange(number_of_devices), number_of_nodes), x.ravel(),
+                   np.repeat(ram_load, number_of_devices), -np.inf, free_ram)
+
+    # Execution time and transfer time from user to the source node
+    source = graph.source
+    model.add_rows(1, np.zeros(number_of_devices + 1), np.append(x[source], arrival[source]),
+                   np.append(-(execution[source] + (graph.input_rate[source] * user_cost) / user_bandwidth), 1),
+                   0, np.inf)
+
+    # Arrival time of each node after each of its parents
+    for node in range(number_of_nodes):
+        for parent in graph.parents(node):
+            node_devices = np.flatnonzero(allowed[node])
+            parent_devices = np.flatnonzero(allowed[parent])
+            pairs = model.add_variables(len(node_devices) * len(parent_devices), 0, np.inf, 0)
+
+            # The pair variables of a device of the node sum up to its placement variable, and the same
+            # for the parent, so that each pair variable is the product of the two placement variables
+            model.add_rows(len(node_devices), np.concatenate(
+                [np.repeat(np.arange(len(node_devices)), len(parent_devices)), np.arange(len(node_devices))]),
+                           np.concatenate([pairs, x[node, node_devices]]),
+                           np.concatenate([np.ones(len(pairs)), -np.ones(len(node_devices))]), 0, 0)
+            model.add_rows(len(parent_devices), np.concatenate(
+                [np.tile(np.arange(len(parent_devices)), len(node_devices)), np.arange(len(parent_devices))]),
+                           np.concatenate([pairs, x[parent, parent_devices]]),
+                           np.concatenate([np.ones(len(pairs)), -np.ones(len(parent_devices))]), 0, 0)
+
+            # Execution time and transfer time from the parent node
+            transfer = graph.output_rate[parent] * infrastructure.transfer_block(node_devices, parent_devices).ravel()
+            model.add_rows(1, np.zeros(number_of_devices + len(pairs) + 2),
+                           np.concatenate([x[node], pairs, [arrival[node], arrival[parent]]]),
+                           np.concatenate([-execution[node], -transfer, [1, -1]]), 0, np.inf)
+
+    # Transfer time to the user for the sink node
+    sink = graph.sink
+    model.add_rows(1, np.zeros(number_of_devices + 2), np.concatenate([x[sink], [model.latency, arrival[sink]]]),
+                   np.concatenate([-(graph.output_rate[sink] * user_cost) / user_bandwidth, [1, -1]]),
+                   0, np.inf)
+
+    model.max_devices_row = None
+    if resource_opt != "lat":
+        # 1 if the device takes on tasks, 0 otherwise. Already enabled devices are not counted in "enabled" mode
+        counted = np.array([enabled[dev][0] == 0 or resource_opt != "enabled" for dev in range(number_of_devices)])
+        used = model.add_variables(number_of_devices, 0, counted.astype(float), 1)
+        counted_devices = np.flatnonzero(counted)
+        model.add_rows(len(counted_devices), np.concatenate(
+            [np.tile(np.arange(len(counted_devices)), number_of_nodes), np.arange(len(counted_devices))]),
+                       np.concatenate([x[:, counted_devices].ravel(), used[counted_devices]]),
+                       np.concatenate([np.ones(number_of_nodes * len(counted_devices)),
+                                       np.full(len(counted_devices), -number_of_nodes)]), -np.inf, 0)
+        # Bound the maximum amount of devices that will be used
+        model.max_devices_row = model.add_rows(1, np.zeros(number_of_devices), used, np.ones(number_of_devices),
+                                               -np.inf, np.inf)[0]
+    return model.finalize()
@@ -5,32 +5,42 @@
 # -------------------------------------------#
 
 from PlacementFunctions import *
+from ResultsSink import ResultsSink
+import math
+import random
+import time
 import variables
 
 
-# Function that finds the F objective of all the DAGs
+# Function that finds the F objective of all the DAGs, from the sums that the setting keeps up to date
 def calculate_objective_global(setting):
     if setting.number_of_placed_dags == 0:
         return -1
     else:
-        enabled_cpu = (sum(variables.cpu_capacity[i] for i in range(variables.number_of_edge_devices) if
-                           setting.enabled[i][0] != 0))  # Sum of enabled devices' CPU capacities
-        enabled_sum = (
-            sum(setting.enabled[i][0] for i in range(variables.number_of_edge_devices)))  # Number of enabled devices
-        filter_selectivity_avg = setting.sum_filter_ratios / setting.number_of_placed_dags
-
-        RC = (enabled_sum ** (variables.RC_theta)) * (enabled_cpu / enabled_sum)
-        F = (RC * setting.sum_latency) / ((variables.filter_alpha + filter_selectivity_avg) ** variables.filter_beta)
+        F, RC, filter_selectivity_avg = find_objective_global(setting)
         return round(F, 3), round(RC, 3), round(setting.sum_latency, 3), round(filter_selectivity_avg, 3)
 
 
-# Optimize F based on the objectives
+# Function that finds F, RC and the average sampling ratio of a setting with placed DAGs, without rounding them
+def find_objective_global(setting):
+    enabled_cpu = setting.enabled_cpu  # Sum of enabled devices' CPU capacities
+    enabled_sum = setting.number_of_enabled_devices  # Number of enabled devices
+    filter_selectivity_avg = setting.sum_filter_ratios / setting.number_of_placed_dags
+
+    RC = (enabled_sum ** (variables.RC_theta)) * (enabled_cpu / enabled_sum)
+    F = (RC * setting.sum_latency) / ((variables.filter_alpha + filter_selectivity_avg) ** variables.filter_beta)
+    return F, RC, filter_selectivity_avg
+
+
+# Optimize F based on the objectives. The DAGs are placed again as a trial of the setting, which is kept if
+# it improves F and rolled back otherwise. The setting is changed in place and returned
 def optimize_global_F_by_objective(algorithm, opt_type, setting, F_global, objective, gamma):
-    setting_temp = copy.deepcopy(setting)
+    infrastructure = setting.infrastructure
+    number_of_placed_dags = setting.number_of_placed_dags
     x = 4
     dags = []
     devices = []
-    for graph in setting_temp.graphs:
+    for graph in setting.graphs:
         if graph.placed == 1:
             if objective == "F":
                 dags.append([graph.graph_id, graph.F])
@@ -42,7 +52,7 @@ def optimize_global_F_by_objective(algorithm, opt_type, setting, F_global, objec
     # Find the top-x dags with the higher objective
     dags = sorted(dags, key=lambda l: l[1], reverse=True)[:x]
     for dag in dags:
-        graph = setting_temp.graphs[dag[0]]
+        graph = setting.graphs[dag[0]]
         for dev in graph.placement:
             if dev not in devices:
                 devices.append(dev)
@@ -50,197 +60,337 @@ def optimize_global_F_by_objective(algorithm, opt_type, setting, F_global, objec
     # Calculate the average cpu of the devices utilized for the top-x dags
     avg_cpu = 0
     for dev in devices:
-        avg_cpu += variables.cpu_capacity[dev]
+        avg_cpu += infrastructure.cpu_capacity[dev]
     avg_cpu = avg_cpu / len(devices)
 
+    setting.begin_trial()
     for dag in dags:
-        graph = setting_temp.graphs[dag[0]]
-        graph.remove_placement()
-    setting_temp.calculate_enabled()
+        graph = setting.graphs[dag[0]]
+        setting.revert_placement(graph)
 
     # Mark the devices whose cpu capacity is lower than the average
     devices_not_to_use = []
-    for dev in range(variables.number_of_edge_devices):
-        if setting_temp.enabled[dev][0] == 0 and variables.cpu_capacity[dev] < avg_cpu * gamma:
+    for dev in range(infrastructure.number_of_edge_devices):
+        if setting.enabled[dev][0] == 0 and infrastructure.cpu_capacity[dev] < avg_cpu * gamma:
             devices_not_to_use.append(dev)
 
     # Find a placement without using these devices
     for dag in dags:
-        graph = setting_temp.graphs[dag[0]]
-        run_algorithm(algorithm, opt_type, graph, setting_temp, devices_not_to_use)
+        graph = setting.graphs[dag[0]]
+        place_graph(algorithm, opt_type, graph, setting, devices_not_to_use)
         if not graph.placed:
-            run_algorithm(algorithm, opt_type, graph, setting_temp, [])
-    F_global_new, RC_global_new, latency_global_new, sel_global_new = calculate_objective_global(setting_temp)
+            place_graph(algorithm, opt_type, graph, setting, [])
+    F_global_new, RC_global_new, latency_global_new, sel_global_new = calculate_objective_global(setting)
 
     # If a better solution was found keep it, otherwise discard it
-    if F_global_new > F_global or setting_temp.number_of_placed_dags != setting.number_of_placed_dags:
+    if F_global_new > F_global or setting.number_of_placed_dags != number_of_placed_dags:
+        setting.rollback()
         return setting
-    for dev in setting_temp.enabled:
-        if (dev[1] < 0 or dev[2] < 0):
-            print("error")
-    return setting_temp
+    setting.commit()
+    assert all(dev[1] >= 0 and dev[2] >= 0 for dev in setting.enabled), "A device uses more resources than it has"
+    return setting
 
 
-# Optimize F based on the resource utilization
+# Optimize F based on the resource utilization. The DAGs are placed again as a trial of the setting, which is
+# kept if it improves F and rolled back otherwise. The setting is changed in place and returned
 def optimize_global_F_byUtil(algorithm, opt_type, setting, F_global, delta):
     # Find the less utilized devices based on a threshold
-    setting_temp = copy.deepcopy(setting)
+    infrastructure = setting.infrastructure
+    number_of_placed_dags = setting.number_of_placed_dags
     devices_not_to_use = []
-    for dev in range(variables.number_of_edge_devices):
-        if setting_temp.enabled[dev][0] == 1 and (variables.cpu_capacity[dev] - setting_temp.enabled[dev][1]) / \
-                variables.cpu_capacity[dev] < delta:
+    for dev in range(infrastructure.number_of_edge_devices):
+        if setting.enabled[dev][0] == 1 and (infrastructure.cpu_capacity[dev] - setting.enabled[dev][1]) / \
+                infrastructure.cpu_capacity[dev] < delta:
             devices_not_to_use.append(dev)
 
     # Find the dags that use these devices
+    setting.begin_trial()
     dags = []
     for dev in devices_not_to_use:
-        for graph in setting_temp.graphs:
+        for graph in setting.graphs:
             if graph.placed == 1 and dev in graph.placement:
-                graph.remove_placement()
+                setting.revert_placement(graph)
                 dags.append(graph.graph_id)
-                setting_temp.calculate_enabled()
 
     # Find a placement without using these devices
     for dag in dags:
-        graph = setting_temp.graphs[dag]
-        run_algorithm(algorithm, opt_type, graph, setting_temp, devices_not_to_use)
+        graph = setting.graphs[dag]
+        place_graph(algorithm, opt_type, graph, setting, devices_not_to_use)
         if not graph.placed:
-            run_algorithm(algorithm, opt_type, graph, setting_temp, [])
-    F_global_new, RC_global_new, latency_global_new, sel_global_new = calculate_objective_global(setting_temp)
+            place_graph(algorithm, opt_type, graph, setting, [])
+    F_global_new, RC_global_new, latency_global_new, sel_global_new = calculate_objective_global(setting)
 
     # If a better solution was found keep it, otherwise discard it
-    if F_global_new > F_global or setting_temp.number_of_placed_dags != setting.number_of_placed_dags:
+    if F_global_new > F_global or setting.number_of_placed_dags != number_of_placed_dags:
+        setting.rollback()
         return setting
-    for dev in setting_temp.enabled:
-        if (dev[1] < 0 or dev[2] < 0):
-            print("error")
-    return setting_temp
-
-
-# Function that runs the optimization algorithms
-def run_algorithm(algorithm, opt_type, graph, setting, devices_to_remove):
+    setting.commit()
+    assert all(dev[1] >= 0 and dev[2] >= 0 for dev in setting.enabled), "A device uses more resources than it has"
+    return setting
+
+
+# Function that moves a task of a placed DAG to another device of the setting (target), with the sampling ratio
+# and the objectives that find_placement would find for the new placement. It returns False, with the setting
+# unchanged, if the device does not have the resources of the task
+def migrate_task(graph, node, target, setting):
+    if setting.operator_keys is None and not (  # Most moves are rejected here, without changing the setting
+            round(setting.enabled[target][1] - graph.cpu_req[node], 2) >= 0 and
+            round(setting.enabled[target][2] - graph.ram_req[node], 2) >= 0):
+        return False
+    placement = list(graph.placement)
+    placement[node] = target
+    mark = setting.mark()
+    setting.revert_placement(graph)
+    if not setting.check_resources(graph, placement):
+        setting.rollback(mark)
+        return False
+    ratios = find_sample_ratios(graph, placement, setting.infrastructure)
+    latency, F, RC = graph.calculate_objective_local(placement, ratios, setting.infrastructure)
+    setting.apply_placement(graph, placement, latency, F, RC, float(np.mean(ratios)),
+                            tuple(ratios) if np.ndim(ratios) else ratios)
+    return True
+
+
+# Optimize F with a local search (simulated annealing) over the placed DAGs, for budget seconds or max_moves
+# moves. A move either migrates a random task to another device (a device that the placed DAGs use, to enable
+# fewer devices, or any device) or places a random DAG again with the algorithm without one of its devices
+# (with probability replace_probability). The moves change the setting itself, whose free resources and sums
+# are updated for the DAG that moved only, so the new F is found from the sums instead of all the DAGs. A move is
+# kept if it lowers F, or if it raises F by a relative delta with probability exp(-delta / T), where T falls
+# from temperature to 0 over the budget, and undone otherwise. The setting is left with the best placements
+# found, so F never rises. If report is given, the number of moves, the accepted and the improving ones and the
+# F before and after the search are added to it
+def optimize_global_F_local_search(algorithm, opt_type, setting, budget=1.0, max_moves=None, temperature=0.001,
+                                   replace_probability=0.1, seed=None, report=None):
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    placed = [graph for graph in setting.graphs if graph.placed]
+    moves = accepted = improved = 0
+    if not placed:
+        F_start = F_best = -1
+    else:
+        F_start = F_best = F_current = find_objective_global(setting)[0]
+        setting.begin_trial()
+        while max_moves is None or moves < max_moves:
+            elapsed = time.perf_counter() - start
+            if elapsed >= budget:
+                break
+            moves += 1
+            graph = rng.choice(placed)
+            mark = setting.mark()
+            if rng.random() < replace_probability:
+                excluded = rng.choice(graph.placement)
+                setting.revert_placement(graph)
+                if place_graph(algorithm, opt_type, graph, setting, [excluded])[0] == -1:
+                    setting.rollback(mark)
+                    continue
+            else:
+                node = rng.randrange(graph.number_of_nodes)
+                if rng.random() < 0.5:  # A device that the placed DAGs use
+                    other = rng.choice(placed)
+                    target = other.placement[rng.randrange(other.number_of_nodes)]
+                else:
+                    target = rng.randrange(setting.infrastructure.number_of_edge_devices)
+                if target == graph.placement[node] or not migrate_task(graph, node, target, setting):
+                    continue
+            F_new = find_objective_global(setting)[0]
+            delta = (F_new - F_current) / F_current
+            T = temperature * (1 - elapsed / budget)
+            if delta > 0 and (T <= 0 or rng.random() >= math.exp(-delta / T)):
+                setting.rollback(mark)
+                continue
+            accepted += 1
+            F_current = F_new
+            if F_new < F_best:  # Keep the best placements found so far
+                improved += 1
+                F_best = F_new
+                setting.commit()
+                setting.begin_trial()
+        setting.rollback()  # Back to the best placements
+    if report is not None:
+        report.update({"moves": moves, "accepted": accepted, "improved": improved, "F_start": float(F_start),
+                       "F": float(F_best), "time": time.perf_counter() - start})
+    return setting
+
+
+# Function that runs an optimization algorithm for a DAG and returns its placement, or None if the DAG could not
+# be placed. The solver algorithms add the method that found the placement and its optimality gap to report
+def run_placement_algorithm(algorithm, opt_type, graph, enabled, infrastructure, devices_to_remove, fixed,
+                            warm_start, backend, report):
+    if algorithm == "QP":  # Quadratic Programming
+        solved, latency, F, RC, placement, enabled_sol = QP_placement(graph, enabled, opt_type, devices_to_remove,
+                                                                      warm_start=warm_start, backend=backend,
+                                                                      infrastructure=infrastructure, fixed=fixed,
+                                                                      report=report)
+    elif algorithm == "QP_ARR":  # Quadratic Programming with the arrival time of each node
+        solved, latency, F, RC, placement, enabled_sol = QP_placement(graph, enabled, opt_type, devices_to_remove,
+                                                                      "arrival", warm_start=warm_start,
+                                                                      backend=backend, infrastructure=infrastructure,
+                                                                      fixed=fixed, report=report)
+    elif algorithm == "MILP":  # Linearized Mixed Integer Linear Programming
+        solved, latency, F, RC, placement, enabled_sol = MILP_placement(graph, enabled, opt_type, devices_to_remove,
+                                                                        warm_start=warm_start, backend=backend,
+                                                                        infrastructure=infrastructure, fixed=fixed,
+                                                                        report=report)
+    elif algorithm == "ANYTIME":  # DP improved by the MILP solver until variables.anytime_deadline
+        solved, latency, F, RC, placement, enabled_sol = anytime_placement(graph, enabled, opt_type,
+                                                                           devices_to_remove,
+                                                                           variables.anytime_deadline,
+                                                                           variables.anytime_mip_gap, backend,
+                                                                           infrastructure, fixed, report)
+    elif algorithm == "DP_NP":  # Vectorized Dynamic Programming
+        solved, latency, F, RC, placement, enabled_sol = DP_placement_main(graph, enabled, opt_type,
+                                                                           devices_to_remove, DP_placement_np,
+                                                                           infrastructure, fixed)
+    elif algorithm == "DP_DAG":  # Dynamic Programming over the topological order of the DAG
+        solved, latency, F, RC, placement, enabled_sol = DP_placement_main(graph, enabled, opt_type,
+                                                                           devices_to_remove, DP_placement_dag,
+                                                                           infrastructure, fixed)
+    else:  # Dynamic Programming
+        solved, latency, F, RC, placement, enabled_sol = DP_placement_main(graph, enabled, opt_type,
+                                                                           devices_to_remove,
+                                                                           infrastructure=infrastructure,
+                                                                           fixed=fixed)
+    return placement if solved == 1 else None
+
+
+# Function that runs an optimization algorithm for a DAG on some of the devices (candidates, in ascending order),
+# as if they were the only devices of the infrastructure, and returns the placement on the devices of the
+# infrastructure, or None if the DAG could not be placed on them
+def find_placement_on_devices(candidates, algorithm, opt_type, graph, enabled, infrastructure, devices_to_remove,
+                              fixed, warm_start, backend, report):
+    position = {dev: index for index, dev in enumerate(candidates)}
+    placement = run_placement_algorithm(algorithm, opt_type, graph, [enabled[dev] for dev in candidates],
+                                        infrastructure.subset(candidates),
+                                        [position[dev] for dev in devices_to_remove if dev in position],
+                                        {node: position[dev] for node, dev in (fixed or {}).items()}, warm_start,
+                                        backend, report)
+    return None if placement is None else [candidates[dev] for dev in placement]
+
+
+# Function that runs an optimization algorithm for a DAG, given the free resources of the devices (enabled) and
+# the nodes whose operators already run on a device (fixed, {node: device}). It returns the placement (None if
+# the DAG could not be placed), its latency, F, RC and sampling ratio, the time the algorithm took and the sampling
+# ratios of the nodes (see find_sample_ratios, a tuple if each node has its own ratio). It only reads enabled, so
+# it can run on a worker while the setting changes. If a cache (a PlacementCache) is given,
+# a placement that it found for the same DAG in a similar state of the devices is reused when it still fits.
+# If candidates (a list of devices, see CandidateIndex) are given, the algorithm only considers them and runs
+# again on all the devices if the DAG can not be placed on them.
+# The solver algorithms add the method that found the placement and its optimality gap to report, if given
+def find_placement(algorithm, opt_type, graph, enabled, infrastructure, devices_to_remove, fixed=None,
+                   warm_start=False, backend="gurobi", cache=None, report=None, candidates=None):
+    start = time.perf_counter()
+    if cache is not None:
+        key = cache.find_key(algorithm, opt_type, graph, devices_to_remove, fixed or {}, backend,
+                             variables.objective_variables())
+        result = cache.lookup(key, graph, enabled, fixed or {}, start)
+        if result is not None:
+            placement, latency, F, RC, selectivity, ratios = result
+            return placement, latency, F, RC, selectivity, time.perf_counter() - start, ratios
+    placement = None
+    if candidates is not None:
+        candidates = sorted(set(candidates).union((fixed or {}).values()))
+        if len(candidates) < infrastructure.number_of_edge_devices:
+            placement = find_placement_on_devices(candidates, algorithm, opt_type, graph, enabled, infrastructure,
+                                                  devices_to_remove, fixed, warm_start, backend, report)
+    if placement is None:  # Search all the devices
+        placement = run_placement_algorithm(algorithm, opt_type, graph, enabled, infrastructure, devices_to_remove,
+                                            fixed, warm_start, backend, report)
+    solve_time = time.perf_counter() - start
+    if placement is None:
+        return None, -1, -1, -1, -1, solve_time, None
+
+    # Find the optimal sampling ratios, whose average is the selectivity of F
+    ratios = find_sample_ratios(graph, placement, infrastructure)
+    selectivity = float(np.mean(ratios))
+    if np.ndim(ratios):
+        ratios = tuple(ratios)
+
+    # Calculate latency, F, RC objectives
+    latency, F, RC = graph.calculate_objective_local(placement, ratios, infrastructure)
+    if cache is not None:
+        cache.store(key, enabled, (placement, latency, F, RC, selectivity, ratios), solve_time)
+    return placement, latency, F, RC, selectivity, solve_time, ratios
+
+
+# Function that runs an optimization algorithm for a DAG and returns its latency, F, RC and sampling ratio
+# (all -1 if the DAG could not be placed) and the time the algorithm took. If the DAGs of the setting share
+# their operators, the nodes whose operators already run on a device are placed on that device, and if the
+# setting has a placement cache, the placements are looked up in it first. If the setting has a candidate index,
+# the algorithm only considers the candidate devices of the DAG first
+def place_graph(algorithm, opt_type, graph, setting, devices_to_remove, warm_start=False, backend="gurobi"):
+    fixed = setting.find_shared_operators(graph, devices_to_remove)
+    placement, latency, F, RC, selectivity, solve_time, ratios = find_placement(
+        algorithm, opt_type, graph, setting.enabled, setting.infrastructure, devices_to_remove, fixed, warm_start,
+        backend, setting.placement_cache, candidates=setting.find_candidates(graph, opt_type, devices_to_remove, fixed))
+    if placement is None:
+        return [-1, -1, -1, -1, solve_time]
+
+    # Enforce placement on graph and take its resources from the setting
+    setting.apply_placement(graph, placement, latency, F, RC, selectivity, ratios)
+    return [latency, F, RC, selectivity, solve_time]
+
+
+# Function that runs the optimization algorithms. The results are added to the sink (a ResultsSink) if one
+# is given, otherwise they are appended to the CSV files
+def run_algorithm(algorithm, opt_type, graph, setting, devices_to_remove, warm_start=False, backend="gurobi",
+                  sink=None, iteration=-1):
+    latency, F, RC, selectivity, solve_time = place_graph(algorithm, opt_type, graph, setting, devices_to_remove,
+                                                          warm_start, backend)
+    if sink is not None:
+        sink.add_placement(iteration, algorithm, opt_type, graph.graph_id, latency, F, RC, selectivity, solve_time)
+        return
     f_lat = open("latency.csv", "a")
     f_F = open("F.csv", "a")
     f_RC = open("RC.csv", "a")
     f_sel = open("selectivity.csv", "a")
-    if algorithm == "QP":  # Quadratic Programming
-        solved, latency, F, RC, placement, enabled_sol = QP_placement(graph, setting.enabled, opt_type,
-                                                                      devices_to_remove)
-    else:  # Dynamic Programming
-        solved, latency, F, RC, placement, enabled_sol = DP_placement_main(graph, setting.enabled, opt_type,
-                                                                           devices_to_remove)
-    if solved == 1:
-        # Find the optimal sampling ratio
-        setting.enabled = copy.deepcopy(enabled_sol)
-        selectivity = find_sample_ratio(graph, placement)
-
-        # Calculate latency, F, RC objectives
-        latency, F, RC = graph.calculate_objective_local(placement, selectivity)
-
-        # Enforce placement on graph
-        graph.enforce_placement(placement, latency, F, RC, selectivity)
-        setting.calculate_enabled()
-        f_lat.write(str(latency) + " ")
-        f_F.write(str(F) + " ")
-        f_RC.write(str(RC) + " ")
-        f_sel.write(str(selectivity) + " ")
-    else:
-        f_lat.write("-1 ")
-        f_F.write("-1 ")
-        f_RC.write("-1 ")
-        f_sel.write("-1 ")
+    f_lat.write(str(latency) + " ")
+    f_F.write(str(F) + " ")
+    f_RC.write(str(RC) + " ")
+    f_sel.write(str(selectivity) + " ")
     f_lat.close()
     f_RC.close()
     f_F.close()
     f_sel.close()
 
 
-def main_experiment():
-    f_lat = open("latency.csv", "a")
-    f_F = open("F.csv", "a")
-    f_RC = open("RC.csv", "a")
-    f_F_global = open("F_global.csv", "a")
-    f_RC_global = open("RC_global.csv", "a")
-    f_latency_global = open("latency_global.csv", "a")
-    f_sel = open("selectivity.csv", "a")
-    f_sel_global = open("selectivity_global.csv", "a")
-
-    f_lat.write("QP_lat QP_enabled QP_min DP_lat DP_enabled DP_min  \n")
-    f_RC.write("QP_lat QP_enabled QP_min DP_lat DP_enabled DP_min  \n")
-    f_F.write("QP_lat QP_enabled QP_min DP_lat DP_enabled DP_min  \n")
-    f_F_global.write("QP_lat QP_enabled QP_min DP_lat DP_enabled DP_min  \n")
-    f_RC_global.write("QP_lat QP_enabled QP_min DP_lat DP_enabled DP_min  \n")
-    f_latency_global.write("QP_lat QP_enabled QP_min DP_lat DP_enabled DP_min  \n")
-    f_sel.write("QP_lat QP_enabled QP_min DP_lat DP_enabled DP_min  \n")
-    f_sel_global.write("QP_lat QP_enabled QP_min DP_lat DP_enabled DP_min  \n")
-
-    f_F_global.close()
-    f_RC_global.close()
-    f_latency_global.close()
-    f_F.close()
-    f_RC.close()
-    f_sel.close()
-    f_sel_global.close()
+# The settings (algorithm, resource optimization) of each iteration of the experiment
+experiment_settings = [("QP", "lat"), ("QP", "enabled"), ("QP", "min"), ("DP", "lat"), ("DP", "enabled"),
+                       ("DP", "min")]
 
-    for iter in range(50):
+
+# The experiment runs each iteration with a new infrastructure and new DAGs and stores the results in the
+# SQLite database results_file (see ResultsSink). If seed is given, iteration i is generated with
+# random.seed(seed + i), so that it can be repeated by the parallel runner. With share_operators the DAGs of
+# each iteration are placed jointly and share their common operators (see AlgSetting). With local_search_budget,
+# once all the DAGs are placed, the placements of each setting are optimized with the local search for that many
+# seconds and the global objectives that it reaches are added with graph_id -1
+def main_experiment(iterations=50, seed=None, results_file="results.db", share_operators=False,
+                    local_search_budget=0):
+    sink = ResultsSink(results_file)
+    for iter in range(iterations):
+        if seed is not None:
+            random.seed(seed + iter)
         variables.init()
         graphs_init = variables.create_graphs()
-        QP_lat_setting = variables.set_alg_setting(graphs_init)
-        QP_enabled_setting = variables.set_alg_setting(graphs_init)
-        QP_min_setting = variables.set_alg_setting(graphs_init)
-        DP_lat_setting = variables.set_alg_setting(graphs_init)
-        DP_enabled_setting = variables.set_alg_setting(graphs_init)
-        DP_min_setting = variables.set_alg_setting(graphs_init)
+        settings = [variables.set_alg_setting(graphs_init, share_operators=share_operators)
+                    for setting in experiment_settings]
 
         for i in range(len(graphs_init)):
-            f_lat = open("latency.csv", "a")
-            f_F = open("F.csv", "a")
-            f_RC = open("RC.csv", "a")
-            f_sel = open("selectivity.csv", "a")
-
-            f_F_global = open("F_global.csv", "a")
-            f_RC_global = open("RC_global.csv", "a")
-            f_latency_global = open("latency_global.csv", "a")
-            f_sel_global = open("selectivity_global.csv", "a")
             devices_to_remove = []
-
-            run_algorithm("QP", "lat", QP_lat_setting.graphs[i], QP_lat_setting, devices_to_remove)
-            run_algorithm("QP", "enabled", QP_enabled_setting.graphs[i], QP_enabled_setting, devices_to_remove)
-            run_algorithm("QP", "min", QP_min_setting.graphs[i], QP_min_setting, devices_to_remove)
-            run_algorithm("DP", "lat", DP_lat_setting.graphs[i], DP_lat_setting, devices_to_remove)
-            run_algorithm("DP", "enabled", DP_enabled_setting.graphs[i], DP_enabled_setting, devices_to_remove)
-            run_algorithm("DP", "min", DP_min_setting.graphs[i], DP_min_setting, devices_to_remove)
-
-            F_QP_lat, RC_QP_lat, latency_QP_lat, sel_QP_lat = calculate_objective_global(QP_lat_setting)
-            F_QP_enabled, RC_QP_enabled, latency_QP_enabled, sel_QP_enabled = calculate_objective_global(
-                QP_enabled_setting)
-            F_QP_min, RC_QP_min, latency_QP_min, sel_QP_min = calculate_objective_global(QP_min_setting)
-            F_DP_lat, RC_DP_lat, latency_DP_lat, sel_DP_lat = calculate_objective_global(DP_lat_setting)
-            F_DP_enabled, RC_DP_enabled, latency_DP_enabled, sel_DP_enabled = calculate_objective_global(
-                DP_enabled_setting)
-            F_DP_min, RC_DP_min, latency_DP_min, sel_DP_min = calculate_objective_global(DP_min_setting)
-
-            f_F_global.write(str(F_QP_lat) + " " + str(F_QP_enabled) + " " + str(F_QP_min) + " " + str(F_DP_lat)
-                             + " " + str(F_DP_enabled) + " " + str(F_DP_min) + " \n")
-            f_RC_global.write(str(RC_QP_lat) + " " + str(RC_QP_enabled) + " " + str(RC_QP_min) + " " + str(RC_DP_lat)
-                              + " " + str(RC_DP_enabled) + " " + str(RC_DP_min) + " \n")
-            f_latency_global.write(
-                str(latency_QP_lat) + " " + str(latency_QP_enabled) + " " + str(latency_QP_min) + " " + str(
-                    latency_DP_lat)
-                + " " + str(latency_DP_enabled) + " " + str(latency_DP_min) + " \n")
-            f_sel_global.write(
-                str(sel_QP_lat) + " " + str(sel_QP_enabled) + " " + str(sel_QP_min) + " " + str(
-                    sel_DP_lat) + " " + str(sel_DP_enabled) + " " + str(sel_DP_min) + " \n")
-
-            f_lat.write("\n")
-            f_F.write("\n")
-            f_RC.write("\n")
-            f_sel.write("\n")
-
-        f_F_global.close()
-        f_RC_global.close()
-        f_latency_global.close()
-        f_sel_global.close()
-
-
-main_experiment()
+            for (algorithm, opt_type), setting in zip(experiment_settings, settings):
+                run_algorithm(algorithm, opt_type, setting.graphs[i], setting, devices_to_remove, sink=sink,
+                              iteration=iter)
+                sink.add_global(iter, algorithm, opt_type, setting.graphs[i].graph_id,
+                                calculate_objective_global(setting))
+        if local_search_budget > 0:
+            for (algorithm, opt_type), setting in zip(experiment_settings, settings):
+                optimize_global_F_local_search(algorithm, opt_type, setting, local_search_budget,
+                                               seed=None if seed is None else seed + iter)
+                sink.add_global(iter, algorithm, opt_type, -1, calculate_objective_global(setting))
+    sink.close()
+    return sink.experiment
+
+
+if __name__ == "__main__":
+    main_experiment()
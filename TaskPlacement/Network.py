@@ -0,0 +1,217 @@
+# -------------------------------------------#
+# Description: Sparse network of links between
+#   the edge devices, whose routes are found
+#   only for the devices that need them
+# -------------------------------------------#
+
+import threading
+from collections import OrderedDict
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+from Infrastructure import Infrastructure, read_only
+
+
+# This class represents a network where only some pairs of devices are linked. Each link is a row
+# (dev1, dev2, com_cost, bandwidth) and can be used in both directions. Data between two devices follows the
+# route with the lowest sum of communication costs, and its bandwidth is the lowest bandwidth of the links on the
+# route (the bottleneck). A device sends data to itself at cost 0 and bandwidth 1, as in the dense infrastructure.
+# The routes from a device to all the others are found with Dijkstra's algorithm, for block_size devices at a time.
+# Only the transfer costs, which the algorithms read the most, are kept for the blocks (least recently used first
+# out) up to max_memory bytes, the route costs and the bottleneck bandwidths are found again when they are needed.
+# It can be used by the workers of the placement service at the same time
+class SparseNetwork:
+    def __init__(self, number_of_devices, links, block_size=64, max_memory=1 << 27):
+        links = np.array(links, dtype=float).reshape(-1, 4)
+        dev1 = links[:, 0].astype(int)
+        dev2 = links[:, 1].astype(int)
+        if ((dev1 < 0) | (dev1 >= number_of_devices) | (dev2 < 0) | (dev2 >= number_of_devices) |
+                (dev1 == dev2)).any():
+            raise ValueError("a link must connect two different devices of the network")
+        if (links[:, 2] <= 0).any() or (links[:, 3] <= 0).any():
+            raise ValueError("the communication cost and the bandwidth of a link must be positive")
+        first = np.minimum(dev1, dev2)
+        second = np.maximum(dev1, dev2)
+        if len(np.unique(first * number_of_devices + second)) != len(links):
+            raise ValueError("a pair of devices can only have one link")
+        self.number_of_devices = number_of_devices
+        self.links = read_only(links)
+        self.block_size = block_size
+        self.max_memory = max_memory
+        self.cost_graph = csr_matrix((links[:, 2], (first, second)), shape=(number_of_devices, number_of_devices))
+        if connected_components(self.cost_graph, directed=False)[0] > 1:
+            raise ValueError("the network must connect all the devices")
+
+        # The bandwidth of each link in both directions, sorted by dev1 * number_of_devices + dev2
+        link_keys = np.concatenate([first * number_of_devices + second, second * number_of_devices + first])
+        order = np.argsort(link_keys)
+        self.link_keys = link_keys[order]
+        self.link_bandwidth = np.concatenate([links[:, 3], links[:, 3]])[order]
+
+        self.blocks = OrderedDict()  # Block: transfer costs from its devices
+        self.last_routes = (None, None)  # (Block, its route costs and bottleneck bandwidths), read by both RouteRows
+        self.max_blocks = max(1, max_memory // (8 * block_size * number_of_devices))
+        self.lock = threading.Lock()
+        self.computed_blocks = 0
+
+    # The blocks of routes are not pickled, each process finds the ones it needs
+    def __reduce__(self):
+        return SparseNetwork, (self.number_of_devices, self.links, self.block_size, self.max_memory)
+
+    # Function that finds the route cost, the bottleneck bandwidth and the transfer cost from the sources to every
+    # device. The bottleneck of a device is the lowest bandwidth on the way to its predecessor on the route, then to the
+    # predecessor of that one and so on, which is found for all the devices at once by doubling the steps
+    def find_routes(self, sources):
+        cost, predecessors = dijkstra(self.cost_graph, directed=False, indices=sources, return_predecessors=True)
+        linked = predecessors >= 0
+        bandwidth = np.full(cost.shape, np.inf)
+        bandwidth[linked] = self.link_bandwidth[np.searchsorted(
+            self.link_keys, predecessors[linked] * self.number_of_devices + np.nonzero(linked)[1])]
+        ancestors = np.where(linked, predecessors, np.arange(self.number_of_devices))
+        while True:
+            bandwidth = np.minimum(bandwidth, np.take_along_axis(bandwidth, ancestors, axis=1))
+            next_ancestors = np.take_along_axis(ancestors, ancestors, axis=1)
+            if np.array_equal(next_ancestors, ancestors):
+                break
+            ancestors = next_ancestors
+        bandwidth[np.arange(len(sources)), sources] = 1
+        return read_only(cost), read_only(bandwidth), read_only(cost / bandwidth)
+
+    # Function that returns the devices of a block
+    def block_devices(self, block):
+        return np.arange(block * self.block_size, min((block + 1) * self.block_size, self.number_of_devices))
+
+    # Function that returns the transfer costs from a block of devices, found on the first call
+    def find_block(self, block):
+        with self.lock:
+            routes = self.blocks.get(block)
+            if routes is not None:
+                self.blocks.move_to_end(block)
+                return routes
+        routes = self.find_routes(self.block_devices(block))[2]
+        with self.lock:
+            self.blocks[block] = routes
+            self.computed_blocks += 1
+            while len(self.blocks) > self.max_blocks:
+                self.blocks.popitem(last=False)
+        return routes
+
+    # Function that returns the route costs (values 0), the bottleneck bandwidths (values 1) or the transfer costs
+    # (values 2) from a device (a row), or from a list or a slice of devices (a row per device), to every device.
+    # The transfer costs of a slice within a block are not copied, and the routes of the last block that is read
+    # whole are kept, so its route costs and bottleneck bandwidths are found once
+    def routes(self, devices, values):
+        if values != 2:
+            if isinstance(devices, slice):
+                devices = np.arange(*devices.indices(self.number_of_devices))
+                block = devices[0] // self.block_size if len(devices) else None
+                if block is not None and np.array_equal(devices, self.block_devices(block)):
+                    last_block, routes = self.last_routes
+                    if last_block != block:
+                        routes = self.find_routes(devices)
+                        self.last_routes = (block, routes)
+                    return routes[values]
+            if np.ndim(devices) == 0:
+                return self.find_routes([int(devices)])[values][0]
+            return self.find_routes(np.asarray(devices, dtype=int))[values]
+        if isinstance(devices, slice):
+            start, stop, step = devices.indices(self.number_of_devices)
+            block = start // self.block_size
+            if step == 1 and start < stop and (stop - 1) // self.block_size == block:
+                offset = block * self.block_size
+                return self.find_block(block)[start - offset:stop - offset]
+            devices = np.arange(start, stop, step)
+        if np.ndim(devices) == 0:
+            return self.find_block(int(devices) // self.block_size)[devices % self.block_size]
+        devices = np.asarray(devices, dtype=int)
+        rows = np.empty((len(devices), self.number_of_devices))
+        blocks = devices // self.block_size
+        for block in np.unique(blocks):
+            positions = np.flatnonzero(blocks == block)
+            rows[positions] = self.find_block(int(block))[devices[positions] % self.block_size]
+        return rows
+
+
+# This class gives the rows of the route costs (values 0), the bottleneck bandwidths (values 1) or the transfer
+# costs (values 2) of a sparse network one device at a time, as lists, as the nested lists of a dense
+# infrastructure do. The last row is kept, so reading a row one element at a time does not find the routes or
+# build the list again. When the rows are read in order of device, the rows of the block of the next device are
+# found at once and kept, otherwise only the row that is read is found
+class RouteRows:
+    def __init__(self, network, values):
+        self.network = network
+        self.values = values
+        self.block = (None, None)  # (Block, its rows)
+        self.row = (None, None)  # (Device, its row as a list)
+
+    def __getitem__(self, dev):
+        last_dev, row = self.row
+        if last_dev == dev:
+            return row
+        block, rows = self.block
+        if block == dev // self.network.block_size:
+            row = rows[dev - block * self.network.block_size].tolist()
+        elif self.values == 2 or last_dev == dev - 1:
+            block = dev // self.network.block_size
+            devices = self.network.block_devices(block)
+            rows = self.network.routes(slice(devices[0], devices[-1] + 1), self.values)
+            self.block = (block, rows)
+            row = rows[dev - block * self.network.block_size].tolist()
+        else:
+            row = self.network.routes(dev, self.values).tolist()
+        self.row = (dev, row)
+        return row
+
+    def __len__(self):
+        return self.network.number_of_devices
+
+
+# This class represents an infrastructure whose edge devices are connected by a sparse network (a SparseNetwork).
+# com_cost, bandwidth and transfer_cost give the rows of the routes one device at a time (see RouteRows), and the
+# algorithms read the transfer costs with transfer_block
+class SparseInfrastructure(Infrastructure):
+    def __init__(self, cpu_capacity, ram_capacity, network, user_dev_cost, user_dev_bandwidth):
+        self.cpu_capacity = read_only(cpu_capacity)
+        self.ram_capacity = read_only(ram_capacity)
+        self.network = network
+        self.com_cost = RouteRows(network, 0)
+        self.bandwidth = RouteRows(network, 1)
+        self.transfer_cost = RouteRows(network, 2)
+        self.user_dev_cost = read_only(user_dev_cost)
+        self.user_dev_bandwidth = read_only(user_dev_bandwidth)
+        self.number_of_edge_devices = len(self.cpu_capacity)
+        self.number_of_user_devices = len(self.user_dev_cost)
+        self.memory = None
+        self.layout = None
+        self.list_values = None
+        self.row_block_size = network.block_size
+
+    def lists(self):
+        if self.list_values is None:
+            self.list_values = (self.cpu_capacity.tolist(), self.com_cost, self.bandwidth,
+                                self.user_dev_cost.tolist(), self.user_dev_bandwidth.tolist())
+        return self.list_values
+
+    # A route can be used in both directions, so the columns are found as the rows of their devices
+    def transfer_block(self, rows=None, columns=None):
+        if rows is None and columns is not None:
+            return self.transfer_block(columns).T
+        transfer_cost = self.network.routes(slice(None) if rows is None else rows, 2)
+        if columns is None:
+            return transfer_cost
+        return transfer_cost[columns] if transfer_cost.ndim == 1 else transfer_cost[:, columns]
+
+    # The infrastructure of some of the devices is dense, with the routes between them
+    def subset(self, devices):
+        com_cost, bandwidth, transfer_cost = self.network.find_routes(np.asarray(devices, dtype=int))
+        return Infrastructure(self.cpu_capacity[devices], self.ram_capacity[devices], com_cost[:, devices],
+                              bandwidth[:, devices], self.user_dev_cost[:, devices],
+                              self.user_dev_bandwidth[:, devices], transfer_cost[:, devices])
+
+    # The links are pickled instead of the routes, so the infrastructure is passed to the worker processes as it is
+    def share(self):
+        return self
+
+    def __reduce__(self):
+        return SparseInfrastructure, (self.cpu_capacity, self.ram_capacity, self.network, self.user_dev_cost,
+                                      self.user_dev_bandwidth)
@@ -0,0 +1,99 @@
+# -------------------------------------------#
+# Description: Runs the iterations and the
+#   settings of the main experiment over a
+#   pool of processes
+# -------------------------------------------#
+
+import multiprocessing
+import multiprocessing.util
+import random
+from multiprocessing import resource_tracker
+import variables
+from Infrastructure import detach_infrastructures
+from Main import place_graph, calculate_objective_global, experiment_settings, optimize_global_F_local_search
+from ResultsSink import ResultsSink
+
+
+# Initialize a worker process, each worker runs its solver on a single thread and closes the shared memory
+# blocks that it attached to when it exits
+def init_worker(solver_threads):
+    variables.solver_threads = solver_threads
+    multiprocessing.util.Finalize(None, detach_infrastructures, exitpriority=10)
+
+
+# Run one setting of one iteration and return the iteration, the index of the setting, for each DAG its
+# graph_id, its local objectives (latency, F, RC, sampling ratio, solve time) and the global objectives after it
+# was placed, and the global objectives after the local search (None without a local_search_budget)
+def run_setting(task):
+    iteration, index, infrastructure, graphs, share_operators, local_search_budget, seed = task
+    algorithm, opt_type = experiment_settings[index]
+    if infrastructure.memory is not None:  # Close the blocks of the other iterations, they are attached again if needed
+        detach_infrastructures((infrastructure.memory.name,))
+    setting = variables.set_alg_setting(graphs, infrastructure, share_operators)
+    rows = []
+    for graph in setting.graphs:
+        local = place_graph(algorithm, opt_type, graph, setting, [])
+        rows.append([graph.graph_id, local, calculate_objective_global(setting)])
+    if local_search_budget > 0:
+        optimize_global_F_local_search(algorithm, opt_type, setting, local_search_budget, seed=seed + iteration)
+        return iteration, index, rows, calculate_objective_global(setting)
+    return iteration, index, rows, None
+
+
+# Add the results of the experiment to the sink, in the order that Main.main_experiment adds them
+def write_results(results, iterations, sink):
+    for iteration in range(iterations):
+        for dag in range(len(results[(iteration, 0)][0])):
+            for index, (algorithm, opt_type) in enumerate(experiment_settings):
+                graph_id, local, global_objectives = results[(iteration, index)][0][dag]
+                sink.add_placement(iteration, algorithm, opt_type, graph_id, *local)
+                sink.add_global(iteration, algorithm, opt_type, graph_id, global_objectives)
+        for index, (algorithm, opt_type) in enumerate(experiment_settings):
+            if results[(iteration, index)][1] is not None:
+                sink.add_global(iteration, algorithm, opt_type, -1, results[(iteration, index)][1])
+
+
+# Run the main experiment with the given number of processes (all the cores by default). Iteration i uses
+# random.seed(seed + i), so the results are the same as main_experiment(iterations, seed, results_file,
+# share_operators, local_search_budget), apart from the solve times and the moves that the local search makes in
+# its budget. The settings of all the iterations are given to the pool at once, so that all the workers are busy
+# until the last settings. The workers read the infrastructure of each iteration from shared memory, which is freed
+# as soon as all the settings of the iteration have finished
+def parallel_experiment(iterations=50, seed=0, processes=None, solver_threads=1, results_file="results.db",
+                        share_operators=False, local_search_budget=0):
+    pool = None
+    if processes != 1:
+        # The workers use the resource tracker of this process, which frees the blocks, instead of starting their own
+        resource_tracker.ensure_running()
+        pool = multiprocessing.Pool(processes, init_worker, (solver_threads,))
+    infrastructures = []
+    tasks = []
+    for iteration in range(iterations):
+        random.seed(seed + iteration)
+        variables.init()
+        infrastructures.append(variables.infrastructure.share() if pool is not None else variables.infrastructure)
+        graphs = variables.create_graphs()
+        tasks.extend((iteration, index, infrastructures[iteration], graphs, share_operators, local_search_budget,
+                      seed) for index in range(len(experiment_settings)))
+    results = {}
+    if pool is None:
+        for task in tasks:
+            iteration, index, rows, global_objectives = run_setting(task)
+            results[(iteration, index)] = rows, global_objectives
+    else:
+        remaining = [len(experiment_settings)] * iterations  # Settings of each iteration that have not finished
+        for iteration, index, rows, global_objectives in pool.imap_unordered(run_setting, tasks):
+            results[(iteration, index)] = rows, global_objectives
+            remaining[iteration] -= 1
+            if remaining[iteration] == 0:
+                infrastructures[iteration].release()
+        pool.close()
+        pool.join()
+    sink = ResultsSink(results_file)
+    write_results(results, iterations, sink)
+    sink.close()
+    return sink.experiment
+
+
+if __name__ == "__main__":
+    parallel_experiment()
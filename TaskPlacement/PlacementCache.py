@@ -0,0 +1,100 @@
+# -------------------------------------------#
+# Description: Cache of the placements found
+#   for DAGs that arrive again with the same
+#   structure, requirements and rates
+# -------------------------------------------#
+
+import threading
+import time
+from collections import OrderedDict
+
+
+# Function that returns the signature of a DAG: everything that the placement algorithms read from it (its user
+# device, source, sink, task types, edges and the values of its tasks), but not its graph_id. Copies of a DAG and
+# DAGs created from the same request have the same signature
+def graph_signature(graph):
+    return (graph.mobile_device_id, graph.source, graph.sink, graph.task_types, graph.parent_ptr.tobytes(),
+            graph.parent_index.tobytes(), graph.cpu_req.tobytes(), graph.ram_req.tobytes(),
+            graph.task_selectivity.tobytes(), graph.input_rate.tobytes(), graph.output_rate.tobytes())
+
+
+# This class keeps the placements found for the last max_size DAG signatures (least recently used first out),
+# together with the state of the devices they used: for each device, whether it was enabled and its free CPU
+# and RAM in buckets of 1 / buckets of its capacity. A placement is reused for a DAG with the same signature,
+# algorithm and settings if the devices it uses are in the same buckets and still have the CPU and RAM that its
+# nodes need, apart from the fixed ones. Up to entries_per_key placements, for different states of their devices,
+# are kept per signature. It can be used by the workers of the placement service at the same time
+class PlacementCache:
+    def __init__(self, infrastructure, max_size=1024, buckets=4, entries_per_key=4):
+        self.cpu_capacity = infrastructure.cpu_capacity.tolist()
+        self.ram_capacity = infrastructure.ram_capacity.tolist()
+        self.max_size = max_size
+        self.buckets = buckets
+        self.entries_per_key = entries_per_key
+        self.entries = OrderedDict()  # Key: [(devices, view, result, solve_time)], the most recent first
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0  # Misses where a placement was found in the same buckets but no longer fits
+        self.saved_time = 0  # Solve time of the placements that were reused, minus the time the lookups took
+
+    # Function that returns the key of a DAG and the settings of the algorithm that places it, where objective
+    # holds the variables that the objectives and the sampling ratios depend on (see variables.objective_variables)
+    def find_key(self, algorithm, opt_type, graph, devices_to_remove, fixed, backend, objective):
+        return (algorithm, opt_type, backend, tuple(sorted(devices_to_remove)), tuple(sorted(fixed.items())),
+                objective, graph_signature(graph))
+
+    # Function that returns the bucketed state of some devices in the enabled list
+    def find_view(self, enabled, devices):
+        buckets = self.buckets
+        return tuple((enabled[dev][0], int(enabled[dev][1] / self.cpu_capacity[dev] * buckets),
+                      int(enabled[dev][2] / self.ram_capacity[dev] * buckets)) for dev in devices)
+
+    # Function that finds if the devices of a placement have the CPU and RAM that its nodes need, apart from
+    # the fixed ones
+    def fits(self, graph, placement, enabled, fixed):
+        cpu_req, ram_req, input_rate, output_rate = graph.lists()
+        needed = {}
+        for node in range(graph.number_of_nodes):
+            if node not in fixed:
+                cpu, ram = needed.get(placement[node], (0, 0))
+                needed[placement[node]] = (cpu + cpu_req[node], ram + ram_req[node])
+        return all(round(enabled[dev][1] - cpu, 2) >= 0 and round(enabled[dev][2] - ram, 2) >= 0
+                   for dev, (cpu, ram) in needed.items())
+
+    # Function that returns the cached result (placement, latency, F, RC, selectivity, sampling ratios) for a key,
+    # or None. start is the time the search began, so that the time it took is counted against the saved solve time
+    def lookup(self, key, graph, enabled, fixed, start):
+        with self.lock:
+            entries = self.entries.get(key)
+            if entries is not None:
+                self.entries.move_to_end(key)
+                for devices, view, result, solve_time in entries:
+                    if self.find_view(enabled, devices) != view:
+                        continue
+                    if self.fits(graph, result[0], enabled, fixed):
+                        self.hits += 1
+                        self.saved_time += solve_time - (time.perf_counter() - start)
+                        return (list(result[0]), *result[1:])
+                    self.rejected += 1
+                    break
+            self.misses += 1
+            return None
+
+    # Keep the result of a placement that was found from the enabled list, with the time the algorithm took
+    def store(self, key, enabled, result, solve_time):
+        devices = sorted(set(result[0]))
+        view = self.find_view(enabled, devices)
+        with self.lock:
+            entries = [entry for entry in self.entries.pop(key, []) if entry[0] != devices or entry[1] != view]
+            self.entries[key] = [(devices, view, result, solve_time)] + entries[:self.entries_per_key - 1]
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    # Function that returns the hits, the misses (of which rejected found a placement that no longer fits),
+    # the hit rate and the solve time saved
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "rejected": self.rejected,
+                    "hit_rate": self.hits / lookups if lookups else 0, "saved_time": self.saved_time}
@@ -4,91 +4,199 @@
 #   to devices.
 # -------------------------------------------#
 
-import copy
-import gurobipy as gp
-from gurobipy import GRB
 import numpy as np
 import variables
 import itertools
+import time
+from MILPModel import build_milp_model
+from SolverBackends import get_backend, import_gurobi
 
 
-# Calculate the optimal sampling ratio of a DAG, considering the trade-off with F
-def find_sample_ratio(graph, placement):
-    F_min = 10000
-    final_selectivity = -1
-    for selectivity in np.arange(0.1, 1.1, 0.1):
-        max_latency, F, RC = graph.calculate_objective_local(placement, selectivity)
-        if F < F_min:
-            F_min = F
-            final_selectivity = selectivity
-    return final_selectivity
+# Function that finds the sampling ratio between low and high that minimizes max(a + b * ratio) /
+# (alpha + ratio) ** filter_beta, where the lines (a, b) are the latencies of the paths of a DAG (see
+# DAG.find_latency_lines). Where a line is the slowest, the objective has its minimum at the stationary point of
+# the line or at an end, where the line crosses another one or the range ends, so the minimum is found among
+# these points
+def minimize_sampling_objective(lines, alpha, low, high):
+    beta = variables.filter_beta
+    points = [low, high]
+    for line, (a1, b1) in enumerate(lines):
+        if b1 * (1 - beta) > 0:
+            points.append((beta * a1 - b1 * alpha) / (b1 * (1 - beta)))
+        for a2, b2 in lines[line + 1:]:
+            if b1 != b2:
+                points.append((a2 - a1) / (b1 - b2))
+    best_objective = best_ratio = None
+    for ratio in points:
+        ratio = min(max(ratio, low), high)
+        objective = max(a1 + b1 * ratio for a1, b1 in lines) / (alpha + ratio) ** beta
+        if best_objective is None or objective < best_objective:
+            best_objective, best_ratio = objective, ratio
+    return best_ratio
+
+
+# Calculate the optimal sampling ratio of a DAG, considering the trade-off with F. The RC of the DAG does not
+# depend on the ratio and the latency of each of its paths is a line in the ratio, so the ratio is found in
+# closed form, between variables.sample_ratio_min and variables.sample_ratio_max
+def find_sample_ratio(graph, placement, infrastructure=None):
+    low, high = variables.sample_ratio_min, variables.sample_ratio_max
+    lines = graph.find_latency_lines(graph.find_latency_times(placement, infrastructure), None,
+                                     range(graph.number_of_nodes), low, high)
+    return minimize_sampling_objective(lines, variables.filter_alpha, low, high)
+
+
+# Calculate the optimal sampling ratios of the nodes of a DAG, where each sampling operator (a task whose type is
+# in variables.sampling_operators) has its own ratio and the other nodes share one. Starting from the optimal
+# ratio of find_sample_ratio, the ratio of each operator (and of the other nodes) is found in closed form with
+# the other ratios fixed, which never raises F, until the ratios stop changing. The selectivity of F is the
+# average of the ratios of the nodes
+def find_operator_sample_ratios(graph, placement, infrastructure=None, max_rounds=10):
+    times = graph.find_latency_times(placement, infrastructure)
+    number_of_nodes = graph.number_of_nodes
+    low, high = variables.sample_ratio_min, variables.sample_ratio_max
+    groups = [{node} for node in range(number_of_nodes) if graph.task_types[node] in variables.sampling_operators]
+    others = {node for node in range(number_of_nodes) if graph.task_types[node] not in variables.sampling_operators}
+    if others:
+        groups.append(others)
+    ratios = [minimize_sampling_objective(graph.find_latency_lines(times, None, range(number_of_nodes), low, high),
+                                          variables.filter_alpha, low, high)] * number_of_nodes
+    if len(groups) == 1:
+        return ratios
+    for iteration in range(max_rounds):
+        previous = ratios[:]
+        for group in groups:
+            # With the other ratios fixed, the objective is the one of find_sample_ratio with a shifted alpha
+            others_sum = sum(ratio for node, ratio in enumerate(ratios) if node not in group)
+            ratio = minimize_sampling_objective(graph.find_latency_lines(times, ratios, group, low, high),
+                                                (number_of_nodes * variables.filter_alpha + others_sum) / len(group),
+                                                low, high)
+            for node in group:
+                ratios[node] = ratio
+        if max(abs(ratio - previous_ratio) for ratio, previous_ratio in zip(ratios, previous)) <= 1e-9:
+            break
+    return ratios
+
+
+# Function that finds the sampling ratios of a placement of a DAG: one ratio for all the data, or a ratio for
+# each node (see find_operator_sample_ratios) if variables.operator_sampling is set
+def find_sample_ratios(graph, placement, infrastructure=None):
+    if variables.operator_sampling:
+        return find_operator_sample_ratios(graph, placement, infrastructure)
+    return find_sample_ratio(graph, placement, infrastructure)
+
+
+# Function that copies the enabled list, which only holds numbers, without the overhead of copy.deepcopy
+def copy_enabled(enabled):
+    return [row[:] for row in enabled]
+
+
+# Function that returns the nodes in fixed (node: device) whose device is not in devices_to_remove. The others lose
+# their shared operator and are placed like the rest of the nodes. The fixed nodes are not checked against the
+# availability of the devices, since their device already runs their operator
+def find_fixed_nodes(fixed, devices_to_remove):
+    return {node: dev for node, dev in (fixed or {}).items() if dev not in devices_to_remove}
+
+
+# Function that returns the CPU and RAM that each node of a DAG takes on its device. The nodes in fixed
+# (node: device) use an operator that another DAG has already placed on the device, so they take nothing
+def find_node_load(graph, fixed):
+    cpu_load, ram_load, input_rate, output_rate = graph.lists()
+    for node in fixed:
+        cpu_load[node] = 0
+        ram_load[node] = 0
+    return cpu_load, ram_load
+
+
+# Function that takes the resources of the nodes of a placement, apart from the fixed ones, from the enabled list
+def take_resources(enabled, placement, cpu_load, ram_load, fixed):
+    for node in range(len(placement)):
+        if node not in fixed:
+            dev = placement[node]
+            enabled[dev][0] = 1
+            enabled[dev][1] = round(enabled[dev][1] - cpu_load[node], 2)
+            enabled[dev][2] = round(enabled[dev][2] - ram_load[node], 2)
+            enabled[dev][3] += 1
 
 
 # Function that finds if the CPU and RAM constraints are fulfilled in the DP algorithm
-def find_free_cpu_ram(graph, enabled_init, node, dev, input_devices):
-    enabled = copy.deepcopy(enabled_init)
-    enabled[1] -= graph.tasks[node].cpu_req
-    enabled[2] -= graph.tasks[node].ram_req
+def find_free_cpu_ram(cpu_req, ram_req, enabled_init, node, dev, input_devices):
+    free_cpu = enabled_init[1] - cpu_req[node]
+    free_ram = enabled_init[2] - ram_req[node]
     exam_dev = dev
     receives_from_dev = input_devices[node][dev]
     for node in range(node, 0, -1):  # For the previous nodes
         if receives_from_dev == exam_dev:
-            enabled[1] -= graph.tasks[node - 1].cpu_req
-            enabled[2] -= graph.tasks[node - 1].ram_req
+            free_cpu -= cpu_req[node - 1]
+            free_ram -= ram_req[node - 1]
         receives_from_dev = input_devices[node - 1][receives_from_dev]
 
-    return 0 if enabled[1] < 0 or enabled[2] < 0 else 1
+    return 0 if free_cpu < 0 or free_ram < 0 else 1
 
 
-# Dynamic Programming algorithm to assign tasks to devices
-def DP_placement(graph, enabled_init, availability, devices_to_remove):
-    enabled = copy.deepcopy(enabled_init)
+# Dynamic Programming algorithm to assign tasks to devices. The nodes in fixed (node: device) are placed on
+# their device, where their operator already runs
+def DP_placement(graph, enabled_init, availability, devices_to_remove, infrastructure=None, fixed=None):
+    infrastructure = variables.get_infrastructure(infrastructure)
+    fixed = find_fixed_nodes(fixed, devices_to_remove)
+    cpu_capacity, com_cost, bandwidth, user_dev_cost, user_dev_bandwidth = infrastructure.lists()
+    cpu_req, ram_req, input_rate, output_rate = graph.lists()
+    cpu_load, ram_load = find_node_load(graph, fixed)
+    enabled = copy_enabled(enabled_init)
     min_cost = 10000
     final_placement = [-1] * graph.number_of_nodes
-    costs = [[10000] * variables.number_of_edge_devices for i in range(graph.number_of_nodes)]
-    input_devices = [[-1] * variables.number_of_edge_devices for i in range(graph.number_of_nodes)]
+    costs = [[10000] * infrastructure.number_of_edge_devices for i in range(graph.number_of_nodes)]
+    input_devices = [[-1] * infrastructure.number_of_edge_devices for i in range(graph.number_of_nodes)]
 
     # Execution time and transfer time from user to the source node
-    for dev in range(variables.number_of_edge_devices):
-        if graph.tasks[graph.source].cpu_req <= enabled[dev][1] and graph.tasks[graph.source].ram_req <= \
-                enabled[dev][2] and availability[dev] == 1 and dev not in devices_to_remove:
-            costs[graph.source][dev] = graph.tasks[graph.source].cpu_req / variables.cpu_capacity[dev] + (
-                    (graph.tasks[graph.source].input_rate *
-                     variables.user_dev_cost[graph.mobile_device_id][dev]) /
-                    variables.user_dev_bandwidth[graph.mobile_device_id][dev])
+    for dev in range(infrastructure.number_of_edge_devices):
+        if (fixed[graph.source] == dev if graph.source in fixed else
+                cpu_req[graph.source] <= enabled[dev][1] and ram_req[graph.source] <= enabled[dev][2] and
+                availability[dev] == 1 and dev not in devices_to_remove):
+            costs[graph.source][dev] = cpu_req[graph.source] / cpu_capacity[dev] + (
+                    (input_rate[graph.source] *
+                     user_dev_cost[graph.mobile_device_id][dev]) /
+                    user_dev_bandwidth[graph.mobile_device_id][dev])
         else:
             costs[graph.source][dev] = 10000
 
-    # For the rest of the nodes
+    # For the rest of the nodes. Only the devices that a node can use are examined, the others keep the cost
+    # 10000, and only the states of the previous node with a lower cost can be cheaper to receive data from
+    usable = [dev for dev in range(infrastructure.number_of_edge_devices)
+              if availability[dev] == 1 and dev not in devices_to_remove]
     for node in range(1, graph.number_of_nodes):
-
-        for dev in range(variables.number_of_edge_devices):
+        previous = [dev2 for dev2 in range(infrastructure.number_of_edge_devices) if costs[node - 1][dev2] < 10000]
+        for dev in [fixed[node]] if node in fixed else usable:
             temp_cost_1 = 10000
             temp_dev = -1
-            for dev2 in range(variables.number_of_edge_devices):  # Find from which device it is cheaper to receive data
+            com_cost_dev = com_cost[dev]
+            bandwidth_dev = bandwidth[dev]
+            # Find from which device it is cheaper to receive data
+            for dev2 in previous:
                 temp_cost_2 = costs[node - 1][dev2] + (
-                        graph.tasks[node - 1].output_rate * variables.com_cost[dev][dev2] /
-                        variables.bandwidth[dev][dev2])
+                        output_rate[node - 1] * com_cost_dev[dev2] /
+                        bandwidth_dev[dev2])
                 if temp_cost_2 < temp_cost_1:
                     temp_cost_1 = temp_cost_2
                     temp_dev = dev2
-            costs[node][dev] = temp_cost_1 + (graph.tasks[node].cpu_req / variables.cpu_capacity[dev])
+            if temp_dev == -1:  # No device can send data to it
+                continue
+            costs[node][dev] = temp_cost_1 + (cpu_req[node] / cpu_capacity[dev])
             input_devices[node][dev] = temp_dev
             # If CPU or RAM constraints are violated
-            if (find_free_cpu_ram(graph, enabled[dev], node, dev, input_devices) == 0 or
-                    availability[dev] == 0 or dev in devices_to_remove):
+            if node not in fixed and find_free_cpu_ram(cpu_load, ram_load, enabled[dev], node, dev,
+                                                       input_devices) == 0:
                 costs[node][dev] = 10000
                 input_devices[node][dev] = -1
 
     # Transfer time to user for the sink node
-    for dev in range(variables.number_of_edge_devices):
+    for dev in range(infrastructure.number_of_edge_devices):
         if (costs[graph.sink][dev]) != 10000:
-            costs[graph.sink][dev] += (graph.tasks[graph.sink].output_rate *
-                                       variables.user_dev_cost[graph.mobile_device_id][dev]) / \
-                                      variables.user_dev_bandwidth[graph.mobile_device_id][dev]
+            costs[graph.sink][dev] += (output_rate[graph.sink] *
+                                       user_dev_cost[graph.mobile_device_id][dev]) / \
+                                      user_dev_bandwidth[graph.mobile_device_id][dev]
 
     # Find the minimum cost of the last row
-    for dev in range(variables.number_of_edge_devices):
+    for dev in range(infrastructure.number_of_edge_devices):
 
         if min_cost > costs[graph.number_of_nodes - 1][dev]:
             min_cost = costs[graph.number_of_nodes - 1][dev]
@@ -107,47 +215,416 @@ def DP_placement(graph, enabled_init, availability, devices_to_remove):
             latency = F = RC = -1
             # break;
     if solution_found == 1:
+        take_resources(enabled, final_placement, cpu_load, ram_load, fixed)
+        latency, F, RC = graph.calculate_objective_local(final_placement, 1, infrastructure)
+    return solution_found, latency, F, RC, final_placement, enabled
 
-        for node in range(graph.number_of_nodes):
-            dev = final_placement[node]
-            enabled[dev][0] = 1
-            enabled[dev][1] = round(enabled[dev][1] - graph.tasks[node].cpu_req, 2)
-            enabled[dev][2] = round(enabled[dev][2] - graph.tasks[node].ram_req, 2)
-            enabled[dev][3] += 1
-        latency, F, RC = graph.calculate_objective_local(final_placement, 1)
+
+# Vectorized version of the DP algorithm, each row of the DP table is computed with array operations
+# and the CPU/RAM used by each DP state is carried along instead of walking back the chain. The nodes in fixed
+# (node: device) are placed on their device, where their operator already runs. The CPU/RAM left on a device is
+# rounded to two decimals, as in take_resources, while DP_placement subtracts the tasks of the chain one by one
+# without rounding, so a device that the chain fills exactly (e.g. 0.3 - 0.2 - 0.1) is feasible here and may not
+# be in DP_placement. The transfer costs are read as com_cost / bandwidth and then multiplied by the rate, so
+# when two devices cost the same up to the rounding of the last digit, the other one may be selected
+def DP_placement_np(graph, enabled_init, availability, devices_to_remove, infrastructure=None, fixed=None):
+    return DP_placement_np_batch(graph, enabled_init, [availability], devices_to_remove, infrastructure, fixed)[0]
+
+
+# Function that yields the rows (a slice of the columns) and the transfer costs between the devices of the rows
+# and of the columns (all the devices if None), a block of rows at a time, so that the transfer costs between
+# many devices are not all needed at once. A block has up to max_values values for each of the copies, or the
+# rows that the infrastructure keeps together (row_block_size) when all the devices are read
+def transfer_row_blocks(infrastructure, columns, copies=1, max_values=1 << 22):
+    number_of_columns = infrastructure.number_of_edge_devices if columns is None else len(columns)
+    rows_per_block = max(1, max_values // (copies * number_of_columns))
+    if columns is None and infrastructure.row_block_size is not None:
+        rows_per_block = infrastructure.row_block_size
+    for start in range(0, number_of_columns, rows_per_block):
+        rows = slice(start, start + rows_per_block)
+        yield rows, infrastructure.transfer_block(rows if columns is None else columns[rows], columns)
+
+
+# Function that runs the vectorized DP algorithm for each of the availability lists at once, with one more
+# dimension in its arrays, and returns the result of each run. Only the devices that some node can use take
+# part in the DP table, since the others can not be in any placement
+def DP_placement_np_batch(graph, enabled_init, availabilities, devices_to_remove, infrastructure=None, fixed=None):
+    infrastructure = variables.get_infrastructure(infrastructure)
+    fixed = find_fixed_nodes(fixed, devices_to_remove)
+    allowed = np.array(availabilities, dtype=int) == 1
+    allowed[:, list(devices_to_remove)] = False
+    columns = np.flatnonzero(allowed.any(axis=0) | np.isin(np.arange(infrastructure.number_of_edge_devices),
+                                                           list(fixed.values())))
+    allowed = allowed[:, columns]
+    fixed_columns = {node: int(np.searchsorted(columns, dev)) for node, dev in fixed.items()}
+    batch = np.arange(len(allowed))[:, np.newaxis]
+    devices = np.arange(len(columns))
+    free_cpu = np.array([enabled_init[dev][1] for dev in columns], dtype=float)
+    free_ram = np.array([enabled_init[dev][2] for dev in columns], dtype=float)
+    column_devices = None if len(columns) == infrastructure.number_of_edge_devices else columns
+    cpu_capacity = infrastructure.cpu_capacity[columns]
+    user_cost = infrastructure.user_dev_cost[graph.mobile_device_id][columns]
+    user_bandwidth = infrastructure.user_dev_bandwidth[graph.mobile_device_id][columns]
+    cpu_req, ram_req, input_rate, output_rate = graph.lists()
+    cpu_load, ram_load = find_node_load(graph, fixed)
+
+    costs = np.full((len(allowed), graph.number_of_nodes, len(columns)), 10000.0)
+    input_devices = np.full((len(allowed), graph.number_of_nodes, len(columns)), -1, dtype=int)
+
+    # CPU and RAM used on each device (last axis) by the chain of tasks that ends at each DP state (middle axis)
+    used_cpu = np.zeros((len(allowed), len(columns), len(columns)))
+    used_ram = np.zeros((len(allowed), len(columns), len(columns)))
+
+    # Execution time and transfer time from user to the source node
+    source = graph.source
+    feasible = (devices == fixed_columns[source] if source in fixed else
+                allowed & (cpu_req[source] <= free_cpu) & (ram_req[source] <= free_ram))
+    costs[:, source] = np.where(feasible, cpu_req[source] / cpu_capacity + (
+            (input_rate[source] * user_cost) / user_bandwidth), 10000)
+    used_cpu[:, devices, devices] = cpu_load[source]
+    used_ram[:, devices, devices] = ram_load[source]
+
+    # For the rest of the nodes
+    for node in range(1, graph.number_of_nodes):
+        # Cost of receiving data from every device (last axis) for every device (middle axis)
+        temp_dev = np.empty((len(allowed), len(columns)), dtype=int)
+        temp_cost = np.empty((len(allowed), len(columns)))
+        for rows, transfer_cost in transfer_row_blocks(infrastructure, column_devices, len(allowed)):
+            candidates = transfer_cost * output_rate[node - 1] + costs[:, node - 1, np.newaxis, :]
+            temp_dev[:, rows] = candidates.argmin(axis=2)
+            temp_cost[:, rows] = candidates.min(axis=2)
+        reachable = temp_cost < 10000
+
+        # CPU and RAM left on each device after adding the task to the chain it receives data from, rounded as
+        # the free resources are rounded when a placement takes them
+        used_cpu = used_cpu[batch, temp_dev]
+        used_ram = used_ram[batch, temp_dev]
+        cpu_left = np.round(free_cpu - used_cpu[:, devices, devices] - cpu_load[node], 2)
+        ram_left = np.round(free_ram - used_ram[:, devices, devices] - ram_load[node], 2)
+        used_cpu[:, devices, devices] += cpu_load[node]
+        used_ram[:, devices, devices] += ram_load[node]
+
+        # If CPU or RAM constraints are violated the device can not be used. As in DP_placement, the fixed nodes
+        # take no resources and are not checked
+        if node in fixed:
+            feasible = reachable & (devices == fixed_columns[node])
+        else:
+            feasible = reachable & allowed & (cpu_left >= 0) & (ram_left >= 0)
+        costs[:, node] = np.where(feasible, temp_cost + cpu_req[node] / cpu_capacity, 10000)
+        input_devices[:, node] = np.where(feasible, temp_dev, -1)
+
+    # Transfer time to user for the sink node
+    sink_costs = costs[:, graph.sink]
+    sink_costs = np.where(sink_costs != 10000, sink_costs + (output_rate[graph.sink] * user_cost) / user_bandwidth,
+                          sink_costs)
+
+    results = []
+    for run in range(len(allowed)):
+        # Find the minimum cost of the last row and the placement in a bottom-up way
+        final_placement = [-1] * graph.number_of_nodes
+        dev = int(sink_costs[run].argmin())
+        if sink_costs[run, dev] < 10000:
+            for node in range(graph.number_of_nodes - 1, -1, -1):
+                final_placement[node] = int(columns[dev])
+                dev = int(input_devices[run, node, dev])
+
+        enabled = copy_enabled(enabled_init)
+        solution_found = 0 if -1 in final_placement else 1
+        latency = F = RC = -1
+        if solution_found == 1:
+            take_resources(enabled, final_placement, cpu_load, ram_load, fixed)
+            latency, F, RC = graph.calculate_objective_local(final_placement, 1, infrastructure)
+        results.append((solution_found, latency, F, RC, final_placement, enabled))
+    return results
+
+
+# Function that finds, for a placement of a DAG, the time that each edge (parent, node) needs to transfer the
+# output of the parent to the device of the node
+def find_edge_times(graph, placement, infrastructure):
+    output_rate = graph.output_rate.tolist()
+    used_devices = sorted(set(placement))
+    index = {dev: position for position, dev in enumerate(used_devices)}
+    transfer_cost = infrastructure.transfer_block(used_devices, used_devices).tolist()
+    return {(parent, node): output_rate[parent] * transfer_cost[index[placement[node]]][index[placement[parent]]]
+            for node in range(graph.number_of_nodes) for parent in graph.parents(node)}
+
+
+# Function that finds the time that a node finishes its execution, given the finish times of its parents
+def find_finish_time(graph, node, placement, finish, edge_times, user_cost, user_bandwidth, infrastructure):
+    dev = placement[node]
+    if node == graph.source:
+        ready = (graph.input_rate[node] * user_cost[dev]) / user_bandwidth[dev]
+    else:
+        ready = max(finish[parent] + edge_times[(parent, node)] for parent in graph.parents(node))
+    return ready + graph.cpu_req[node] / infrastructure.cpu_capacity[dev]
+
+
+# Function that finds the time from the moment a node receives its data until the results reach the user, given
+# the same times of its children
+def find_tail_time(graph, node, placement, tail, edge_times, user_cost, user_bandwidth, infrastructure):
+    dev = placement[node]
+    if node == graph.sink:
+        send = (graph.output_rate[node] * user_cost[dev]) / user_bandwidth[dev]
+    else:
+        send = max(edge_times[(node, child)] + tail[child] for child in graph.children(node))
+    return graph.cpu_req[node] / infrastructure.cpu_capacity[dev] + send
+
+
+# Function that finds, for a placement of a DAG, the time that each node finishes its execution and the time
+# from the moment each node receives its data until the results reach the user
+def find_path_times(graph, placement, user_cost, user_bandwidth, infrastructure, edge_times=None):
+    if edge_times is None:
+        edge_times = find_edge_times(graph, placement, infrastructure)
+    finish = [0] * graph.number_of_nodes
+    tail = [0] * graph.number_of_nodes
+    for node in graph.order:
+        finish[node] = find_finish_time(graph, node, placement, finish, edge_times, user_cost, user_bandwidth,
+                                        infrastructure)
+    for node in graph.order[::-1]:
+        tail[node] = find_tail_time(graph, node, placement, tail, edge_times, user_cost, user_bandwidth,
+                                    infrastructure)
+    return finish, tail
+
+
+# Function that updates the times of find_path_times after a node was moved to another device. Only the finish
+# times of the nodes after it and the tail times of the nodes before it are recomputed, and only while they change
+def update_path_times(graph, moved, placement, finish, tail, edge_times, user_cost, user_bandwidth, infrastructure):
+    position = graph.order.index(moved)
+    changed = {moved}
+    for node in graph.order[position:]:
+        if node != moved and not any(parent in changed for parent in graph.parents(node)):
+            continue
+        time = find_finish_time(graph, node, placement, finish, edge_times, user_cost, user_bandwidth,
+                                infrastructure)
+        if node == moved or time != finish[node]:
+            finish[node] = time
+            changed.add(node)
+    changed = {moved}
+    for node in graph.order[position::-1]:
+        if node != moved and not any(child in changed for child in graph.children(node)):
+            continue
+        time = find_tail_time(graph, node, placement, tail, edge_times, user_cost, user_bandwidth, infrastructure)
+        if node == moved or time != tail[node]:
+            tail[node] = time
+            changed.add(node)
+
+
+# Function that moves single nodes of a DAG placement to the device that shortens the slowest path
+# through them, as long as the CPU/RAM constraints hold. The fixed nodes are not moved
+def refine_placement_dag(graph, placement, free_cpu, free_ram, allowed, user_cost, user_bandwidth, infrastructure,
+                         fixed):
+    cpu_req, ram_req, input_rate, output_rate = graph.lists()
+    cpu_load, ram_load = find_node_load(graph, fixed)
+    used_cpu = np.zeros(infrastructure.number_of_edge_devices)
+    used_ram = np.zeros(infrastructure.number_of_edge_devices)
+    for node in range(graph.number_of_nodes):
+        used_cpu[placement[node]] += cpu_load[node]
+        used_ram[placement[node]] += ram_load[node]
+
+    edge_times = find_edge_times(graph, placement, infrastructure)
+    finish, tail = find_path_times(graph, placement, user_cost, user_bandwidth, infrastructure, edge_times)
+    for sweep in range(graph.number_of_nodes):
+        improved = False
+        for node in graph.order:
+            if node in fixed:
+                continue
+            dev = placement[node]
+            receive = {}
+            # Slowest path through the node for each device it could be placed on
+            if node == graph.source:
+                through = (input_rate[node] * user_cost) / user_bandwidth
+            else:
+                through = np.zeros(infrastructure.number_of_edge_devices)
+                for parent in graph.parents(node):
+                    receive[parent] = output_rate[parent] * infrastructure.transfer_block(None, placement[parent])
+                    through = np.maximum(through, finish[parent] + receive[parent])
+            through = through + cpu_req[node] / infrastructure.cpu_capacity
+            if node == graph.sink:
+                through = through + (output_rate[node] * user_cost) / user_bandwidth
+            else:
+                send = np.zeros(infrastructure.number_of_edge_devices)
+                transmit = {}
+                for child in graph.children(node):
+                    transmit[child] = output_rate[node] * infrastructure.transfer_block(placement[child])
+                    send = np.maximum(send, transmit[child] + tail[child])
+                through = through + send
+
+            used_cpu[dev] -= cpu_load[node]
+            used_ram[dev] -= ram_load[node]
+            fits = allowed & (np.round(free_cpu - used_cpu - cpu_load[node], 2) >= 0) & (
+                    np.round(free_ram - used_ram - ram_load[node], 2) >= 0)
+            through = np.where(fits, through, np.inf)
+            best_dev = int(through.argmin())
+            if through[best_dev] < through[dev] - 1e-9:
+                dev = best_dev
+                improved = True
+                placement[node] = dev
+                # Only the edges of the moved node change their transfer times
+                for parent in graph.parents(node):
+                    edge_times[(parent, node)] = float(receive[parent][dev])
+                for child in graph.children(node):
+                    edge_times[(node, child)] = float(transmit[child][dev])
+                update_path_times(graph, node, placement, finish, tail, edge_times, user_cost, user_bandwidth,
+                                  infrastructure)
+            used_cpu[dev] += cpu_load[node]
+            used_ram[dev] += ram_load[node]
+        if not improved:
+            break
+    return placement
+
+
+# Function that finds if a DAG is a chain, where each node receives data from the one before it
+def is_chain(graph):
+    return all(graph.parents(node) == [node - 1] for node in range(1, graph.number_of_nodes))
+
+
+# Function that assigns the nodes of a DAG to devices in reverse topological order, given the device of the sink.
+# Each node is placed on the device that delivers its data to its already placed children the fastest and the
+# fixed nodes on their own device
+def assign_devices_dag(graph, arrival, sink_dev, free_cpu, free_ram, infrastructure, fixed):
+    cpu_req, ram_req, input_rate, output_rate = graph.lists()
+    cpu_load, ram_load = find_node_load(graph, fixed)
+    placement = [-1] * graph.number_of_nodes
+    used_cpu = np.zeros(infrastructure.number_of_edge_devices)
+    used_ram = np.zeros(infrastructure.number_of_edge_devices)
+    for node in graph.order[::-1]:
+        if node in fixed:
+            placement[node] = fixed[node]
+            continue
+        if node == graph.sink:
+            finish = np.where(np.arange(infrastructure.number_of_edge_devices) == sink_dev, arrival[node], np.inf)
+        else:  # Transfer time to the slowest child
+            finish = np.zeros(infrastructure.number_of_edge_devices)
+            for child in graph.children(node):
+                finish = np.maximum(finish, arrival[node] + output_rate[node] *
+                                    infrastructure.transfer_block(placement[child]))
+        fits = ((np.round(free_cpu - used_cpu - cpu_load[node], 2) >= 0) &
+                (np.round(free_ram - used_ram - ram_load[node], 2) >= 0))
+        finish = np.where(fits, finish, np.inf)
+        dev = int(finish.argmin())
+        if finish[dev] == np.inf:
+            return None
+        placement[node] = dev
+        used_cpu[dev] += cpu_load[node]
+        used_ram[dev] += ram_load[node]
+    return placement
+
+
+# DP algorithm for DAGs of any shape. The nodes are visited in topological order and the arrival time of
+# a node on a device is the latest of its parents' arrival times, each received from the parent's cheapest
+# device. The devices are then assigned in reverse topological order for a few candidate sink devices, single
+# nodes are moved while that shortens the slowest path through them, and the fastest placement is kept.
+# The nodes in fixed (node: device) are placed on their device, where their operator already runs
+def DP_placement_dag(graph, enabled_init, availability, devices_to_remove, sink_candidates=5, infrastructure=None,
+                     fixed=None):
+    # Chains are solved by the DP that keeps track of the resources used by each chain
+    if is_chain(graph):
+        return DP_placement_np(graph, enabled_init, availability, devices_to_remove, infrastructure, fixed)
+    infrastructure = variables.get_infrastructure(infrastructure)
+    fixed = find_fixed_nodes(fixed, devices_to_remove)
+    devices = np.arange(infrastructure.number_of_edge_devices)
+
+    enabled = copy_enabled(enabled_init)
+    free_cpu = np.array([row[1] for row in enabled], dtype=float)
+    free_ram = np.array([row[2] for row in enabled], dtype=float)
+    allowed = np.array(availability, dtype=int) == 1
+    allowed[list(devices_to_remove)] = False
+    user_cost = infrastructure.user_dev_cost[graph.mobile_device_id]
+    user_bandwidth = infrastructure.user_dev_bandwidth[graph.mobile_device_id]
+    cpu_req, ram_req, input_rate, output_rate = graph.lists()
+    cpu_load, ram_load = find_node_load(graph, fixed)
+    arrival = [None] * graph.number_of_nodes
+
+    # Earliest time that each node can finish its execution on each device
+    for node in graph.order:
+        if node == graph.source:  # Transfer time from user to the source node
+            ready = (input_rate[node] * user_cost) / user_bandwidth
+        else:  # Transfer time from the slowest parent
+            ready = np.zeros(infrastructure.number_of_edge_devices)
+            for parent in graph.parents(node):
+                received = np.empty(infrastructure.number_of_edge_devices)
+                for rows, transfer_cost in transfer_row_blocks(infrastructure, None):
+                    received[rows] = (arrival[parent] + output_rate[parent] * transfer_cost).min(axis=1)
+                ready = np.maximum(ready, received)
+        fits = devices == fixed[node] if node in fixed else (
+                allowed & (cpu_req[node] <= free_cpu) & (ram_req[node] <= free_ram))
+        arrival[node] = np.where(fits, ready + cpu_req[node] / infrastructure.cpu_capacity, np.inf)
+
+    # Assign the devices in a bottom-up way, starting from the best devices for the sink
+    final_placement = [-1] * graph.number_of_nodes
+    min_latency = np.inf
+    sink_finish = arrival[graph.sink] + (output_rate[graph.sink] * user_cost) / user_bandwidth
+    for sink_dev in np.argsort(sink_finish, kind="stable")[:sink_candidates]:
+        if sink_finish[sink_dev] == np.inf:
+            break
+        placement = assign_devices_dag(graph, arrival, int(sink_dev), free_cpu, free_ram, infrastructure, fixed)
+        if placement is None:  # If a node does not fit on any device
+            continue
+        placement = refine_placement_dag(graph, placement, free_cpu, free_ram, allowed, user_cost, user_bandwidth,
+                                         infrastructure, fixed)
+        finish, tail = find_path_times(graph, placement, user_cost, user_bandwidth, infrastructure)
+        latency = finish[graph.sink] + (output_rate[graph.sink] * user_cost[placement[graph.sink]]) / \
+            user_bandwidth[placement[graph.sink]]
+        if latency < min_latency:
+            min_latency = latency
+            final_placement = placement
+
+    solution_found = 0 if -1 in final_placement else 1
+    latency = F = RC = -1
+    if solution_found == 1:
+        take_resources(enabled, final_placement, cpu_load, ram_load, fixed)
+        latency, F, RC = graph.calculate_objective_local(final_placement, 1, infrastructure)
     return solution_found, latency, F, RC, final_placement, enabled
 
 
-# Function that calls the DP algorithm based on the different optimization variations
-def DP_placement_main(graph, enabled_init, resource_opt, devices_to_remove):
-    enabled = copy.deepcopy(enabled_init)
+# Function that runs the DP algorithm once for each of the candidate devices, with the device set as unavailable,
+# and returns the results in the order of the candidates. The vectorized DP (and the DAG DP, which runs it for
+# chains) runs for all the candidates at once
+def find_removal_results(graph, enabled_init, availability, candidates, devices_to_remove, dp_algorithm,
+                         infrastructure, fixed):
+    availabilities = [list(availability) for dev in candidates]
+    for run, dev in enumerate(candidates):
+        availabilities[run][dev] = 0
+    if dp_algorithm is DP_placement_np or (dp_algorithm is DP_placement_dag and is_chain(graph)):
+        return DP_placement_np_batch(graph, enabled_init, availabilities, devices_to_remove, infrastructure, fixed)
+    return [dp_algorithm(graph, enabled_init, availabilities[run], devices_to_remove, infrastructure=infrastructure,
+                         fixed=fixed) for run in range(len(candidates))]
+
+
+# Function that calls the DP algorithm based on the different optimization variations. The nodes in fixed
+# (node: device) are placed on their device, where their operator already runs
+def DP_placement_main(graph, enabled_init, resource_opt, devices_to_remove, dp_algorithm=DP_placement,
+                      infrastructure=None, fixed=None):
+    infrastructure = variables.get_infrastructure(infrastructure)
+    enabled = copy_enabled(enabled_init)
     solution_found = 0
     placement = []
-    availability = [1] * variables.number_of_edge_devices
+    availability = [1] * infrastructure.number_of_edge_devices
     latency = F = RC = -1
 
     if resource_opt == "enabled":
         current_used = sum(
-            enabled[i][0] for i in range(variables.number_of_edge_devices))  # Number of already enabled devices
+            enabled[i][0] for i in range(infrastructure.number_of_edge_devices))  # Number of already enabled devices
         if current_used != 0:
-            for dev in range(variables.number_of_edge_devices):
+            for dev in range(infrastructure.number_of_edge_devices):
                 if enabled[dev][0] == 0:  # If the device is not already enabled
                     availability[dev] = 0
 
     # Find initial DP solution
     solution_found_temp, latency_temp, F_temp, RC_temp, placement_temp, enabled_temp = \
-        DP_placement(graph, enabled_init, availability, devices_to_remove)
+        dp_algorithm(graph, enabled_init, availability, devices_to_remove, infrastructure=infrastructure, fixed=fixed)
 
     if solution_found_temp == 0 and resource_opt == "enabled":
-        availability = [1] * variables.number_of_edge_devices
+        availability = [1] * infrastructure.number_of_edge_devices
         solution_found_temp, latency_temp, F_temp, RC_temp, placement_temp, enabled_temp = \
-            DP_placement(graph, enabled_init, availability, devices_to_remove)
+            dp_algorithm(graph, enabled_init, availability, devices_to_remove, infrastructure=infrastructure,
+                         fixed=fixed)
 
     if solution_found_temp == 1:  # If a solution was found
 
         solution_found = solution_found_temp
-        placement = copy.deepcopy(placement_temp)
-        enabled = copy.deepcopy(enabled_temp)
+        placement = placement_temp
+        enabled = enabled_temp  # Each run of the DP returns a new enabled list
         used_devices = set(placement)  # List of used devices
         number_of_used_devices = len(used_devices)  # Number of used devices
         latency = latency_temp
@@ -155,30 +632,28 @@ def DP_placement_main(graph, enabled_init, resource_opt, devices_to_remove):
         RC = RC_temp
 
         if resource_opt == "min":
-            for dev in range(variables.number_of_edge_devices):  # Set the non-used devices as unavailable
+            for dev in range(infrastructure.number_of_edge_devices):  # Set the non-used devices as unavailable
                 if dev not in used_devices:
                     availability[dev] = 0
             # Run DP again and gradually remove devices
             for i in range(number_of_used_devices - 1):
                 min_F = 100000
-                for dev in used_devices:  # Remove a device from the list
-                    availability[dev] = 0  # Set it as unavailable
-
-                    # Run DP
-                    solution_found_temp, latency_temp, F_temp, RC_temp, placement_temp, enabled_temp = \
-                        DP_placement(graph, enabled_init, availability, devices_to_remove)
+                candidates = list(used_devices)
+                removal_results = find_removal_results(graph, enabled_init, availability, candidates,
+                                                       devices_to_remove, dp_algorithm, infrastructure, fixed)
+                for dev, removal_result in zip(candidates, removal_results):  # Remove a device from the list
+                    solution_found_temp, latency_temp, F_temp, RC_temp, placement_temp, enabled_temp = removal_result
                     if solution_found_temp == 1 and F_temp < min_F:  # If a solution was found and is better than the previous one
                         device_to_remove = dev
                         min_F = F_temp
                     # If a solution was found and is better than the initial one
                     if solution_found_temp == 1 and F_temp < F:
                         solution_found = solution_found_temp
-                        placement = copy.deepcopy(placement_temp)
-                        enabled = copy.deepcopy(enabled_temp)
+                        placement = placement_temp
+                        enabled = enabled_temp
                         latency = latency_temp
                         F = F_temp
                         RC = RC_temp
-                    availability[dev] = 1  # Set it as available again
                 if min_F == 100000:  # If a solution was not found for any of the removed devices from the list
                     break
                 # Else remove that device that was the most beneficial in terms of the objective function
@@ -188,132 +663,383 @@ def DP_placement_main(graph, enabled_init, resource_opt, devices_to_remove):
     return solution_found, latency, F, RC, placement, enabled
 
 
-# Quadratic Programming algorithm to assign tasks to devices
-def QP_placement(graph, enabled_init, resource_opt, devices_to_remove):
-    enabled = copy.deepcopy(enabled_init)
+# Function that finds a placement with the fast DP algorithm, to be used as the starting point of the solvers.
+# It returns the placement, its latency and the number of the devices it uses that count towards max_devices
+def find_warm_start(graph, enabled, resource_opt, devices_to_remove, infrastructure, fixed=None):
+    solution_found, latency, F, RC, placement, enabled_temp = DP_placement_main(graph, enabled, resource_opt,
+                                                                                devices_to_remove, DP_placement_dag,
+                                                                                infrastructure, fixed)
+    if solution_found != 1:
+        return None, None, None
+    counted_devices = set(dev for dev in placement if resource_opt != "enabled" or enabled[dev][0] == 0)
+    return placement, graph.calculate_latency(placement, 1, infrastructure), len(counted_devices)
+
+
+# Function that adds to the QP model one latency constraint for each path of the DAG
+def add_path_latency_constraints(model, graph, placement, latency, infrastructure):
+    cpu_capacity, com_cost, bandwidth, user_dev_cost, user_dev_bandwidth = infrastructure.lists()
+    cpu_req, ram_req, input_rate, output_rate = graph.lists()
+    # For each path
+    for path in graph.get_paths():
+        path_latency = 0
+        for node in path:
+            c = 0
+            # Execution time
+            for dev in range(infrastructure.number_of_edge_devices):
+                c += placement[node][dev] * cpu_req[node] / cpu_capacity[dev]
+            path_latency += c
+
+            # Transfer time from its parent node
+            for parent in graph.parents(node):
+                if parent in path:
+                    c = 0
+                    for dev1, dev2 in list(itertools.product(range(infrastructure.number_of_edge_devices),
+                                                             range(infrastructure.number_of_edge_devices))):
+                        c += ((output_rate[parent] * com_cost[dev1][dev2] *
+                               placement[node][dev1] * placement[parent][dev2]) / bandwidth[dev1][dev2])
+                    path_latency += c
+
+            # Transfer time from user if the node is a source
+            if node == graph.source:
+                c = 0
+                for dev in range(infrastructure.number_of_edge_devices):
+                    c += ((input_rate[node] * placement[node][dev] *
+                           user_dev_cost[graph.mobile_device_id][dev]) /
+                          user_dev_bandwidth[graph.mobile_device_id][dev])
+                path_latency += c
+
+            # Transfer time to the user if the node is a sink
+            if node == graph.sink:
+                c = 0
+                for dev in range(infrastructure.number_of_edge_devices):
+                    c += ((output_rate[node] * placement[node][dev] *
+                           user_dev_cost[graph.mobile_device_id][dev]) /
+                          user_dev_bandwidth[graph.mobile_device_id][dev])
+                path_latency += c
+
+        model.addConstr(latency >= path_latency)  # Minimize the slowest path of the DAG
+
+
+# Function that adds to the QP model the arrival time of each node, with one constraint for each edge of the DAG
+def add_arrival_latency_constraints(model, graph, placement, latency, infrastructure):
+    gp, GRB = import_gurobi()
+    cpu_capacity, com_cost, bandwidth, user_dev_cost, user_dev_bandwidth = infrastructure.lists()
+    cpu_req, ram_req, input_rate, output_rate = graph.lists()
+    arrival = model.addVars(list(range(graph.number_of_nodes)), lb=0, vtype=GRB.CONTINUOUS, name="arrival")
+    for node in graph.order:
+        # Execution time
+        execution = 0
+        for dev in range(infrastructure.number_of_edge_devices):
+            execution += placement[node][dev] * cpu_req[node] / cpu_capacity[dev]
+
+        # Transfer time from user if the node is a source
+        if node == graph.source:
+            c = 0
+            for dev in range(infrastructure.number_of_edge_devices):
+                c += ((input_rate[node] * placement[node][dev] *
+                       user_dev_cost[graph.mobile_device_id][dev]) /
+                      user_dev_bandwidth[graph.mobile_device_id][dev])
+            model.addConstr(arrival[node] >= execution + c)
+
+        # Transfer time from each parent node
+        for parent in graph.parents(node):
+            c = 0
+            for dev1, dev2 in list(itertools.product(range(infrastructure.number_of_edge_devices),
+                                                     range(infrastructure.number_of_edge_devices))):
+                c += ((output_rate[parent] * com_cost[dev1][dev2] *
+                       placement[node][dev1] * placement[parent][dev2]) / bandwidth[dev1][dev2])
+            model.addConstr(arrival[node] >= arrival[parent] + execution + c)
+
+        # Transfer time to the user if the node is a sink
+        if node == graph.sink:
+            c = 0
+            for dev in range(infrastructure.number_of_edge_devices):
+                c += ((output_rate[node] * placement[node][dev] *
+                       user_dev_cost[graph.mobile_device_id][dev]) /
+                      user_dev_bandwidth[graph.mobile_device_id][dev])
+            model.addConstr(latency >= arrival[node] + c)  # Minimize the slowest path of the DAG
+
+
+# Quadratic Programming algorithm to assign tasks to devices. The latency of the DAG is either bounded by
+# each of its paths or found from the arrival time of each node ("paths" or "arrival" formulation).
+# With warm_start the placement of the fast DP algorithm is the starting point of the solver and its latency
+# is the objective cutoff, on the iterations where it does not use more than max_devices devices.
+# Only the Gurobi backend solves the quadratic model, the MILP algorithm solves its linearized version with the
+# other backends. The nodes in fixed (node: device) are placed on their device, where their operator already runs.
+# time_limit, mip_gap and report are the same as in the MILP algorithm
+def QP_placement(graph, enabled_init, resource_opt, devices_to_remove, formulation="paths", timings=None,
+                 warm_start=False, backend="gurobi", infrastructure=None, fixed=None, time_limit=None, mip_gap=None,
+                 report=None):
+    if backend != "gurobi":
+        raise ValueError("The QP algorithm needs the gurobi backend, use the MILP algorithm with the " + str(backend) +
+                         " backend")
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    infrastructure = variables.get_infrastructure(infrastructure)
+    gp, GRB = import_gurobi()
+    fixed = find_fixed_nodes(fixed, devices_to_remove)
+    cpu_load, ram_load = find_node_load(graph, fixed)
+    enabled = copy_enabled(enabled_init)
     latency = F = RC = 100000
+    solved = -1
     node_placement = []
     for node in range(graph.number_of_nodes):
         node_placement.append(-1)
     current_used = sum(
-        enabled[i][0] for i in range(variables.number_of_edge_devices))  # Number of already enabled devices
+        enabled[i][0] for i in range(infrastructure.number_of_edge_devices))  # Number of already enabled devices
 
     # print(resource_opt)
     start = 1 if current_used == 0 or resource_opt == "min" else 0
     if (resource_opt == "min"):
-        end = variables.number_of_edge_devices
+        end = infrastructure.number_of_edge_devices
     else:
-        end = variables.number_of_edge_devices - current_used + 1
+        end = infrastructure.number_of_edge_devices - current_used + 1
     # for max_devices in range(start, end):
     #    print(max_devices)
-    for max_devices in range(start, end):
-        temp_placement = []
-        for node in range(graph.number_of_nodes):
-            temp_placement.append(-1)
+    # The model is built once and only the bound on the number of used devices changes between the iterations
+    build_start = time.perf_counter()
+    max_devices_constraint = None
+    model = gp.Model("qp")
+    model.Params.OutputFlag = 0
+    model.Params.Threads = variables.solver_threads
+    latency = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name="latency")  # The objective
+    placement_list = list(range(infrastructure.number_of_edge_devices))
+    placement = dict()
+    for i in range(graph.number_of_nodes):  # For each node
+        placement[i] = model.addVars(placement_list, lb=0, ub=1, vtype=GRB.INTEGER, name="x")
 
-        model = gp.Model("qp")
-        model.Params.OutputFlag = 0
-        latency = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name="latency")  # The objective
-        placement_list = list(range(variables.number_of_edge_devices))
-        placement = dict()
-        for i in range(graph.number_of_nodes):  # For each node
-            placement[i] = model.addVars(placement_list, lb=0, ub=1, vtype=GRB.INTEGER, name="x")
+    for node in range(graph.number_of_nodes):
+        c1 = 0
+        for dev in range(infrastructure.number_of_edge_devices):
+            c1 += placement[node][dev]
+        model.addConstr(c1 == 1)  # Assign each node to exactly one device
+        if node in fixed:
+            model.addConstr(placement[node][fixed[node]] == 1)
+            continue
+        for dev in devices_to_remove:
+            model.addConstr(placement[node][dev] == 0)
+    if resource_opt != "lat":
+        total_used = 0
+        used_list = list(range(infrastructure.number_of_edge_devices))
+        used = model.addVars(used_list, lb=0, ub=1, vtype=GRB.INTEGER,
+                             name="used")  # 1 if the device takes on tasks, 0 otherwise
+        for dev in range(infrastructure.number_of_edge_devices):
+            if enabled[dev][0] == 0 or resource_opt != "enabled":  # If the device is not already enabled
+                c1 = 0
+                for node in range(graph.number_of_nodes):
+                    c1 += placement[node][dev]
+                # These constraints set 'used' equal to 1 if the device takes on tasks or equal to 0 if it does not
+                model.addConstr(used[dev] >= c1 / 100)
+                model.addConstr(used[dev] <= c1 / 100 + 0.99)
+            total_used += used[dev]
+        # Bound the maximum amount of devices that will be used, the bound is updated on each iteration
+        max_devices_constraint = model.addConstr(total_used <= start)
 
+    # Set CPU, RAM constraints
+    for dev in range(infrastructure.number_of_edge_devices):
+        c2 = 0
+        c3 = 0
         for node in range(graph.number_of_nodes):
-            c1 = 0
-            for dev in range(variables.number_of_edge_devices):
-                c1 += placement[node][dev]
-            model.addConstr(c1 == 1)  # Assign each node to exactly one device
-            for dev in devices_to_remove:
-                model.addConstr(placement[node][dev] == 0)
-        if resource_opt != "lat":
-            total_used = 0
-            used_list = list(range(variables.number_of_edge_devices))
-            used = model.addVars(used_list, lb=0, ub=1, vtype=GRB.INTEGER,
-                                 name="used")  # 1 if the device takes on tasks, 0 otherwise
-            for dev in range(variables.number_of_edge_devices):
-                if enabled[dev][0] == 0 or resource_opt != "enabled":  # If the device is not already enabled
-                    c1 = 0
-                    for node in range(graph.number_of_nodes):
-                        c1 += placement[node][dev]
-                    # These constraints set 'used' equal to 1 if the device takes on tasks or equal to 0 if it does not
-                    model.addConstr(used[dev] >= c1 / 100)
-                    model.addConstr(used[dev] <= c1 / 100 + 0.99)
-                total_used += used[dev]
-            model.addConstr(total_used <= max_devices)  # Bound the maximum amount of devices that will be used
-
-        # Set CPU, RAM constraints
-        for dev in range(variables.number_of_edge_devices):
-            c2 = 0
-            c3 = 0
-            for node in range(graph.number_of_nodes):
-                c2 += placement[node][dev] * graph.tasks[node].cpu_req
-                c3 += placement[node][dev] * graph.tasks[node].ram_req
-            model.addConstr(c2 <= enabled[dev][1])
-            model.addConstr(c3 <= enabled[dev][2])
-
-        # For each path
-        for path in graph.paths:
-            path_latency = 0
-            for node in path:
-                c = 0
-                # Execution time
-                for dev in range(variables.number_of_edge_devices):
-                    c += placement[node][dev] * graph.tasks[node].cpu_req / variables.cpu_capacity[dev]
-                path_latency += c
+            c2 += placement[node][dev] * cpu_load[node]
+            c3 += placement[node][dev] * ram_load[node]
+        model.addConstr(c2 <= enabled[dev][1])
+        model.addConstr(c3 <= enabled[dev][2])
 
-                # Transfer time from its parent node
-                for parent in graph.tasks[node].parents:
-                    if parent in path:
-                        c = 0
-                        for dev1, dev2 in list(itertools.product(range(variables.number_of_edge_devices),
-                                                                 range(variables.number_of_edge_devices))):
-                            c += ((graph.tasks[parent].output_rate * variables.com_cost[dev1][dev2] *
-                                   placement[node][dev1] * placement[parent][dev2]) / variables.bandwidth[dev1][dev2])
-                        path_latency += c
-
-                # Transfer time from user if the node is a source
-                if node == graph.source:
-                    c = 0
-                    for dev in range(variables.number_of_edge_devices):
-                        c += ((graph.tasks[node].input_rate * placement[node][dev] *
-                               variables.user_dev_cost[graph.mobile_device_id][dev]) /
-                              variables.user_dev_bandwidth[graph.mobile_device_id][dev])
-                    path_latency += c
+    # Latency of the slowest path of the DAG
+    if formulation == "arrival":
+        add_arrival_latency_constraints(model, graph, placement, latency, infrastructure)
+    else:
+        add_path_latency_constraints(model, graph, placement, latency, infrastructure)
 
-                # Transfer time to the user if the node is a sink
-                if node == graph.sink:
-                    c = 0
-                    for dev in range(variables.number_of_edge_devices):
-                        c += ((graph.tasks[node].output_rate * placement[node][dev] *
-                               variables.user_dev_cost[graph.mobile_device_id][dev]) /
-                              variables.user_dev_bandwidth[graph.mobile_device_id][dev])
-                    path_latency += c
+    model.setObjective(latency, GRB.MINIMIZE)
+    model.update()
+    if timings is not None:  # Time spent to build and to solve the model
+        timings["build"] = timings.get("build", 0) + time.perf_counter() - build_start
 
-            model.addConstr(latency >= path_latency)  # Minimize the slowest path of the DAG
+    warm_placement = None
+    if warm_start:
+        heuristic_start = time.perf_counter()
+        warm_placement, warm_latency, warm_used = find_warm_start(graph, enabled, resource_opt, devices_to_remove,
+                                                                  infrastructure, fixed)
+        if timings is not None:
+            timings["heuristic"] = timings.get("heuristic", 0) + time.perf_counter() - heuristic_start
 
-        model.setObjective(latency, GRB.MINIMIZE)
+    for max_devices in range(start, end):
+        temp_placement = []
+        for node in range(graph.number_of_nodes):
+            temp_placement.append(-1)
+        if max_devices_constraint is not None:
+            max_devices_constraint.RHS = max_devices
+        use_warm_start = warm_placement is not None and (resource_opt == "lat" or warm_used <= max_devices)
+        if use_warm_start:  # Start from the DP placement and discard solutions slower than it
+            for node in range(graph.number_of_nodes):
+                for dev in range(infrastructure.number_of_edge_devices):
+                    placement[node][dev].Start = 1 if warm_placement[node] == dev else 0
+            model.Params.Cutoff = warm_latency * (1 + 1e-6) + 1e-6
+        else:
+            # The loop only goes on after an iteration without a solution, so there is none to start from
+            model.Params.Cutoff = GRB.INFINITY
+
+        solve_start = time.perf_counter()
+        model.Params.TimeLimit = GRB.INFINITY if deadline is None else max(deadline - solve_start, 0)
+        model.Params.MIPGap = 1e-4 if mip_gap is None else mip_gap
         model.optimize()  # Solve QP
-        if model.STATUS != GRB.OPTIMAL:  # If a solution was not found
+        if timings is not None:
+            timings["solve"] = timings.get("solve", 0) + time.perf_counter() - solve_start
+        # A solution was found if the solver finished, or stopped at the time limit with a solution
+        found = model.STATUS == GRB.OPTIMAL or (model.STATUS == GRB.TIME_LIMIT and model.SolCount > 0)
+        # Nothing is faster than the DP placement if the solver stopped at the cutoff, and nothing faster
+        # was found in time if it stopped at the time limit
+        keep_warm_start = warm_placement is not None and (model.STATUS == GRB.TIME_LIMIT or (
+                use_warm_start and model.STATUS == GRB.CUTOFF))
+        if not found and not keep_warm_start:
+            # If a solution was not found
             solved = -1
-            if resource_opt == "lat":
+            if resource_opt == "lat" or model.STATUS == GRB.TIME_LIMIT:
                 break
         else:  # If a solution was found
             solved = 1
             # model.write("solution.sol")
             for node in range(graph.number_of_nodes):
-                for dev in range(variables.number_of_edge_devices):
-                    if round(placement[node][dev].x) == 1:
+                for dev in range(infrastructure.number_of_edge_devices):
+                    if round(placement[node][dev].x) == 1 if found else warm_placement[node] == dev:
                         temp_placement[node] = dev
-                        enabled[dev][0] = 1
-                        enabled[dev][1] = round(enabled[dev][1] - graph.tasks[node].cpu_req, 2)
-                        enabled[dev][2] = round(enabled[dev][2] - graph.tasks[node].ram_req, 2)
-                        enabled[dev][3] += 1
-            latency_temp, F_temp, RC_temp = graph.calculate_objective_local(temp_placement, 1)
+            if found:
+                gap = model.MIPGap
+            elif model.STATUS == GRB.CUTOFF:
+                gap = 0
+            else:
+                try:  # The lower bound on the latency, if the solver found one
+                    bound = model.ObjBound
+                except gp.GurobiError:
+                    bound = None
+                gap = find_warm_start_gap(warm_latency, bound, use_warm_start)
+            report_solution(report, "DP" if temp_placement == list(warm_placement or []) else "QP", gap)
+            take_resources(enabled, temp_placement, cpu_load, ram_load, fixed)
+            latency_temp, F_temp, RC_temp = graph.calculate_objective_local(temp_placement, 1, infrastructure)
 
             F = F_temp
             latency = latency_temp
             RC = RC_temp
-            node_placement = copy.deepcopy(temp_placement)
+            node_placement = temp_placement
             break
     return solved, latency, F, RC, node_placement, enabled
+
+
+# Linearized (MILP) version of the QP algorithm. The model is built once in matrix form
+# and only the bound on the number of used devices changes between the iterations.
+# The warm_start and fixed options are the same as in the QP algorithm and backend is the name of the solver backend.
+# With time_limit the solver stops time_limit seconds after the call, with mip_gap once its solution is within
+# that relative gap of the optimal one, and the best placement found by then is returned (see report_solution)
+def MILP_placement(graph, enabled_init, resource_opt, devices_to_remove, timings=None, warm_start=False,
+                   backend="gurobi", infrastructure=None, fixed=None, time_limit=None, mip_gap=None, report=None):
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    infrastructure = variables.get_infrastructure(infrastructure)
+    fixed = find_fixed_nodes(fixed, devices_to_remove)
+    cpu_load, ram_load = find_node_load(graph, fixed)
+    enabled = copy_enabled(enabled_init)
+    latency = F = RC = 100000
+    solved = -1
+    node_placement = [-1] * graph.number_of_nodes
+    current_used = sum(
+        enabled[i][0] for i in range(infrastructure.number_of_edge_devices))  # Number of already enabled devices
+    start = 1 if current_used == 0 or resource_opt == "min" else 0
+    if resource_opt == "min":
+        end = infrastructure.number_of_edge_devices
+    else:
+        end = infrastructure.number_of_edge_devices - current_used + 1
+
+    # The DP placement is found first, so that there is a placement to return if the time runs out
+    warm_placement = None
+    if warm_start:
+        heuristic_start = time.perf_counter()
+        warm_placement, warm_latency, warm_used = find_warm_start(graph, enabled, resource_opt, devices_to_remove,
+                                                                  infrastructure, fixed)
+        if timings is not None:
+            timings["heuristic"] = timings.get("heuristic", 0) + time.perf_counter() - heuristic_start
+    out_of_time = warm_placement is not None and deadline is not None and time.perf_counter() >= deadline
+    if not out_of_time:
+        build_start = time.perf_counter()
+        milp = build_milp_model(graph, enabled, resource_opt, devices_to_remove, infrastructure, fixed)
+        solver = get_backend(backend)
+        solver.load(milp)
+        if timings is not None:
+            timings["build"] = timings.get("build", 0) + time.perf_counter() - build_start
+        # Building the model can also take longer than the time left
+        out_of_time = warm_placement is not None and deadline is not None and time.perf_counter() >= deadline
+
+    method = gap = None
+    for max_devices in range(start, end) if not out_of_time else []:
+        if milp.max_devices_row is not None:
+            # Bound the maximum amount of devices that will be used
+            solver.set_row_upper(milp.max_devices_row, max_devices)
+        use_warm_start = warm_placement is not None and (resource_opt == "lat" or warm_used <= max_devices)
+        if use_warm_start:  # Start from the DP placement and discard solutions slower than it
+            start_values = np.full(milp.number_of_variables, np.nan)
+            start_values[milp.x.ravel()] = 0
+            start_values[milp.x[np.arange(graph.number_of_nodes), warm_placement]] = 1
+            if solver.supports_start:  # Otherwise only the cutoff is used
+                solver.set_start(start_values)
+            solver.set_cutoff(warm_latency * (1 + 1e-6) + 1e-6)
+        else:
+            # The loop only goes on after an iteration without a solution, so there is none to start from
+            solver.set_cutoff(None)
+        solve_start = time.perf_counter()
+        status = solver.solve(None if deadline is None else deadline - solve_start, mip_gap)  # Solve MILP
+        if timings is not None:
+            timings["solve"] = timings.get("solve", 0) + time.perf_counter() - solve_start
+        if status == "optimal" or (status == "time_limit" and solver.values is not None):
+            # If a solution was found, which is within mip_gap of the optimal one or the best one found in time
+            node_placement = [int(dev) for dev in np.round(solver.values[milp.x]).argmax(axis=1)]
+            method = "MILP"
+            gap = solver.gap
+        elif warm_placement is not None and (status == "time_limit" or (use_warm_start and status == "cutoff")):
+            # Nothing is faster than the DP placement if the solver stopped at the cutoff, and nothing faster
+            # was found in time if it stopped at the time limit
+            node_placement = list(warm_placement)
+            method = "DP"
+            gap = 0 if status == "cutoff" else find_warm_start_gap(warm_latency, solver.bound, use_warm_start)
+        else:  # If a solution was not found
+            solved = -1
+            if resource_opt == "lat" or status == "time_limit":
+                break
+            continue
+        break
+    if out_of_time:  # The time ran out before the solver started, the gap of the DP placement is unknown
+        node_placement = list(warm_placement)
+        method = "DP"
+    if method is not None:
+        solved = 1
+        if method == "MILP" and node_placement == list(warm_placement or []):
+            method = "DP"  # The solver kept the DP placement
+        take_resources(enabled, node_placement, cpu_load, ram_load, fixed)
+        latency, F, RC = graph.calculate_objective_local(node_placement, 1, infrastructure)
+        report_solution(report, method, gap)
+    return solved, latency, F, RC, node_placement, enabled
+
+
+# Function that finds the optimality gap of the DP placement when the solver stopped at the time limit without
+# finding a faster one, from the lower bound that the solver found on the latency. The bound is only valid for
+# the DP placement if the solver started from it (use_warm_start), otherwise the gap is unknown (None)
+def find_warm_start_gap(warm_latency, bound, use_warm_start):
+    if not use_warm_start or bound is None or not np.isfinite(bound) or warm_latency <= 0:
+        return None
+    return max(warm_latency - bound, 0) / warm_latency
+
+
+# Function that adds to report (if one is given) the method that found the placement ("DP" or the solver)
+# and its optimality gap, the relative difference of its latency from the lower bound of the solver
+# (None if it is unknown)
+def report_solution(report, method, gap):
+    if report is not None:
+        report["method"] = method
+        report["gap"] = None if gap is None or not np.isfinite(gap) else float(gap)
+
+
+# Anytime placement: the placement of the fast DP algorithm is found first and the MILP solver improves on it
+# until deadline seconds have passed since the call or its solution is within mip_gap of the optimal one.
+# The method that found the placement ("DP" or "MILP") and its optimality gap are added to report
+def anytime_placement(graph, enabled_init, resource_opt, devices_to_remove, deadline=1.0, mip_gap=0.01,
+                      backend="gurobi", infrastructure=None, fixed=None, report=None):
+    return MILP_placement(graph, enabled_init, resource_opt, devices_to_remove, warm_start=True, backend=backend,
+                          infrastructure=infrastructure, fixed=fixed, time_limit=deadline, mip_gap=mip_gap,
+                          report=report)
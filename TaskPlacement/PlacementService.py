@@ -0,0 +1,261 @@
+# -------------------------------------------#
+# Description: Service that keeps a setting
+#   in memory and places the DAGs that are
+#   submitted to it as they arrive
+# -------------------------------------------#
+
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+import DAG
+import variables
+from Main import find_placement, calculate_objective_global
+from PlacementFunctions import copy_enabled
+
+
+# This class places the DAGs that arrive at a setting and removes the DAGs that depart from it. The placements
+# are found on a pool of workers, from a copy of the free resources, and applied on the event loop, which is the
+# only one that changes the setting. If another DAG took the resources that a placement needs in the meantime,
+# the DAG is placed again, up to retries times. Only the DAGs that are placed or being placed are kept in the
+# setting. The requests and the responses are JSON objects, one per line:
+#   {"op": "submit", "mobile_device_id", "user_rate", "task_types", "edges"[, "source", "sink"]}: place a DAG
+#       whose nodes are numbered in topological order, whose edges are [parent, child] pairs and whose nodes
+#       are all on a path from the source to the sink
+#   {"op": "cancel", "graph_id"}: remove a DAG
+#   {"op": "stats"}: the global objectives of the setting and the statistics of its placement cache, if any
+# An "id" given with a request is returned with its response
+class PlacementService:
+    def __init__(self, setting, algorithm="DP_DAG", opt_type="lat", backend="gurobi", workers=4, retries=3,
+                 executor=None):
+        self.setting = setting
+        self.algorithm = algorithm
+        self.opt_type = opt_type
+        self.backend = backend  # Solver backend of the solver algorithms
+        self.retries = retries
+        self.executor = executor if executor is not None else ThreadPoolExecutor(workers)
+        self.pending = set()  # DAGs that are being placed
+        self.cancelled = set()  # DAGs that departed while they were being placed
+        self.placed = {}  # The placed DAGs, by graph_id
+        self.next_graph_id = 0
+
+    # Create the DAG of a submit request
+    def create_graph(self, request):
+        task_types = list(request["task_types"])
+        for task_type in task_types:
+            if task_type not in DAG.type_of_task:
+                raise ValueError("unknown task type " + str(task_type))
+        number_of_operators = len(task_types)
+        mobile_device_id = int(request["mobile_device_id"])
+        if not 0 <= mobile_device_id < self.setting.infrastructure.number_of_user_devices:
+            raise ValueError("unknown user device " + str(mobile_device_id))
+        edges = [(int(parent), int(child)) for parent, child in request.get("edges", [])]
+        for parent, child in edges:
+            if not 0 <= parent < child < number_of_operators:
+                raise ValueError("edges must go from a node to a later node")
+        source = int(request.get("source", 0))
+        sink = int(request.get("sink", number_of_operators - 1))
+        if not (0 <= source < number_of_operators and 0 <= sink < number_of_operators):
+            raise ValueError("the source and the sink must be nodes of the DAG")
+        # Every node must receive data from the source and send data to the sink
+        from_source = {source}
+        for parent, child in sorted(edges):
+            if parent in from_source:
+                from_source.add(child)
+        to_sink = {sink}
+        for parent, child in sorted(edges, reverse=True):
+            if child in to_sink:
+                to_sink.add(parent)
+        if len(from_source & to_sink) != number_of_operators:
+            raise ValueError("every node must be on a path from the source to the sink")
+        graph_id = self.next_graph_id
+        self.next_graph_id += 1
+        return DAG.create_graph(mobile_device_id, graph_id, number_of_operators, edges, source, sink,
+                                float(request["user_rate"]), task_types)
+
+    # Place a DAG that arrived and return the response, with the time spent on the algorithm (solve_time), waiting
+    # for a worker or for the event loop (wait_time) and in total (service_time)
+    async def submit(self, graph):
+        arrival = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        self.setting.add_graph(graph)
+        self.pending.add(graph.graph_id)
+        attempts = 0
+        total_solve_time = 0
+        try:
+            while True:
+                attempts += 1
+                enabled = copy_enabled(self.setting.enabled)
+                fixed = self.setting.find_shared_operators(graph)
+                candidates = self.setting.find_candidates(graph, self.opt_type, [], fixed)
+                report = {}
+                placement, latency, F, RC, selectivity, solve_time, ratios = await loop.run_in_executor(
+                    self.executor, find_placement, self.algorithm, self.opt_type, graph, enabled,
+                    self.setting.infrastructure, [], fixed, False, self.backend, self.setting.placement_cache, report,
+                    candidates)
+                total_solve_time += solve_time
+                if graph.graph_id in self.cancelled:
+                    status = "cancelled"
+                elif placement is None:
+                    status = "not placed"
+                elif self.setting.check_resources(graph, placement):
+                    self.setting.apply_placement(graph, placement, latency, F, RC, selectivity, ratios)
+                    self.placed[graph.graph_id] = graph
+                    status = "placed"
+                elif attempts <= self.retries:  # The resources were taken while the placement was found
+                    continue
+                else:
+                    status = "not placed"
+                break
+        finally:  # Also if finding the placement failed
+            self.pending.discard(graph.graph_id)
+            self.cancelled.discard(graph.graph_id)
+            if not graph.placed:
+                self.setting.remove_graph(graph)
+        service_time = time.perf_counter() - arrival
+        response = {"graph_id": graph.graph_id, "status": status, "attempts": attempts,
+                    "solve_time": total_solve_time, "wait_time": service_time - total_solve_time,
+                    "service_time": service_time}
+        if status == "placed":
+            response.update({"placement": [int(dev) for dev in placement], "latency": float(latency),
+                             "F": float(F), "RC": float(RC), "selectivity": float(selectivity)})
+            response.update(report)  # The method and the optimality gap of the solver algorithms
+        return response
+
+    # Remove a DAG that departed. It returns False if the DAG is neither placed nor being placed
+    def cancel(self, graph_id):
+        if graph_id in self.pending:
+            self.cancelled.add(graph_id)
+            return True
+        graph = self.placed.pop(graph_id, None)
+        if graph is not None:
+            self.setting.revert_placement(graph)
+            self.setting.remove_graph(graph)
+            return True
+        return False
+
+    # Function that returns the global objectives of the setting
+    def stats(self):
+        objectives = calculate_objective_global(self.setting)
+        response = {"placed_dags": self.setting.number_of_placed_dags,
+                    "enabled_devices": self.setting.number_of_enabled_devices, "pending_dags": len(self.pending)}
+        if objectives != -1:
+            response.update(zip(["F", "RC", "latency", "selectivity"], [float(value) for value in objectives]))
+        if self.setting.placement_cache is not None:
+            response["cache"] = self.setting.placement_cache.stats()
+        return response
+
+    # Answer a request, the submit requests are answered once their DAG is placed. Any error is returned to the
+    # client as the response, so that the connection keeps being served
+    async def answer(self, request):
+        try:
+            if request.get("op") == "submit":
+                response = await self.submit(self.create_graph(request))
+            elif request.get("op") == "cancel":
+                response = {"graph_id": request["graph_id"], "cancelled": self.cancel(int(request["graph_id"]))}
+            elif request.get("op") == "stats":
+                response = self.stats()
+            else:
+                raise ValueError("unknown op " + str(request.get("op")))
+        except Exception as error:
+            response = {"error": repr(error)}
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    # Read the requests of a connection, one per line. The requests of a connection are answered concurrently,
+    # apart from cancel and stats, which are answered in the order they arrive
+    async def handle_connection(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def send(response):
+            async with lock:
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+
+        async def respond(request):
+            await send(await self.answer(request))
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("a request must be a JSON object")
+            except ValueError as error:
+                await send({"error": repr(error)})
+                continue
+            if request.get("op") == "submit":
+                task = asyncio.create_task(respond(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            else:
+                await respond(request)
+        await asyncio.gather(*tasks)
+        writer.close()
+
+    # Start serving on a local TCP socket (port 0 selects a free port) and return the asyncio server
+    async def start(self, host="127.0.0.1", port=8765):
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+# Function that creates the submit request of a DAG
+def graph_to_request(graph):
+    edges = [[parent, node] for node in range(graph.number_of_nodes) for parent in graph.parents(node)]
+    return {"op": "submit", "mobile_device_id": graph.mobile_device_id,
+            "user_rate": float(graph.input_rate[graph.source]), "task_types": list(graph.task_types),
+            "edges": edges, "source": graph.source, "sink": graph.sink}
+
+
+# Stand-in workload for the service. Each client opens a connection and submits DAGs of random type, size and
+# rate, as variables.create_graphs does, one at a time. A client keeps at most active_dags DAGs placed: when it
+# has more, the oldest one departs. It returns the responses to the submit requests and the time they took
+async def run_workload(host, port, number_of_requests=1000, clients=8, active_dags=10, user_devices=2, seed=0):
+    random.seed(seed)
+    builders = {"S": DAG.create_seq_dag, "D": DAG.create_diamond_dag, "R": DAG.create_replicated_dag}
+    requests = []
+    for request in range(number_of_requests):
+        graph = builders[random.choice(sorted(builders))](random.randrange(user_devices), request,
+                                                          random.randint(1, 3), random.randint(1, 10))
+        requests.append(graph_to_request(graph))
+    responses = []
+
+    async def client(client_requests):
+        reader, writer = await asyncio.open_connection(host, port)
+        placed = []
+        for request in client_requests:
+            writer.write((json.dumps(request) + "\n").encode())
+            start = time.perf_counter()
+            response = json.loads(await reader.readline())
+            response["round_trip_time"] = time.perf_counter() - start
+            responses.append(response)
+            if response.get("status") == "placed":
+                placed.append(response["graph_id"])
+            if len(placed) > active_dags:  # The oldest DAG departs
+                writer.write((json.dumps({"op": "cancel", "graph_id": placed.pop(0)}) + "\n").encode())
+                await reader.readline()
+        writer.close()
+        await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client(requests[index::clients]) for index in range(clients)])
+    return responses, time.perf_counter() - start
+
+
+# Run the service on the setting of variables.init until it is stopped
+async def serve(host="127.0.0.1", port=8765, algorithm="DP_DAG", opt_type="lat", backend="gurobi", workers=4,
+                share_operators=False, cache_size=1024):
+    variables.init()
+    service = PlacementService(variables.set_alg_setting([], share_operators=share_operators, cache_size=cache_size),
+                               algorithm, opt_type, backend, workers)
+    server = await service.start(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
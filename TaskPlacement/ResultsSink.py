@@ -0,0 +1,77 @@
+# -------------------------------------------#
+# Description: Collects the results of the
+#   experiments and stores them in a SQLite
+#   database in batches
+# -------------------------------------------#
+
+import sqlite3
+
+# Columns of the tables. The objectives of DAGs that could not be placed are stored as NULL
+placement_columns = ["experiment", "iteration", "algorithm", "mode", "graph_id", "latency", "F", "RC",
+                     "selectivity", "solve_time"]
+global_columns = ["experiment", "iteration", "algorithm", "mode", "graph_id", "F", "RC", "latency", "selectivity"]
+
+
+# This class buffers the results of an experiment in memory and writes them to the database in batches.
+# Each ResultsSink is a new experiment in the database, numbered by the experiment column:
+#   experiments: one row for each experiment, whose number is given by SQLite when the sink is created
+#   placements: the objectives of each DAG when it is placed
+#   global_objectives: the global objectives of a setting after each of its DAGs is placed
+class ResultsSink:
+    def __init__(self, path="results.db", batch_size=1000):
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(path)
+        # The sinks that are created at the same time wait for each other here, so each gets its own number
+        self.connection.execute("BEGIN IMMEDIATE")
+        new = self.connection.execute("SELECT name FROM sqlite_master WHERE name = 'experiments'").fetchone() is None
+        self.connection.execute("CREATE TABLE IF NOT EXISTS experiments (experiment INTEGER PRIMARY KEY "
+                                "AUTOINCREMENT, started TEXT)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS placements (experiment INTEGER, iteration INTEGER, "
+                                "algorithm TEXT, mode TEXT, graph_id INTEGER, latency REAL, F REAL, RC REAL, "
+                                "selectivity REAL, solve_time REAL)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS global_objectives (experiment INTEGER, "
+                                "iteration INTEGER, algorithm TEXT, mode TEXT, graph_id INTEGER, F REAL, RC REAL, "
+                                "latency REAL, selectivity REAL)")
+        if new:  # The experiments of a database written before the experiments table keep their numbers
+            self.connection.execute("INSERT OR IGNORE INTO experiments (experiment) "
+                                    "SELECT DISTINCT experiment FROM placements")
+        self.experiment = self.connection.execute("INSERT INTO experiments (started) "
+                                                  "VALUES (datetime('now'))").lastrowid
+        self.connection.commit()
+        self.placements = []
+        self.global_objectives = []
+
+    # Add the objectives of a DAG (-1 if it was not placed) and the time the algorithm took to place it
+    def add_placement(self, iteration, algorithm, mode, graph_id, latency, F, RC, selectivity, solve_time):
+        objectives = [None if latency == -1 else float(value) for value in [latency, F, RC, selectivity]]
+        self.placements.append((self.experiment, iteration, algorithm, mode, int(graph_id), *objectives,
+                                float(solve_time)))
+        if len(self.placements) >= self.batch_size:
+            self.flush()
+
+    # Add the global objectives (F, RC, latency, selectivity) of a setting, as calculate_objective_global
+    # returns them (-1 if no DAG is placed), after the DAG graph_id is placed
+    def add_global(self, iteration, algorithm, mode, graph_id, objectives):
+        objectives = [None] * 4 if objectives == -1 else [float(value) for value in objectives]
+        self.global_objectives.append((self.experiment, iteration, algorithm, mode, int(graph_id), *objectives))
+        if len(self.global_objectives) >= self.batch_size:
+            self.flush()
+
+    # Write the buffered results to the database in one transaction
+    def flush(self):
+        with self.connection:
+            self.connection.executemany("INSERT INTO placements VALUES (" + ", ".join(["?"] * len(
+                placement_columns)) + ")", self.placements)
+            self.connection.executemany("INSERT INTO global_objectives VALUES (" + ", ".join(["?"] * len(
+                global_columns)) + ")", self.global_objectives)
+        self.placements = []
+        self.global_objectives = []
+
+    # Run a query on the results, after writing the buffered ones
+    def query(self, sql, parameters=()):
+        self.flush()
+        return self.connection.execute(sql, parameters).fetchall()
+
+    def close(self):
+        self.flush()
+        self.connection.close()
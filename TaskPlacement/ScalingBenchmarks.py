@@ -0,0 +1,201 @@
+# -------------------------------------------#
+# Description: Benchmark suite that measures
+#   how the placement algorithms scale and
+#   compares the results against a baseline
+# -------------------------------------------#
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+import DAG
+import variables
+from MILPModel import build_milp_model
+from Main import place_graph, calculate_objective_global
+
+# The algorithms and the resource optimizations of the suite. The solver algorithms only run on the
+# infrastructures with up to solver_max_devices devices, where their models stay small
+algorithms = ["DP", "DP_NP", "DP_DAG", "QP", "QP_ARR", "MILP", "ANYTIME"]
+solver_algorithms = {"QP", "QP_ARR", "MILP", "ANYTIME"}
+modes = ["lat", "enabled", "min"]
+builders = {"S": DAG.create_seq_dag, "D": DAG.create_diamond_dag, "R": DAG.create_replicated_dag}
+
+# The values that each suite sweeps. The size of a DAG is the number_of_tasks of its DAG.create_*_dag function.
+# Each suite has two infrastructure sizes up to solver_max_devices, so that the scaling of the solver
+# algorithms is measured too
+suites = {
+    "quick": {"edge_devices": (5, 10, 50), "dags": (10,), "dag_sizes": (1, 2), "shapes": ("S", "D", "R"),
+              "solver_max_devices": 10},
+    "full": {"edge_devices": (5, 10, 50, 200), "dags": (20, 100), "dag_sizes": (1, 2, 3),
+             "shapes": ("S", "D", "R"), "solver_max_devices": 10},
+}
+
+# The fields that identify a case and the metrics that compare checks. Lower is better for all the metrics
+case_fields = ["edge_devices", "dags", "dag_size", "shape", "algorithm", "mode"]
+metric_fields = ["wall_time", "peak_memory", "model_variables", "model_constraints", "model_nonzeros", "F"]
+
+
+# Function that returns the key of a case, to match the cases of two result files
+def case_key(case):
+    return tuple(case[field] for field in case_fields)
+
+
+# Function that creates the DAGs of a case, split between the user devices of the infrastructure
+def create_workload(infrastructure, number_of_dags, dag_size, shape):
+    return [builders[shape](dag % infrastructure.number_of_user_devices, dag, dag_size, random.randint(1, 10))
+            for dag in range(number_of_dags)]
+
+
+# Function that places the DAGs one after the other on a new setting and returns the setting
+def place_workload(graphs, infrastructure, algorithm, mode):
+    setting = variables.set_alg_setting(graphs, infrastructure)
+    for graph in setting.graphs:
+        place_graph(algorithm, mode, graph, setting, [])
+    return setting
+
+
+# Function that finds the total size (variables, constraints, nonzeros) of the MILP models of the DAGs on
+# the free infrastructure, the size of the problem that the solver algorithms solve
+def find_model_size(graphs, infrastructure, mode):
+    enabled = variables.free_resources(infrastructure)
+    size = [0, 0, 0]
+    for graph in graphs:
+        model = build_milp_model(graph, enabled, mode, [], infrastructure)
+        size = [size[0] + model.number_of_variables, size[1] + model.number_of_rows, size[2] + model.A.nnz]
+    return size
+
+
+# Run one case: the best wall time over the repetitions, the peak of the memory that Python allocated (on a
+# separate run, since tracing the allocations slows the algorithms down), the size of the solver models and
+# the global objectives
+def run_case(graphs, infrastructure, algorithm, mode, repetitions=1):
+    wall_time = None
+    for repetition in range(repetitions):
+        start = time.perf_counter()
+        setting = place_workload(graphs, infrastructure, algorithm, mode)
+        elapsed = time.perf_counter() - start
+        wall_time = elapsed if wall_time is None else min(wall_time, elapsed)
+    tracemalloc.start()
+    place_workload(graphs, infrastructure, algorithm, mode)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    result = {"wall_time": wall_time, "peak_memory": peak_memory, "placed": setting.number_of_placed_dags,
+              "model_variables": None, "model_constraints": None, "model_nonzeros": None}
+    if algorithm in solver_algorithms:
+        result["model_variables"], result["model_constraints"], result["model_nonzeros"] = find_model_size(
+            graphs, infrastructure, mode)
+    objectives = calculate_objective_global(setting)
+    if objectives != -1:
+        result.update(zip(["F", "RC", "latency", "selectivity"], [float(value) for value in objectives]))
+    else:
+        result.update(dict.fromkeys(["F", "RC", "latency", "selectivity"]))
+    return result
+
+
+# Run a suite and write its results to output (a JSON file). The workload of each combination of infrastructure
+# size, DAG count, DAG size and DAG shape is created from random.seed(seed), together with the requirements of
+# the types of task (DAG.type_of_task, which are redrawn), so that every algorithm and mode places the same DAGs
+# on the same infrastructure and the results can be compared between runs. The task types are restored once
+# the DAGs are created. A case that fails (e.g. because the solver is missing) is recorded with its error and the
+# suite goes on
+def run_suite(output="baseline.json", suite="quick", seed=0, repetitions=3, selected_algorithms=None):
+    grid = suites[suite]
+    cases = []
+    solver_devices = [size for size in grid["edge_devices"] if size <= grid["solver_max_devices"]]
+    print("The solver algorithms run on the infrastructures of", *solver_devices, "devices only")
+    for edge_devices in grid["edge_devices"]:
+        for number_of_dags in grid["dags"]:
+            for dag_size in grid["dag_sizes"]:
+                for shape in grid["shapes"]:
+                    random.seed(seed)
+                    task_types = {name: list(chars) for name, chars in DAG.type_of_task.items()}
+                    DAG.type_of_task.update(DAG.create_task_types())
+                    try:
+                        infrastructure = variables.create_infrastructure(edge_devices, 2)
+                        graphs = create_workload(infrastructure, number_of_dags, dag_size, shape)
+                    finally:  # The DAGs keep the values of their tasks
+                        DAG.type_of_task.clear()
+                        DAG.type_of_task.update(task_types)
+                    for algorithm in selected_algorithms or algorithms:
+                        if algorithm in solver_algorithms and edge_devices > grid["solver_max_devices"]:
+                            continue
+                        for mode in modes:
+                            case = {"edge_devices": edge_devices, "dags": number_of_dags, "dag_size": dag_size,
+                                    "shape": shape, "algorithm": algorithm, "mode": mode}
+                            try:
+                                case.update(run_case(graphs, infrastructure, algorithm, mode, repetitions))
+                            except Exception as error:  # Record the failure and go on with the other cases
+                                case["error"] = repr(error)
+                            cases.append(case)
+                            print(*[case.get(field) for field in case_fields + ["wall_time", "placed", "F"]],
+                                  case.get("error", ""))
+    results = {"suite": suite, "seed": seed, "repetitions": repetitions, "python": platform.python_version(),
+               "numpy": np.__version__, "cases": cases}
+    with open(output, "w") as results_file:
+        json.dump(results, results_file, indent=1)
+    return results
+
+
+# Compare the results of a run against a baseline and return the regressions: the cases of the baseline that
+# are missing or failed in the run, placed fewer DAGs, or whose metrics grew by more than threshold (relative).
+# Wall times that grew by less than min_time seconds and peak memory that grew by less than min_memory bytes
+# are not flagged, since they are within the noise of the measurements
+def compare(baseline_path, current_path, threshold=0.25, min_time=0.02, min_memory=1 << 20):
+    with open(baseline_path) as baseline_file:
+        baseline = {case_key(case): case for case in json.load(baseline_file)["cases"]}
+    with open(current_path) as current_file:
+        current = {case_key(case): case for case in json.load(current_file)["cases"]}
+    minimum = {"wall_time": min_time, "peak_memory": min_memory}
+    regressions = []
+    for key, old in baseline.items():
+        if "error" in old:
+            continue
+        new = current.get(key)
+        if new is None or "error" in new:
+            regressions.append((key, "missing", None, None if new is None else new["error"]))
+            continue
+        if new["placed"] < old["placed"]:
+            regressions.append((key, "placed", old["placed"], new["placed"]))
+        for field in metric_fields:
+            if old[field] is None or new[field] is None:
+                continue
+            if new[field] > old[field] * (1 + threshold) and new[field] - old[field] > minimum.get(field, 0):
+                regressions.append((key, field, old[field], new[field]))
+    for key, field, old, new in regressions:
+        print("REGRESSION", *key, field, old, "->", new)
+    print(len(regressions), "regressions in", len(baseline), "cases")
+    return regressions
+
+
+# Command line: "run OUTPUT" runs a suite and "compare BASELINE CURRENT" compares two runs, with exit code 1
+# if there are regressions
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmarks of the placement algorithms")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run a suite and write its results to a JSON file")
+    run_parser.add_argument("output")
+    run_parser.add_argument("--suite", choices=sorted(suites), default="quick")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--repetitions", type=int, default=3)
+    run_parser.add_argument("--algorithms", nargs="+", choices=algorithms)
+    compare_parser = commands.add_parser("compare", help="compare a run against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.25)
+    compare_parser.add_argument("--min-time", type=float, default=0.02)
+    compare_parser.add_argument("--min-memory", type=int, default=1 << 20)
+    arguments = parser.parse_args(arguments)
+    if arguments.command == "run":
+        run_suite(arguments.output, arguments.suite, arguments.seed, arguments.repetitions, arguments.algorithms)
+        return 0
+    regressions = compare(arguments.baseline, arguments.current, arguments.threshold, arguments.min_time,
+                          arguments.min_memory)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
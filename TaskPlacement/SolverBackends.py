@@ -0,0 +1,157 @@
+# -------------------------------------------#
+# Description: Solver backends that solve the
+#   MILP models of the placement algorithms
+# -------------------------------------------#
+
+import numpy as np
+import variables
+
+
+# Import gurobipy only when the Gurobi backend is used, so that the rest of the algorithms run without it
+def import_gurobi():
+    import gurobipy
+    return gurobipy, gurobipy.GRB
+
+
+# This class solves the MILP models with Gurobi, through its matrix interface.
+# The model is kept between the calls to solve, so that Gurobi reuses its previous work
+class GurobiBackend:
+    name = "gurobi"
+    supports_start = True
+
+    def __init__(self):
+        self.gp, self.GRB = import_gurobi()
+        self.model = None
+        self.x = None
+        self.constraints = None
+        self.status = None
+        self.objective = None
+        self.gap = None
+        self.bound = None
+        self.values = None
+
+    # Load a MILPModel to the solver
+    def load(self, milp):
+        GRB = self.GRB
+        self.model = self.gp.Model("milp")
+        self.model.Params.OutputFlag = 0
+        self.model.Params.Threads = variables.solver_threads
+        self.x = self.model.addMVar(milp.number_of_variables, lb=milp.lb, ub=milp.ub,
+                                    vtype=np.where(milp.integrality == 1, GRB.BINARY, GRB.CONTINUOUS))
+        sense = np.where(milp.row_lb == milp.row_ub, GRB.EQUAL,
+                         np.where(np.isinf(milp.row_lb), GRB.LESS_EQUAL, GRB.GREATER_EQUAL))
+        rhs = np.where(np.isinf(milp.row_lb), milp.row_ub, milp.row_lb)
+        self.constraints = self.model.addMConstr(milp.A, self.x, sense, np.minimum(rhs, GRB.INFINITY)).tolist()
+        self.model.setObjective(milp.c @ self.x, GRB.MINIMIZE)
+        self.model.update()
+
+    # Change the upper bound of a (less or equal) row of the model
+    def set_row_upper(self, row, value):
+        self.constraints[row].RHS = value
+
+    # Give a starting solution, variables set to nan are left to the solver
+    def set_start(self, values):
+        self.x.Start = np.where(np.isnan(values), self.GRB.UNDEFINED, values)
+
+    # Discard the solutions whose objective is higher than the cutoff (None for no cutoff)
+    def set_cutoff(self, cutoff):
+        self.model.Params.Cutoff = self.GRB.INFINITY if cutoff is None else cutoff
+
+    # Solve the model and return "optimal", "cutoff", "time_limit" (with or without a solution) or "infeasible"
+    def solve(self, time_limit=None, mip_gap=None):
+        GRB = self.GRB
+        self.model.Params.TimeLimit = GRB.INFINITY if time_limit is None else max(time_limit, 0)
+        self.model.Params.MIPGap = 1e-4 if mip_gap is None else mip_gap
+        self.model.optimize()
+        self.values = self.x.X if self.model.SolCount > 0 else None
+        self.objective = self.model.ObjVal if self.model.SolCount > 0 else None
+        self.gap = self.model.MIPGap if self.model.SolCount > 0 else None
+        try:  # The lower bound on the objective, if the solver found one
+            self.bound = self.model.ObjBound
+        except self.gp.GurobiError:
+            self.bound = None
+        if self.model.Status == GRB.OPTIMAL:
+            self.status = "optimal"
+        elif self.model.Status == GRB.CUTOFF:
+            self.status = "cutoff"
+        elif self.model.Status == GRB.TIME_LIMIT:
+            self.status = "time_limit"
+        else:
+            self.status = "infeasible"
+        return self.status
+
+
+# This class solves the MILP models with the open-source HiGHS solver, through the interface of SciPy.
+# HiGHS does not take starting solutions (supports_start), the cutoff is added as a bound on the objective
+class HighsBackend:
+    name = "highs"
+    supports_start = False
+
+    def __init__(self):
+        from scipy import optimize
+        self.optimize = optimize
+        self.milp = None
+        self.row_ub = None
+        self.cutoff = None
+        self.status = None
+        self.objective = None
+        self.gap = None
+        self.bound = None
+        self.values = None
+
+    # Load a MILPModel to the solver
+    def load(self, milp):
+        self.milp = milp
+        self.row_ub = milp.row_ub.copy()
+
+    # Change the upper bound of a (less or equal) row of the model
+    def set_row_upper(self, row, value):
+        self.row_ub[row] = value
+
+    # Discard the solutions whose objective is higher than the cutoff (None for no cutoff)
+    def set_cutoff(self, cutoff):
+        self.cutoff = cutoff
+
+    # Solve the model and return "optimal", "cutoff", "time_limit" (with or without a solution) or "infeasible"
+    def solve(self, time_limit=None, mip_gap=None):
+        milp = self.milp
+        constraints = [self.optimize.LinearConstraint(milp.A, milp.row_lb, self.row_ub)]
+        if self.cutoff is not None:
+            constraints.append(self.optimize.LinearConstraint(milp.c[np.newaxis, :], -np.inf, self.cutoff))
+        options = {"mip_rel_gap": 1e-4 if mip_gap is None else mip_gap}
+        if time_limit is not None:
+            options["time_limit"] = max(time_limit, 0)
+        result = self.optimize.milp(milp.c, integrality=milp.integrality,
+                                    bounds=self.optimize.Bounds(milp.lb, milp.ub), constraints=constraints,
+                                    options=options)
+        self.values = result.x
+        self.objective = result.fun if result.x is not None else None
+        self.gap = getattr(result, "mip_gap", None) if result.x is not None else None
+        self.bound = getattr(result, "mip_dual_bound", None)
+        if result.status == 0:
+            self.status = "optimal"
+        elif result.status == 1:
+            self.status = "time_limit"
+            if self.bound is None:  # HiGHS gives no bound without a solution, the LP relaxation gives one
+                self.bound = self.find_relaxation_bound(constraints)
+        elif result.status == 2 and self.cutoff is not None:
+            self.status = "cutoff"
+        else:
+            self.status = "infeasible"
+        return self.status
+
+    # Function that returns the objective of the LP relaxation of the model, a lower bound on its objective
+    def find_relaxation_bound(self, constraints):
+        milp = self.milp
+        result = self.optimize.milp(milp.c, bounds=self.optimize.Bounds(milp.lb, milp.ub), constraints=constraints)
+        return result.fun if result.status == 0 else None
+
+
+backends = {"gurobi": GurobiBackend, "highs": HighsBackend}
+
+
+# Function that creates the solver backend with the given name
+def get_backend(name):
+    if name not in backends:
+        raise ValueError("Unknown solver backend: " + str(name))
+    return backends[name]()
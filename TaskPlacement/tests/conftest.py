@@ -0,0 +1,36 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import DAG  # noqa: E402
+import variables  # noqa: E402
+
+# The variables that the tests change, restored after each test
+restored_variables = ["infrastructure", "number_of_user_devices", "number_of_dags_per_user", "operator_sampling",
+                      "filter_alpha", "filter_beta", "RC_theta", "solver_threads"]
+
+
+# Each test starts from random.seed(0), with the task types drawn from that seed, and leaves the task types and
+# the variables as it found them
+@pytest.fixture(autouse=True)
+def seeded():
+    task_types = {name: list(values) for name, values in DAG.type_of_task.items()}
+    saved = {name: getattr(variables, name) for name in restored_variables if hasattr(variables, name)}
+    random.seed(0)
+    DAG.type_of_task.update(DAG.create_task_types())
+    yield
+    DAG.type_of_task.clear()
+    DAG.type_of_task.update(task_types)
+    for name, value in saved.items():
+        setattr(variables, name, value)
+
+
+# Function that creates count random DAGs of the three shapes, with 1 to max_tasks middle tasks each
+def create_dags(count, max_tasks=3, user_devices=2):
+    builders = [DAG.create_seq_dag, DAG.create_diamond_dag, DAG.create_replicated_dag]
+    return [random.choice(builders)(dag % user_devices, dag, random.randint(1, max_tasks), random.randint(1, 10))
+            for dag in range(count)]
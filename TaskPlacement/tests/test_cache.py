@@ -0,0 +1,90 @@
+import copy
+
+import DAG
+import variables
+from Main import find_placement, place_graph
+from PlacementCache import PlacementCache
+from PlacementFunctions import copy_enabled
+
+
+# Function that creates a DAG with the same signature as graph and another graph_id
+def copy_graph(graph, graph_id):
+    new = copy.deepcopy(graph)
+    new.graph_id = graph_id
+    return new
+
+
+def test_hit_returns_the_same_result():
+    variables.init(10, 2)
+    cache = PlacementCache(variables.infrastructure)
+    graph = DAG.create_diamond_dag(1, 0, 2, 5)
+    enabled = variables.free_resources(variables.infrastructure)
+    first = find_placement("DP_DAG", "lat", graph, enabled, variables.infrastructure, [], cache=cache)
+    second = find_placement("DP_DAG", "lat", copy_graph(graph, 1), enabled, variables.infrastructure, [], cache=cache)
+    assert first[0] is not None
+    assert second[:5] == first[:5]
+    assert second[6] == first[6]
+    assert second[0] is not first[0]  # Each DAG gets its own placement list
+    assert (cache.hits, cache.misses, cache.rejected) == (1, 1, 0)
+    # Another DAG, algorithm or mode is a miss
+    find_placement("DP_DAG", "lat", DAG.create_diamond_dag(0, 2, 2, 5), enabled, variables.infrastructure, [],
+                   cache=cache)
+    find_placement("DP_NP", "lat", graph, enabled, variables.infrastructure, [], cache=cache)
+    find_placement("DP_DAG", "min", graph, enabled, variables.infrastructure, [], cache=cache)
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+# A cached placement is only reused if its devices are in the same buckets and still have the resources it needs
+def test_lookup_revalidates_the_placement():
+    variables.init(6, 2)
+    cache = PlacementCache(variables.infrastructure, buckets=1)
+    graph = DAG.create_seq_dag(0, 0, 2, 5)
+    enabled = variables.free_resources(variables.infrastructure)
+    for row, cpu, ram in zip(enabled, variables.infrastructure.cpu_capacity, variables.infrastructure.ram_capacity):
+        row[1], row[2] = round(cpu * 0.9, 2), round(ram * 0.9, 2)
+    key = cache.find_key("DP", "lat", graph, [], {}, "gurobi", variables.objective_variables())
+    placement = [0] * graph.number_of_nodes
+    cache.store(key, enabled, (placement, 1.0, 2.0, 3.0, 0.5, 0.5), 1.0)
+    assert cache.lookup(key, graph, enabled, {}, 0)[0] == placement
+    full = copy_enabled(enabled)
+    full[0][1] = 0.01  # Same bucket, but the CPU is taken
+    assert cache.lookup(key, graph, full, {}, 0) is None
+    assert cache.rejected == 1
+    # The fixed nodes take no more resources
+    assert cache.lookup(key, graph, full, dict.fromkeys(range(graph.number_of_nodes), 0), 0)[0] == placement
+    enabled_device = copy_enabled(enabled)
+    enabled_device[0][0] = 1  # Another bucket
+    assert cache.lookup(key, graph, enabled_device, {}, 0) is None
+    assert (cache.hits, cache.misses, cache.rejected) == (2, 2, 1)
+
+
+# The placements found with other values of the variables of the objectives are not reused
+def test_key_holds_the_objective_variables():
+    variables.init(10, 2)
+    cache = PlacementCache(variables.infrastructure)
+    graph = DAG.create_seq_dag(0, 0, 3, 5)
+    enabled = variables.free_resources(variables.infrastructure)
+    first = find_placement("DP_NP", "lat", graph, enabled, variables.infrastructure, [], cache=cache)
+    variables.filter_alpha = variables.filter_alpha * 2
+    second = find_placement("DP_NP", "lat", graph, enabled, variables.infrastructure, [], cache=cache)
+    variables.operator_sampling = not variables.operator_sampling
+    find_placement("DP_NP", "lat", graph, enabled, variables.infrastructure, [], cache=cache)
+    assert cache.hits == 0
+    assert second[2] != first[2]
+
+
+# A placement with the lowest latency that still fits is still the one with the lowest latency, so a setting with
+# a cache places the DAGs as one without it
+def test_setting_with_cache():
+    variables.init(12, 2)
+    graph = DAG.create_seq_dag(0, 0, 2, 5)
+    graphs = [copy_graph(graph, graph_id) for graph_id in range(12)]
+    plain = variables.set_alg_setting(graphs)
+    cached = variables.set_alg_setting(graphs)
+    cached.placement_cache = PlacementCache(cached.infrastructure, buckets=1)
+    for graph, cached_graph in zip(plain.graphs, cached.graphs):
+        place_graph("DP", "lat", graph, plain, [])
+        place_graph("DP", "lat", cached_graph, cached, [])
+    assert cached.placement_cache.hits > 0
+    assert [graph.placement for graph in cached.graphs] == [graph.placement for graph in plain.graphs]
+    assert cached.enabled == plain.enabled
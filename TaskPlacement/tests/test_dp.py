@@ -0,0 +1,99 @@
+import copy
+import random
+
+import numpy as np
+import pytest
+
+import DAG
+import variables
+from conftest import create_dags
+from Infrastructure import Infrastructure
+from Main import place_graph
+from PlacementFunctions import (DP_placement, DP_placement_np, DP_placement_np_batch, DP_placement_main,
+                                DP_placement_dag, find_fixed_nodes, is_chain)
+
+
+# The vectorized DP finds the same placements as DP_placement, also as the devices fill up
+@pytest.mark.parametrize("seed", range(4))
+def test_dp_np_same_placements(seed):
+    random.seed(seed)
+    variables.init(20, 2)
+    setting = variables.set_alg_setting([DAG.create_seq_dag(dag % 2, dag, random.randint(1, 4), random.randint(1, 10))
+                                         for dag in range(20)])
+    for graph in setting.graphs:
+        availability = [1] * 20
+        expected = DP_placement(graph, setting.enabled, availability, [2, 5], variables.infrastructure)
+        found = DP_placement_np(graph, setting.enabled, availability, [2, 5], variables.infrastructure)
+        assert found[:5] == expected[:5]
+        assert found[5] == expected[5]
+        place_graph("DP", "lat", graph, setting, [])
+    assert setting.number_of_placed_dags > 0
+
+
+# The CPU that is left on a device is rounded to two decimals, as the free resources are, while DP_placement
+# subtracts the tasks of the chain without rounding: 0.3 - 0.2 - 0.1 is just below zero there, so only the
+# vectorized DP fits the two tasks on one device
+def test_dp_np_rounding_of_free_resources():
+    infrastructure = Infrastructure(np.array([4.0, 4.0]), np.array([8.0, 8.0]), np.array([[0.0, 5.0], [5.0, 0.0]]),
+                                    np.ones((2, 2)), np.array([[0.1, 10.0]]), np.array([[100.0, 10.0]]))
+    DAG.type_of_task["A"] = [0.1, 1, 1.0]
+    DAG.type_of_task["B"] = [0.2, 1, 1.0]
+    graph = DAG.create_graph(0, 0, 2, [(0, 1)], 0, 1, 1.0, ["A", "B"])
+    enabled = [[0, 0.3, 8.0, 0], [0, 4.0, 8.0, 0]]
+    assert DP_placement(graph, enabled, [1, 1], [], infrastructure)[4] != [0, 0]
+    found = DP_placement_np(graph, enabled, [1, 1], [], infrastructure)
+    assert found[4] == [0, 0]
+    assert found[5][0][1] == 0
+
+
+# The device-removal search of the "min" mode runs the DP for all the candidate removals at once, with the same
+# results as one run per removal, and reaches the same placement as with DP_placement
+def test_removal_batch_same_as_sequential():
+    variables.init(15, 2)
+    setting = variables.set_alg_setting(create_dags(12))
+    for graph in setting.graphs:
+        if not is_chain(graph):
+            continue
+        availabilities = []
+        for dev in range(0, 15, 3):
+            availability = [1] * 15
+            availability[dev] = 0
+            availabilities.append(availability)
+        batch = DP_placement_np_batch(graph, setting.enabled, availabilities, [], variables.infrastructure)
+        for availability, result in zip(availabilities, batch):
+            expected = DP_placement_np(graph, setting.enabled, availability, [], variables.infrastructure)
+            assert result[:5] == expected[:5]
+    for graph in setting.graphs:
+        expected = DP_placement_main(graph, setting.enabled, "min", [], DP_placement, variables.infrastructure)
+        for dp_algorithm in (DP_placement_np, DP_placement_dag):
+            if dp_algorithm is DP_placement_dag and not is_chain(graph):
+                continue
+            found = DP_placement_main(graph, setting.enabled, "min", [], dp_algorithm, variables.infrastructure)
+            assert found[:5] == expected[:5]
+
+
+def test_find_fixed_nodes():
+    assert find_fixed_nodes(None, [1]) == {}
+    assert find_fixed_nodes({0: 1, 2: 3}, [1]) == {2: 3}
+
+
+# A node whose shared operator only runs on a device to remove is placed like the others, away from that device
+@pytest.mark.parametrize("algorithm", ["DP", "DP_NP", "DP_DAG"])
+def test_shared_operators_honor_devices_to_remove(algorithm):
+    variables.init(8, 2)
+    base = DAG.create_seq_dag(0, 0, 3, 5)
+    edges = [(node, node + 1) for node in range(base.number_of_nodes - 1)]
+    graphs = [DAG.create_graph(0, graph_id, base.number_of_nodes, edges, 0, base.number_of_nodes - 1, 5,
+                               list(base.task_types)) for graph_id in range(2)]
+    setting = variables.set_alg_setting(graphs, share_operators=True)
+    first, second = setting.graphs
+    place_graph(algorithm, "lat", first, setting, [])
+    assert first.placed
+    assert setting.find_shared_operators(second) == dict(enumerate(first.placement))
+    remove = sorted(set(first.placement))
+    assert setting.find_shared_operators(second, remove) == {}
+    place_graph(algorithm, "lat", second, setting, remove)
+    assert not second.placed or not set(second.placement) & set(remove)
+    check = copy.deepcopy(setting)
+    check.calculate_enabled()
+    assert check.enabled == setting.enabled
@@ -0,0 +1,98 @@
+import pickle
+import random
+
+import numpy as np
+import pytest
+from scipy.sparse.csgraph import dijkstra, floyd_warshall
+
+import variables
+from conftest import create_dags
+from Infrastructure import Infrastructure
+from Main import place_graph, calculate_objective_global
+from Network import SparseNetwork
+
+
+# Function that finds the bottleneck bandwidths from each device by walking back along the routes of Dijkstra
+def find_bottlenecks(network):
+    bandwidth = {}
+    for dev1, dev2, cost, link_bandwidth in network.links.tolist():
+        bandwidth[int(dev1), int(dev2)] = bandwidth[int(dev2), int(dev1)] = link_bandwidth
+    predecessors = dijkstra(network.cost_graph, directed=False, return_predecessors=True)[1]
+    bottlenecks = np.ones((network.number_of_devices, network.number_of_devices))
+    for source in range(network.number_of_devices):
+        for dev in range(network.number_of_devices):
+            lowest, current = np.inf, dev
+            while current != source:
+                lowest = min(lowest, bandwidth[predecessors[source, current], current])
+                current = predecessors[source, current]
+            if dev != source:
+                bottlenecks[source, dev] = lowest
+    return bottlenecks
+
+
+# Function that creates the dense infrastructure with the routes of a sparse one
+def create_dense(sparse):
+    devices = np.arange(sparse.number_of_edge_devices)
+    return Infrastructure(sparse.cpu_capacity, sparse.ram_capacity, sparse.network.routes(devices, 0),
+                          sparse.network.routes(devices, 1), sparse.user_dev_cost, sparse.user_dev_bandwidth)
+
+
+def test_routes():
+    sparse = variables.create_sparse_infrastructure(70, 2, 3)
+    network = sparse.network
+    devices = np.arange(70)
+    cost = network.routes(devices, 0)
+    bandwidth = network.routes(devices, 1)
+    assert np.allclose(cost, floyd_warshall(network.cost_graph, directed=False))
+    assert np.array_equal(bandwidth, find_bottlenecks(network))
+    assert np.array_equal(network.routes(devices, 2), cost / bandwidth)
+    assert np.array_equal(sparse.transfer_block(), cost / bandwidth)
+    assert np.array_equal(sparse.transfer_block([5, 66], [1, 2]), (cost / bandwidth)[[5, 66]][:, [1, 2]])
+    # The columns are the rows of their devices, whose costs are summed along the route in the other direction
+    assert np.allclose(sparse.transfer_block(columns=[3]), (cost / bandwidth)[:, [3]])
+    # The rows are the same when they are read in order, one element at a time or in any order
+    for dev in list(range(70)) + random.sample(range(70), 70):
+        assert sparse.com_cost[dev] == cost[dev].tolist()
+        assert sparse.bandwidth[dev][(dev + 1) % 70] == bandwidth[dev, (dev + 1) % 70]
+        assert sparse.transfer_cost[dev] == (cost[dev] / bandwidth[dev]).tolist()
+    subset = sparse.subset([4, 65, 9])
+    assert np.array_equal(subset.com_cost, cost[[4, 65, 9]][:, [4, 65, 9]])
+    assert np.array_equal(subset.transfer_cost, (cost / bandwidth)[[4, 65, 9]][:, [4, 65, 9]])
+
+
+# Only up to max_memory bytes of transfer costs are kept, and the routes are found again when they are needed
+def test_bounded_route_cache():
+    network = variables.create_sparse_infrastructure(100, 2, 4).network
+    expected = network.routes(np.arange(100), 2)
+    small = SparseNetwork(100, network.links, block_size=8, max_memory=2 * 8 * 8 * 100)
+    assert small.max_blocks == 2
+    for dev in random.sample(range(100), 100):
+        assert np.array_equal(small.routes(dev, 2), expected[dev])
+        assert len(small.blocks) <= 2
+    assert small.computed_blocks > 13
+    copied = pickle.loads(pickle.dumps(small))
+    assert (copied.block_size, copied.max_memory, len(copied.blocks)) == (8, small.max_memory, 0)
+    assert np.array_equal(copied.routes(slice(None), 2), expected)
+
+
+@pytest.mark.parametrize("links", [[(0, 0, 1, 1)], [(0, 5, 1, 1)], [(0, 1, 0, 1)], [(0, 1, 1, 1), (1, 0, 2, 2)],
+                                   [(0, 1, 1, 1), (2, 3, 1, 1)]])
+def test_invalid_links(links):
+    with pytest.raises(ValueError):
+        SparseNetwork(4, links)
+
+
+# The algorithms find the same placements on a sparse network as on the dense infrastructure with its routes
+@pytest.mark.parametrize("algorithm", ["DP", "DP_NP", "DP_DAG"])
+def test_sparse_and_dense_place_alike(algorithm):
+    sparse = variables.create_sparse_infrastructure(80, 2, 4)
+    dense = create_dense(sparse)
+    graphs = create_dags(10)
+    for opt_type in ["lat", "enabled", "min"]:
+        results = []
+        for infrastructure in [sparse, dense]:
+            setting = variables.set_alg_setting(graphs, infrastructure)
+            for graph in setting.graphs:
+                place_graph(algorithm, opt_type, graph, setting, [])
+            results.append(([graph.placement for graph in setting.graphs], calculate_objective_global(setting)))
+        assert results[0] == results[1]
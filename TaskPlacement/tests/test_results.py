@@ -0,0 +1,41 @@
+import sqlite3
+
+from ResultsSink import ResultsSink
+
+
+# Each sink is a new experiment, also in a database written before the experiments table, whose experiments keep
+# their numbers
+def test_experiments_are_numbered(tmp_path):
+    path = str(tmp_path / "results.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE placements (experiment INTEGER, iteration INTEGER, algorithm TEXT, mode TEXT, "
+                       "graph_id INTEGER, latency REAL, F REAL, RC REAL, selectivity REAL, solve_time REAL)")
+    connection.execute("INSERT INTO placements VALUES (3, 0, 'DP', 'lat', 0, 1, 2, 3, 0.5, 0.1)")
+    connection.commit()
+    connection.close()
+    first = ResultsSink(path)
+    second = ResultsSink(path)
+    assert (first.experiment, second.experiment) == (4, 5)
+    first.add_placement(0, "DP", "lat", 1, 1.5, 2.5, 3.5, 0.4, 0.2)
+    first.add_placement(0, "DP", "lat", 2, -1, -1, -1, -1, 0.3)
+    first.add_global(0, "DP", "lat", 1, (2.5, 3.5, 1.5, 0.4))
+    first.add_global(0, "DP", "lat", -1, -1)
+    assert first.query("SELECT graph_id, latency, selectivity FROM placements WHERE experiment = ?",
+                       (first.experiment,)) == [(1, 1.5, 0.4), (2, None, None)]
+    assert first.query("SELECT graph_id, F FROM global_objectives") == [(1, 2.5), (-1, None)]
+    assert second.query("SELECT COUNT(*) FROM placements WHERE experiment = ?", (second.experiment,)) == [(0,)]
+    first.close()
+    second.close()
+    assert ResultsSink(path).experiment == 6
+
+
+# The results are written in batches of batch_size
+def test_batches(tmp_path):
+    path = str(tmp_path / "results.db")
+    sink = ResultsSink(path, batch_size=2)
+    reader = sqlite3.connect(path)
+    sink.add_placement(0, "DP", "lat", 0, 1, 1, 1, 1, 0)
+    assert reader.execute("SELECT COUNT(*) FROM placements").fetchone() == (0,)
+    sink.add_placement(0, "DP", "lat", 1, 1, 1, 1, 1, 0)
+    assert reader.execute("SELECT COUNT(*) FROM placements").fetchone() == (2,)
+    sink.close()
@@ -0,0 +1,63 @@
+import random
+
+import numpy as np
+import pytest
+
+import variables
+from conftest import create_dags
+from Main import place_graph
+from PlacementFunctions import find_sample_ratio, find_operator_sample_ratios
+
+
+# Random placements of random DAGs on 30 devices
+@pytest.fixture
+def placements():
+    variables.init(30, 2)
+    return [(graph, [random.randrange(30) for node in range(graph.number_of_nodes)])
+            for graph in create_dags(100, max_tasks=4)]
+
+
+# The latency of each path is a line in the sampling ratio of the nodes it is found for
+def test_latency_lines(placements):
+    for graph, placement in placements:
+        times = graph.find_latency_times(placement, variables.infrastructure)
+        lines = graph.find_latency_lines(times, None, range(graph.number_of_nodes), 0.1, 1.0)
+        assert max(a + b * 0.37 for a, b in lines) == pytest.approx(graph.calculate_latency(placement, 0.37))
+        ratios = np.random.uniform(0.1, 1, graph.number_of_nodes).tolist()
+        node = random.randrange(graph.number_of_nodes)
+        lines = graph.find_latency_lines(times, ratios, {node}, 0.1, 1.0)
+        assert max(a + b * ratios[node] for a, b in lines) == pytest.approx(graph.calculate_latency(placement, ratios))
+
+
+# The closed-form ratio gives an F no higher than any ratio of a fine grid, and the ratios of the sampling operators
+# an F no higher than the closed-form ratio
+def test_sample_ratios_minimize_F(placements):
+    grid = np.linspace(variables.sample_ratio_min, variables.sample_ratio_max, 181)
+    for graph, placement in placements:
+        ratio = find_sample_ratio(graph, placement)
+        assert variables.sample_ratio_min <= ratio <= variables.sample_ratio_max
+        F = graph.calculate_objective_local(placement, ratio)[1]
+        assert F <= min(graph.calculate_objective_local(placement, value)[1] for value in grid) + 1e-3
+        ratios = find_operator_sample_ratios(graph, placement)
+        assert all(variables.sample_ratio_min <= value <= variables.sample_ratio_max for value in ratios)
+        assert graph.calculate_objective_local(placement, ratios)[1] <= F + 1e-3
+
+
+# A placed DAG keeps its sampling ratios, which give its latency and whose average is its selectivity
+@pytest.mark.parametrize("operator_sampling", [False, True])
+def test_placed_dags_keep_their_ratios(operator_sampling):
+    variables.operator_sampling = operator_sampling
+    variables.init(12, 2)
+    setting = variables.set_alg_setting(create_dags(10))
+    for graph in setting.graphs:
+        place_graph("DP_DAG", "lat", graph, setting, [])
+        if not graph.placed:
+            continue
+        ratios = graph.sample_ratios
+        if operator_sampling:
+            assert isinstance(ratios, tuple) and len(ratios) == graph.number_of_nodes
+        else:
+            assert ratios == graph.selectivity
+        assert np.mean(ratios) == pytest.approx(graph.selectivity)
+        assert round(graph.calculate_latency(graph.placement, ratios, setting.infrastructure), 3) == graph.latency
+    assert setting.number_of_placed_dags > 0
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+import Main
+import PlacementService
+import variables
+from PlacementService import PlacementService as Service
+
+request = {"op": "submit", "mobile_device_id": 0, "user_rate": 5, "task_types": ["Filter", "Map", "Scan"],
+           "edges": [[0, 1], [1, 2]]}
+
+
+@pytest.fixture
+def service():
+    variables.init(10, 2)
+    return Service(variables.set_alg_setting([], share_operators=True))
+
+
+# The DAGs that are not well formed are rejected without being added to the setting
+@pytest.mark.parametrize("changes", [{"edges": [[0, 2]]}, {"edges": [[1, 0]]}, {"source": 5}, {"sink": -1},
+                                     {"task_types": ["Filter", "Unknown", "Scan"]}, {"mobile_device_id": 7},
+                                     {"task_types": [], "edges": []}])
+def test_invalid_dags_are_rejected(service, changes):
+    response = asyncio.run(service.answer(dict(request, **changes)))
+    assert "error" in response
+    assert service.setting.graphs == []
+
+
+def test_submit_and_cancel(service):
+    async def run():
+        placed = await service.answer(dict(request, id=7))
+        assert placed["status"] == "placed"
+        assert placed["id"] == 7
+        assert (await service.answer({"op": "stats"}))["placed_dags"] == 1
+        cancelled = await service.answer({"op": "cancel", "graph_id": placed["graph_id"]})
+        assert cancelled["cancelled"]
+        assert not (await service.answer({"op": "cancel", "graph_id": placed["graph_id"]}))["cancelled"]
+        assert "error" in await service.answer({"op": "move"})
+
+    asyncio.run(run())
+    assert service.setting.graphs == []
+    assert service.setting.enabled == variables.free_resources(service.setting.infrastructure)
+    assert service.setting.operators == {}
+
+
+# A DAG whose placement failed is not kept in the setting
+def test_failed_placement_is_removed(service, monkeypatch):
+    def fail(*arguments, **options):
+        raise RuntimeError("solver failed")
+
+    monkeypatch.setattr(PlacementService, "find_placement", fail)
+    assert "error" in asyncio.run(service.answer(request))
+    assert service.setting.graphs == []
+    assert service.pending == set()
+
+
+# The solver algorithms of the service run on its backend
+def test_backend(monkeypatch):
+    backends = []
+
+    def find_placement(*arguments):
+        backends.append(arguments[8])
+        return Main.find_placement(*arguments)
+
+    monkeypatch.setattr(PlacementService, "find_placement", find_placement)
+    variables.init(6, 2)
+    service = Service(variables.set_alg_setting([]), "MILP", "lat", "highs")
+    placed = asyncio.run(service.answer(request))
+    assert placed["status"] == "placed"
+    assert placed["method"] in ("MILP", "DP")
+    assert backends == ["highs"]
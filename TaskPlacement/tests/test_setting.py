@@ -0,0 +1,117 @@
+import copy
+import random
+
+import pytest
+
+import variables
+from conftest import create_dags
+from Main import (place_graph, calculate_objective_global, optimize_global_F_byUtil, optimize_global_F_by_objective,
+                  optimize_global_F_local_search)
+
+
+# Function that returns the state of a setting that apply_placement, revert_placement and rollback change
+def snapshot(setting):
+    return ([row[:] for row in setting.enabled], setting.sum_latency, setting.sum_filter_ratios,
+            setting.number_of_placed_dags, setting.enabled_cpu, setting.number_of_enabled_devices,
+            copy.deepcopy(setting.operators),
+            [(graph.placed, graph.placement, graph.latency, graph.selectivity, graph.sample_ratios)
+             for graph in setting.graphs])
+
+
+# The free resources and the sums kept up to date by the setting are the ones calculate_enabled finds again
+def assert_ledger(setting):
+    check = copy.deepcopy(setting)
+    check.calculate_enabled()
+    assert check.enabled == setting.enabled
+    assert check.operators == setting.operators
+    assert check.enabled_cpu == setting.enabled_cpu
+    assert check.number_of_enabled_devices == setting.number_of_enabled_devices
+    assert check.number_of_placed_dags == setting.number_of_placed_dags
+    assert check.sum_latency == pytest.approx(setting.sum_latency)
+    assert check.sum_filter_ratios == pytest.approx(setting.sum_filter_ratios)
+    assert all(row[1] >= 0 and row[2] >= 0 for row in setting.enabled)
+
+
+@pytest.mark.parametrize("share_operators", [False, True])
+def test_ledger_after_placements_and_removals(share_operators):
+    variables.init(12, 2)
+    setting = variables.set_alg_setting(create_dags(20), share_operators=share_operators)
+    for graph in setting.graphs:
+        place_graph("DP_NP", "lat", graph, setting, [])
+    assert setting.number_of_placed_dags > 0
+    assert_ledger(setting)
+    placed = [graph for graph in setting.graphs if graph.placed]
+    for graph in placed[::2]:
+        setting.revert_placement(graph)
+    assert_ledger(setting)
+    for graph in placed[1::2]:
+        setting.revert_placement(graph)
+    assert setting.enabled == variables.free_resources(setting.infrastructure)
+    assert (setting.sum_latency, setting.sum_filter_ratios, setting.number_of_enabled_devices) == (0, 0, 0)
+    assert setting.operators == {}
+
+
+@pytest.mark.parametrize("share_operators", [False, True])
+def test_rollback_restores_the_setting(share_operators):
+    variables.init(12, 2)
+    setting = variables.set_alg_setting(create_dags(16), share_operators=share_operators)
+    for graph in setting.graphs[:10]:
+        place_graph("DP_NP", "lat", graph, setting, [])
+    before = snapshot(setting)
+    setting.begin_trial()
+    for graph in setting.graphs[:10:3]:
+        if graph.placed:
+            setting.revert_placement(graph)
+    after_removals = snapshot(setting)
+    mark = setting.mark()
+    for graph in setting.graphs:
+        place_graph("DP_NP", "min", graph, setting, [0])
+    assert_ledger(setting)
+    setting.rollback(mark)  # Only the placements after the mark are undone
+    assert snapshot(setting) == after_removals
+    assert setting.undo_log is not None
+    setting.rollback()
+    assert snapshot(setting) == before
+    assert setting.undo_log is None
+    setting.begin_trial()
+    place_graph("DP_NP", "lat", setting.graphs[-1], setting, [])
+    setting.commit()
+    assert setting.undo_log is None
+    assert_ledger(setting)
+
+
+# The global optimizers change the setting in place, with the free resources and the sums kept up to date
+def test_global_optimizers_keep_the_ledger():
+    variables.init(15, 2, 15)
+    for opt_type in ["lat", "min"]:
+        setting = variables.set_alg_setting(variables.create_graphs())
+        for graph in setting.graphs:
+            place_graph("DP_NP", opt_type, graph, setting, [])
+        F = calculate_objective_global(setting)[0]
+        setting = optimize_global_F_byUtil("DP_NP", opt_type, setting, F, 0.5)
+        assert_ledger(setting)
+        setting = optimize_global_F_by_objective("DP_NP", opt_type, setting, calculate_objective_global(setting)[0],
+                                                 "F", 0.8)
+        assert_ledger(setting)
+
+
+# The local search never leaves F higher than it found it, and the sampling ratios of each DAG give its latency
+@pytest.mark.parametrize("operator_sampling", [False, True])
+def test_local_search(operator_sampling):
+    variables.operator_sampling = operator_sampling
+    variables.init(12, 2)
+    setting = variables.set_alg_setting(create_dags(16))
+    for graph in setting.graphs:
+        place_graph("DP_NP", "lat", graph, setting, [])
+    report = {}
+    optimize_global_F_local_search("DP_NP", "lat", setting, budget=60, max_moves=300, seed=random.randrange(100),
+                                   report=report)
+    assert report["moves"] == 300
+    assert report["F"] <= report["F_start"]
+    assert calculate_objective_global(setting)[0] == round(report["F"], 3)
+    assert setting.undo_log is None
+    assert_ledger(setting)
+    for graph in setting.graphs:
+        if graph.placed:
+            assert round(graph.calculate_latency(graph.placement, graph.sample_ratios, setting.infrastructure),
+                         3) == graph.latency
@@ -0,0 +1,70 @@
+import itertools
+import random
+
+import pytest
+
+import DAG
+import variables
+from PlacementFunctions import MILP_placement, QP_placement, anytime_placement
+
+
+# Small DAGs on 4 devices, whose best placement can be found by trying all of them
+def create_instances():
+    variables.init(4, 2)
+    return [random.choice([DAG.create_seq_dag, DAG.create_diamond_dag])(0, dag, 2, random.randint(1, 10))
+            for dag in range(4)]
+
+
+# Function that finds the lowest latency of the placements of a DAG that fit on the free devices
+def find_best_latency(graph):
+    setting = variables.set_alg_setting([graph])
+    return round(min(graph.calculate_latency(list(placement), 1)
+                     for placement in itertools.product(range(4), repeat=graph.number_of_nodes)
+                     if setting.check_resources(graph, list(placement))), 3)
+
+
+# The linearized MILP on HiGHS finds the placement with the lowest latency
+def test_milp_highs_finds_best_latency():
+    for graph in create_instances():
+        enabled = variables.set_alg_setting([graph]).enabled
+        assert MILP_placement(graph, enabled, "lat", [], backend="highs")[1] == find_best_latency(graph)
+
+
+# The QP formulations and the MILP find placements with the same objectives, with and without the warm start
+@pytest.mark.parametrize("opt_type", ["lat", "enabled", "min"])
+def test_qp_and_milp_agree(opt_type):
+    pytest.importorskip("gurobipy")
+    for graph in create_instances():
+        enabled = variables.set_alg_setting([graph]).enabled
+        expected = QP_placement(graph, enabled, opt_type, [])
+        assert expected[0] == 1
+        for algorithm, options in [(QP_placement, {"formulation": "arrival"}), (QP_placement, {"warm_start": True}),
+                                   (MILP_placement, {}), (MILP_placement, {"warm_start": True}),
+                                   (MILP_placement, {"backend": "highs"})]:
+            assert algorithm(graph, enabled, opt_type, [], **options)[1:4] == expected[1:4]
+        if opt_type == "lat":
+            assert expected[1] == find_best_latency(graph)
+
+
+def test_qp_rejects_other_backends():
+    graph = create_instances()[0]
+    with pytest.raises(ValueError):
+        QP_placement(graph, variables.set_alg_setting([graph]).enabled, "lat", [], backend="highs")
+
+
+# Without time left the anytime algorithm returns the DP placement, with enough time the solver finds the placement
+# with the lowest latency
+@pytest.mark.parametrize("backend", ["gurobi", "highs"])
+def test_anytime_placement(backend):
+    if backend == "gurobi":
+        pytest.importorskip("gurobipy")
+    for graph in create_instances():
+        enabled = variables.set_alg_setting([graph]).enabled
+        report = {}
+        found = anytime_placement(graph, enabled, "lat", [], 0, backend=backend, report=report)
+        assert found[0] == 1
+        assert report == {"method": "DP", "gap": None}
+        assert found[1] >= find_best_latency(graph)
+        found = anytime_placement(graph, enabled, "lat", [], 60, 0, backend=backend, report=report)
+        assert found[1] == find_best_latency(graph)
+        assert report["gap"] is not None
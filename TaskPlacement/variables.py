@@ -9,35 +9,60 @@ import random
 import DAG
 import itertools
 import copy
+import numpy as np
+from Infrastructure import Infrastructure
+from Network import SparseNetwork, SparseInfrastructure
+from PlacementCache import PlacementCache
+from CandidateIndex import CandidateIndex
 
+solver_threads = 0  # Number of threads of each solver, 0 lets the solver use all the cores
+anytime_deadline = 1.0  # Seconds that the ANYTIME algorithm has to place a DAG
+anytime_mip_gap = 0.01  # Relative gap from the optimal latency at which the ANYTIME algorithm stops
 
-def init():
-    global number_of_edge_devices
+
+# Fixed variables
+RC_theta = 1.5
+filter_alpha = 0.5
+filter_beta = 0.5
+filter_selectivities = []
+sample_ratio_min = 0.1  # Range of the sampling ratios
+sample_ratio_max = 1.0
+operator_sampling = False  # Each sampling operator (a Filter or Scan task) has its own sampling ratio
+sampling_operators = ("Filter", "Scan")
+
+
+# Function that returns the variables that the objectives and the sampling ratios of a placement depend on,
+# e.g. so that the placements found with other values are not reused from a placement cache
+def objective_variables():
+    return (RC_theta, filter_alpha, filter_beta, sample_ratio_min, sample_ratio_max, operator_sampling,
+            tuple(sampling_operators))
+
+
+# With network_degree, the edge devices are connected by a sparse network where each device has network_degree
+# links on average (see create_sparse_infrastructure), instead of a direct link between each pair of devices
+def init(edge_devices=50, user_devices=2, dags_per_user=10, network_degree=None):
     global number_of_user_devices
     global number_of_dags_per_user
-    global cpu_capacity
-    global ram_capacity
-    global com_cost
-    global user_dev_cost
-    global bandwidth
-    global user_dev_bandwidth
-    global RC_theta
-    global filter_alpha
-    global filter_beta
-    global filter_selectivities
-
-    # Fixed variables
-    RC_theta = 1.5
-    filter_alpha = 0.5
-    filter_beta = 0.5
-    filter_selectivities = []
-
-    # Number of dags, users, devices
-    number_of_dags_per_user = 10
-    number_of_user_devices = 2
-    number_of_edge_devices = 50
+    global infrastructure
 
-    # Set cpu and ram capacities for the devices
+    # Number of dags, users
+    number_of_dags_per_user = dags_per_user
+    number_of_user_devices = user_devices
+
+    # The devices and the network of the experiment, used by default by the algorithms
+    if network_degree is None:
+        infrastructure = create_infrastructure(edge_devices, user_devices)
+    else:
+        infrastructure = create_sparse_infrastructure(edge_devices, user_devices, network_degree)
+
+
+# Function that returns the given infrastructure, or the infrastructure of init if none is given
+def get_infrastructure(given=None):
+    return infrastructure if given is None else given
+
+
+# Function that creates random cpu and ram capacities for the devices
+def create_capacities(number_of_edge_devices):
     cpu_capacity = []
     ram_capacity = []
 
@@ -46,34 +71,69 @@ def init():
         ram = random.randint(4, 32)
         cpu_capacity.append(cpu)
         ram_capacity.append(ram)
+    return cpu_capacity, ram_capacity
+
+
+# Function that creates random communication costs and bandwidths between the users and the devices
+def create_user_costs(number_of_user_devices, number_of_edge_devices):
+    user_dev_cost = np.zeros((number_of_user_devices, number_of_edge_devices))  # For each pair of device and user
+    user_dev_bandwidth = np.zeros((number_of_user_devices, number_of_edge_devices))  # For each pair of device and user
+    for user, dev in list(itertools.product(range(number_of_user_devices), range(number_of_edge_devices))):
+        cost = round(random.uniform(0.1, 10), 2)
+        user_dev_cost[user, dev] = cost
+
+        bdw = round(random.uniform(10, 100), 2)
+        user_dev_bandwidth[user, dev] = bdw
+    return user_dev_cost, user_dev_bandwidth
+
+
+# Create an infrastructure with random capacities, communication costs and bandwidths
+def create_infrastructure(number_of_edge_devices, number_of_user_devices):
+    # Set cpu and ram capacities for the devices
+    cpu_capacity, ram_capacity = create_capacities(number_of_edge_devices)
 
     # Set communication cost and bandwidth between pairs of devices
-    com_cost = [[0 for i in range(number_of_edge_devices)] for j in
-                range(number_of_edge_devices)]  # Communication cost for each pair of devices
-    bandwidth = [[1 for i in range(number_of_edge_devices)] for j in
-                 range(number_of_edge_devices)]  # Bandwidth for each pair of devices
+    com_cost = np.zeros((number_of_edge_devices, number_of_edge_devices))  # Communication cost for each pair
+    bandwidth = np.ones((number_of_edge_devices, number_of_edge_devices))  # Bandwidth for each pair of devices
 
     for dev1, dev2 in list(itertools.product(range(number_of_edge_devices), range(number_of_edge_devices))):
         if dev1 < dev2 and dev1 != dev2:
             cost = round(random.uniform(0.1, 10), 2)
-            com_cost[dev1][dev2] = cost
-            com_cost[dev2][dev1] = cost
+            com_cost[dev1, dev2] = cost
+            com_cost[dev2, dev1] = cost
 
             bdw = round(random.uniform(10, 100), 2)
-            bandwidth[dev1][dev2] = bdw
-            bandwidth[dev2][dev1] = bdw
+            bandwidth[dev1, dev2] = bdw
+            bandwidth[dev2, dev1] = bdw
 
     # Set communication cost and bandwidth between pairs of users and devices
-    user_dev_cost = [[0 for i in range(number_of_edge_devices)] for j in
-                     range(number_of_user_devices)]  # Communication cost for each pair of device and user
-    user_dev_bandwidth = [[0 for i in range(number_of_edge_devices)] for j in
-                          range(number_of_user_devices)]  # Bandwidth for each pair of device and user
-    for user, dev in list(itertools.product(range(number_of_user_devices), range(number_of_edge_devices))):
-        cost = round(random.uniform(0.1, 10), 2)
-        user_dev_cost[user][dev] = cost
+    user_dev_cost, user_dev_bandwidth = create_user_costs(number_of_user_devices, number_of_edge_devices)
+
+    return Infrastructure(cpu_capacity, ram_capacity, com_cost, bandwidth, user_dev_cost, user_dev_bandwidth)
 
-        bdw = round(random.uniform(10, 100), 2)
-        user_dev_bandwidth[user][dev] = bdw
+
+# Create an infrastructure with random capacities whose devices are connected by a sparse network with random
+# communication costs and bandwidths. A random tree keeps all the devices connected and random pairs of devices
+# are linked until there are number_of_edge_devices * degree / 2 links
+def create_sparse_infrastructure(number_of_edge_devices, number_of_user_devices, degree=4):
+    # Set cpu and ram capacities for the devices
+    cpu_capacity, ram_capacity = create_capacities(number_of_edge_devices)
+
+    # Set the links between the devices, with their communication cost and bandwidth
+    pairs = set((random.randrange(dev), dev) for dev in range(1, number_of_edge_devices))
+    number_of_links = min(number_of_edge_devices * degree // 2,
+                          number_of_edge_devices * (number_of_edge_devices - 1) // 2)
+    while len(pairs) < number_of_links:
+        pairs.add(tuple(sorted(random.sample(range(number_of_edge_devices), 2))))
+    links = []
+    for dev1, dev2 in sorted(pairs):
+        links.append([dev1, dev2, round(random.uniform(0.1, 10), 2), round(random.uniform(10, 100), 2)])
+
+    # Set communication cost and bandwidth between pairs of users and devices
+    user_dev_cost, user_dev_bandwidth = create_user_costs(number_of_user_devices, number_of_edge_devices)
+
+    return SparseInfrastructure(cpu_capacity, ram_capacity, SparseNetwork(number_of_edge_devices, links),
+                                user_dev_cost, user_dev_bandwidth)
 
 
 # Initialize the graphs
@@ -84,7 +144,7 @@ def create_graphs():
         for j in range(number_of_dags_per_user):
             input_rate = random.randint(1, 10)
             number_of_tasks = random.randint(1, 3)
-            dag_type = random.choice(list(type_of_dag))
+            dag_type = random.choice(sorted(type_of_dag))  # Sorted, the order of a set changes between processes
             if dag_type == "S":
                 graphs.append(DAG.create_seq_dag(i, j + (i * number_of_dags_per_user), number_of_tasks, input_rate))
             elif dag_type == "D":
@@ -95,44 +155,223 @@ def create_graphs():
     return graphs
 
 
-# This class represents the setting of an experiment instance
+# This class represents the setting of an experiment instance. The free resources of the devices (enabled) and
+# the sums that the global objectives need are kept up to date by apply_placement and revert_placement.
+# Between begin_trial and commit/rollback the changes are recorded in an undo log, so that they can be undone.
+# If the DAGs share their operators, a node whose operator (see DAG.find_operator_keys) already runs on its device
+# takes no more resources, and the operator keeps its resources until the last DAG that uses it is removed.
+# A placement cache (see PlacementCache), if given, is used by Main.place_graph, and so is a candidate index
+# (see CandidateIndex), which is kept up to date with the free resources
 class AlgSetting:
-    def __init__(self, graphs, enabled):
+    def __init__(self, graphs, enabled, infrastructure, share_operators=False, placement_cache=None,
+                 candidate_index=None):
         self.graphs = graphs
         self.enabled = enabled
+        self.infrastructure = infrastructure
         self.sum_latency = 0
         self.sum_filter_ratios = 0
         self.number_of_placed_dags = 0
+        self.enabled_cpu = 0  # Sum of enabled devices' CPU capacities
+        self.number_of_enabled_devices = 0
+        self.operator_keys = None  # The operator of each node of each DAG (by graph_id), if the DAGs share them
+        self.operators = {}  # Number of placed DAGs that use each operator, on each device it runs on
+        self.operator_ids = {}  # The operators found in the DAGs, see DAG.find_operator_keys
+        if share_operators:
+            self.operator_keys = dict(zip([graph.graph_id for graph in graphs],
+                                          DAG.find_operator_keys(graphs, self.operator_ids)))
+        self.undo_log = None  # The DAGs placed and removed since begin_trial, None outside of a trial
+        self.trial_sums = None
+        self.placement_cache = placement_cache
+        self.candidate_index = candidate_index
 
+    # Recalculate the free resources and the sums from the placed DAGs
     def calculate_enabled(self):
         self.sum_latency = 0
         self.sum_filter_ratios = 0
         self.number_of_placed_dags = 0
+        self.enabled_cpu = 0
+        self.number_of_enabled_devices = 0
+        self.operators = {}
         self.enabled.clear()
-        for dev in range(number_of_edge_devices):
-            self.enabled.append([0, 0, 0, 0])  # Values:[enabled, free cpu capacity, free ram capacity, number of tasks]
-            self.enabled[dev][1] = cpu_capacity[dev]
-            self.enabled[dev][2] = ram_capacity[dev]
+        self.enabled.extend(free_resources(self.infrastructure))
+        if self.candidate_index is not None:
+            self.candidate_index.refresh(self.enabled)
         for graph in self.graphs:
             if graph.placed:
-                for node in range(graph.number_of_nodes):
-                    dev_temp = graph.placement[node]
-                    self.enabled[dev_temp][0] = 1
-                    self.enabled[dev_temp][1] = round(self.enabled[dev_temp][1] - graph.tasks[node].cpu_req, 2)
-                    self.enabled[dev_temp][2] = round(self.enabled[dev_temp][2] - graph.tasks[node].ram_req, 2)
-                    self.enabled[dev_temp][3] += 1
+                self.add_resources(graph, graph.placement, -1)
                 self.sum_latency += graph.latency
                 self.sum_filter_ratios += graph.selectivity
                 self.number_of_placed_dags += 1
 
+    # Take (sign -1) or give back (sign 1) the CPU and RAM that the tasks of a DAG use on their devices
+    def add_resources(self, graph, placement, sign):
+        cpu_capacity = self.infrastructure.lists()[0]
+        cpu_req, ram_req, input_rate, output_rate = graph.lists()
+        keys = self.operator_keys[graph.graph_id] if self.operator_keys is not None else None
+        for node in range(graph.number_of_nodes):
+            dev = placement[node]
+            if keys is not None:
+                devices = self.operators.setdefault(keys[node], {})
+                users = devices.get(dev, 0) - sign
+                if users > 0:
+                    devices[dev] = users
+                else:
+                    del devices[dev]
+                    if not devices:
+                        del self.operators[keys[node]]
+                # Only the first DAG that uses the operator takes its resources and only the last one gives them back
+                if users != (1 if sign == -1 else 0):
+                    continue
+            self.enabled[dev][1] = round(self.enabled[dev][1] + sign * cpu_req[node], 2)
+            self.enabled[dev][2] = round(self.enabled[dev][2] + sign * ram_req[node], 2)
+            self.enabled[dev][3] -= sign
+            if self.enabled[dev][3] == 0:  # The device was disabled
+                self.enabled[dev][0] = 0
+                self.enabled_cpu -= cpu_capacity[dev]
+                self.number_of_enabled_devices -= 1
+            elif self.enabled[dev][0] == 0:  # The device was enabled
+                self.enabled[dev][0] = 1
+                self.enabled_cpu += cpu_capacity[dev]
+                self.number_of_enabled_devices += 1
+            if self.candidate_index is not None:
+                self.candidate_index.update(dev, self.enabled[dev])
 
-# Create an experiment instance
-def set_alg_setting(graphs_init):
-    graphs = copy.deepcopy(graphs_init)
-    enabled = []
+    # Place a DAG, with the sampling ratios of its nodes if they are given (see DAG.enforce_placement), and update
+    # the free resources and the sums of the setting
+    def apply_placement(self, graph, placement, latency, F, RC, selectivity, sample_ratios=None):
+        if graph.placed:
+            self.revert_placement(graph)
+        if self.undo_log is not None:
+            self.undo_log.append((graph, None))
+        self.add_resources(graph, placement, -1)
+        self.sum_latency += latency
+        self.sum_filter_ratios += selectivity
+        self.number_of_placed_dags += 1
+        graph.enforce_placement(placement, latency, F, RC, selectivity, sample_ratios)
+
+    # Remove the placement of a DAG and update the free resources and the sums of the setting
+    def revert_placement(self, graph):
+        if self.undo_log is not None:
+            self.undo_log.append((graph, [graph.placement, graph.latency, graph.F, graph.RC, graph.selectivity,
+                                          graph.sample_ratios]))
+        self.add_resources(graph, graph.placement, 1)
+        self.number_of_placed_dags -= 1
+        if self.number_of_placed_dags == 0:  # Start the sums again from zero, without rounding errors
+            self.sum_latency = 0
+            self.sum_filter_ratios = 0
+        else:
+            self.sum_latency -= graph.latency
+            self.sum_filter_ratios -= graph.selectivity
+        graph.remove_placement()
+
+    # Add a DAG to the setting, without placing it
+    def add_graph(self, graph):
+        self.graphs.append(graph)
+        if self.operator_keys is not None:
+            self.operator_keys[graph.graph_id] = DAG.find_operator_keys([graph], self.operator_ids)[0]
+
+    # Remove a DAG that is not placed from the setting. Afterwards the graph_id of the DAGs is no longer their
+    # position in graphs
+    def remove_graph(self, graph):
+        self.graphs.remove(graph)
+        if self.operator_keys is not None:
+            del self.operator_keys[graph.graph_id]
+
+    # Function that finds if the devices of a placement of a DAG have the CPU and RAM that its nodes need, apart
+    # from the nodes whose operators already run on their device
+    def check_resources(self, graph, placement):
+        cpu_req, ram_req, input_rate, output_rate = graph.lists()
+        keys = self.operator_keys[graph.graph_id] if self.operator_keys is not None else None
+        needed = {}
+        for node in range(graph.number_of_nodes):
+            dev = placement[node]
+            if keys is None or dev not in self.operators.get(keys[node], ()):
+                cpu, ram = needed.get(dev, (0, 0))
+                needed[dev] = (cpu + cpu_req[node], ram + ram_req[node])
+        return all(round(self.enabled[dev][1] - cpu, 2) >= 0 and round(self.enabled[dev][2] - ram, 2) >= 0
+                   for dev, (cpu, ram) in needed.items())
 
-    for dev in range(number_of_edge_devices):
+    # Function that finds the nodes of a DAG whose operators already run on a device, as {node: device}.
+    # If an operator runs on more than one device, the device that most DAGs use is selected. The devices in
+    # devices_to_remove are not selected, so a node whose operator only runs on them is placed like the others
+    def find_shared_operators(self, graph, devices_to_remove=()):
+        fixed = {}
+        if self.operator_keys is not None:
+            for node, key in enumerate(self.operator_keys[graph.graph_id]):
+                devices = [dev for dev in self.operators.get(key, ()) if dev not in devices_to_remove]
+                if devices:
+                    fixed[node] = max(devices, key=self.operators[key].get)
+        return fixed
+
+    # Function that returns the candidate devices of a DAG from the candidate index, or None if there is no index
+    def find_candidates(self, graph, resource_opt, devices_to_remove, fixed):
+        if self.candidate_index is None:
+            return None
+        return self.candidate_index.find_candidates(graph, resource_opt, devices_to_remove, fixed)
+
+    # Function that finds the CPU that a placed DAG takes, where the CPU of an operator that several DAGs use
+    # is split equally between them
+    def find_cpu_share(self, graph):
+        cpu_req = graph.cpu_req.tolist()
+        if self.operator_keys is None:
+            return sum(cpu_req)
+        keys = self.operator_keys[graph.graph_id]
+        return sum(cpu_req[node] / self.operators[keys[node]][graph.placement[node]]
+                   for node in range(graph.number_of_nodes))
+
+    # Start recording the placements, to keep them with commit or undo them with rollback
+    def begin_trial(self):
+        self.undo_log = []
+        self.trial_sums = (self.sum_latency, self.sum_filter_ratios)
+
+    # Keep the placements of the trial
+    def commit(self):
+        self.undo_log = None
+        self.trial_sums = None
+
+    # Function that returns a mark of the trial, to undo only the placements that follow it with rollback
+    def mark(self):
+        return len(self.undo_log), self.sum_latency, self.sum_filter_ratios
+
+    # Undo the placements of the trial, in reverse order. If a mark is given, only the placements after the mark
+    # are undone and the trial goes on
+    def rollback(self, mark=None):
+        undo_log = self.undo_log
+        self.undo_log = None
+        length, sum_latency, sum_filter_ratios = mark if mark is not None else (0, *self.trial_sums)
+        while len(undo_log) > length:
+            graph, removed = undo_log.pop()
+            if removed is None:  # The DAG was placed
+                self.revert_placement(graph)
+            else:  # The placement of the DAG was removed
+                self.apply_placement(graph, *removed)
+        self.sum_latency, self.sum_filter_ratios = sum_latency, sum_filter_ratios  # Without the rounding errors
+        if mark is not None:
+            self.undo_log = undo_log
+        else:
+            self.trial_sums = None
+
+
+# Function that finds the enabled list of an infrastructure without any placed tasks
+def free_resources(infrastructure):
+    enabled = []
+    cpu_capacity = infrastructure.cpu_capacity.tolist()
+    ram_capacity = infrastructure.ram_capacity.tolist()
+    for dev in range(infrastructure.number_of_edge_devices):
         enabled.append([0, 0, 0, 0])  # Values:[enabled, free cpu capacity, free ram capacity, number of tasks]
         enabled[dev][1] = cpu_capacity[dev]
         enabled[dev][2] = ram_capacity[dev]
-    return AlgSetting(graphs, enabled)
+    return enabled
+
+
+# Create an experiment instance, on the infrastructure of init by default. With share_operators the DAGs are
+# placed jointly and share their common operators. With cache_size the placements of the last cache_size DAG
+# signatures are cached and reused. With candidate_devices the algorithms first only consider, for each task of a
+# DAG, the candidate_devices devices that can host it with the lowest cost (see CandidateIndex)
+def set_alg_setting(graphs_init, infrastructure=None, share_operators=False, cache_size=0, candidate_devices=0):
+    infrastructure = get_infrastructure(infrastructure)
+    graphs = copy.deepcopy(graphs_init)
+    enabled = free_resources(infrastructure)
+    placement_cache = PlacementCache(infrastructure, cache_size) if cache_size > 0 else None
+    candidate_index = CandidateIndex(infrastructure, enabled, candidate_devices) if candidate_devices > 0 else None
+    return AlgSetting(graphs, enabled, infrastructure, share_operators, placement_cache, candidate_index)